@@ -1,11 +1,13 @@
 import plotly.graph_objects as go
 import streamlit as st
 
+from components.charts import line_trace
+
 def plot_balance_graph(df_monthly):
     fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=df_monthly["Month"],
-        y=df_monthly["Balance"],
+    fig.add_trace(line_trace(
+        df_monthly["Month"],
+        df_monthly["Balance"],
         mode='lines+markers',
         name='Remaining Balance',
         line=dict(color="#4CAF50")
@@ -26,16 +28,16 @@ def plot_balance_graph(df_monthly):
 
 def plot_principal_vs_interest(df_monthly):
     fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=df_monthly["Month"],
-        y=df_monthly["Principal"],
+    fig.add_trace(line_trace(
+        df_monthly["Month"],
+        df_monthly["Principal"],
         mode='lines',
         name='Principal',
         line=dict(color="#2e8b57")
     ))
-    fig.add_trace(go.Scatter(
-        x=df_monthly["Month"],
-        y=df_monthly["Interest"],
+    fig.add_trace(line_trace(
+        df_monthly["Month"],
+        df_monthly["Interest"],
         mode='lines',
         name='Interest',
         line=dict(color="#ff6347")
@@ -0,0 +1,71 @@
+"""Export throughput and peak memory for CSV, Parquet and Arrow IPC.
+
+    python -m benchmarks.bench_export --scenarios 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from engine.amortization import amortize_stack
+from engine.export import write_arrow, write_csv, write_parquet
+
+WRITERS = {
+    'csv': write_csv,
+    'parquet': write_parquet,
+    'arrow': write_arrow,
+}
+
+
+def make_schedules(scenarios, seed=0):
+    rng = np.random.default_rng(seed)
+    return amortize_stack(
+        rng.uniform(100000, 900000, scenarios), rng.choice([0.0, 3.5, 10.0, 20.0], scenarios),
+        rng.uniform(3, 9, scenarios), rng.choice([15, 30], scenarios), rng.uniform(3000, 20000, scenarios),
+        rng.integers(0, 5, scenarios), True, 100, 150,
+    )
+
+
+def bench_export(schedules, fmt, out_dir, memory_sample=200):
+    rows = sum(len(columns['Month']) for columns in schedules)
+    path = os.path.join(out_dir, f"schedules.{fmt}")
+    started = time.perf_counter()
+    WRITERS[fmt](enumerate(schedules), path)
+    seconds = time.perf_counter() - started
+    size = os.path.getsize(path)
+
+    # tracemalloc slows pure-Python formatting by an order of magnitude, so peak memory is taken
+    # on a separate, smaller run; chunked writers peak at one chunk either way
+    tracemalloc.start()
+    WRITERS[fmt](enumerate(schedules[:memory_sample]), path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'format': fmt,
+        'rows': rows,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds,
+        'mb_per_second': size / seconds / 1e6,
+        'file_mb': size / 1e6,
+        'peak_mb': peak / 1e6,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark schedule export formats.")
+    parser.add_argument("--scenarios", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    schedules = make_schedules(args.scenarios)
+    with tempfile.TemporaryDirectory() as out_dir:
+        for fmt in WRITERS:
+            r = bench_export(schedules, fmt, out_dir)
+            print(f"{r['format']:>8}: {r['rows']:,} rows in {r['seconds']:.2f}s "
+                  f"({r['rows_per_second']:,.0f} rows/s, {r['file_mb']:.1f} MB, peak {r['peak_mb']:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# The app's original month-by-month loops, kept verbatim (indentation restored) as the
+# reference the vectorized engine is checked against and timed next to.
+import pandas as pd
+
+
+def simulate_hoa_and_maintenance_reference(months, base_hoa=100, base_maint=150, annual_inflation=0.03):
+    hoa_list = []
+    maint_list = []
+    for m in range(months):
+        inflation_factor = (1 + annual_inflation) ** (m / 12)
+        hoa = base_hoa * inflation_factor
+        maintenance = base_maint * inflation_factor
+        if m % 60 == 0 and m != 0:
+            maintenance += 2000 * (0.75 + 0.5 * (m % 120 == 0))
+        hoa_list.append(round(hoa, 2))
+        maint_list.append(round(maintenance, 2))
+    return hoa_list, maint_list
+
+
+def amortize_reference(home_price, down_payment_percent_input, interest_rate, loan_term_years, monthly_income, extra_payment_percent, pmi_drops_off, base_hoa, base_maint):
+    down_payment = home_price * (down_payment_percent_input / 100)
+    loan_amount = home_price - down_payment
+    monthly_interest = interest_rate / 100 / 12
+    total_months = loan_term_years * 12
+    down_payment_percent = (down_payment / home_price) * 100
+    monthly_principal_interest = (
+        loan_amount * (monthly_interest * (1 + monthly_interest) ** total_months) /
+        ((1 + monthly_interest) ** total_months - 1)
+    ) if monthly_interest > 0 else loan_amount / total_months
+    pmi_rate = 0.0055 if loan_term_years == 30 else 0.003
+    initial_pmi_monthly = (loan_amount * pmi_rate) / 12 if down_payment_percent < 20 else 0
+    hoa_schedule, maint_schedule = simulate_hoa_and_maintenance_reference(1200, base_hoa, base_maint)
+    amortization_rows = []
+    balance = loan_amount
+    month = 1
+    cumulative_interest = 0
+    cumulative_principal = 0
+    while balance > 0 and month <= 1200:
+        monthly_hoa = hoa_schedule[month - 1]
+        monthly_maintenance = maint_schedule[month - 1]
+        interest_payment = balance * monthly_interest
+        principal_payment = monthly_principal_interest - interest_payment
+        extra_payment = (extra_payment_percent / 100) * monthly_income
+        total_principal = principal_payment + extra_payment
+        if total_principal > balance:
+            total_principal = balance
+            principal_payment = balance
+            total_payment = balance + interest_payment + monthly_hoa + monthly_maintenance
+        else:
+            total_payment = monthly_principal_interest + extra_payment + monthly_hoa + monthly_maintenance
+        balance -= total_principal
+        cumulative_interest += interest_payment
+        cumulative_principal += total_principal
+        current_pmi = 0
+        if initial_pmi_monthly > 0:
+            equity_percent = (cumulative_principal + down_payment) / home_price * 100
+            if not pmi_drops_off or equity_percent < 20:
+                current_pmi = initial_pmi_monthly
+        amortization_rows.append({
+            'Month': month,
+            'Payment': round(total_payment + current_pmi, 2),
+            'Principal': round(total_principal, 2),
+            'Interest': round(interest_payment, 2),
+            'PMI': round(current_pmi, 2),
+            'HOA': round(monthly_hoa, 2),
+            'Maintenance': round(monthly_maintenance, 2),
+            'Cumulative Principal': round(cumulative_principal, 2),
+            'Cumulative Interest': round(cumulative_interest, 2),
+            'Balance': round(balance, 2)
+        })
+        month += 1
+    return pd.DataFrame(amortization_rows)
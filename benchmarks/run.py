@@ -0,0 +1,252 @@
+"""Benchmark suite for the amortization engine, cost simulation, rendering and export.
+
+    python -m benchmarks.run --out results.json
+    python -m benchmarks.run --save-baseline baseline.json
+    python -m benchmarks.run --baseline baseline.json --tolerance 0.25
+
+Each case is timed as the best of --repeats runs, with the loop count chosen so
+one run takes at least 0.2 s. Before anything is timed, engine schedules are
+checked against the original loop in benchmarks.reference. The exit status is 1
+if that check fails or if any case is slower than the baseline by more than
+--tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import timeit
+
+import numpy as np
+
+from benchmarks.bench_export import WRITERS, make_schedules
+from benchmarks.reference import amortize_reference, simulate_hoa_and_maintenance_reference
+from engine.amortization import COLUMNS, amortize, amortize_stack, schedule_frame
+from engine.arm import amortize_events, arm_events, merge_events
+from engine.costs import simulate_hoa_and_maintenance
+from engine.optimizer import extra_for_interest_cap, extra_for_payoff, split_budget
+from engine.payments import extra_steps, recurring_lump_sum
+from engine.rollups import rollup
+from engine.summary import payoff_summary
+
+# (term, extra % of income, down payment %); under 20% down carries PMI
+LOANS = [
+    (term, extra, down)
+    for term in (15, 30)
+    for extra in (0, 10)
+    for down in (20.0, 10.0)
+]
+
+BATCH_SIZES = (1, 1000, 100000, 1000000)
+
+# Timed for context only; the original loops are never held to the baseline
+REFERENCE_GROUPS = {'reference', 'costs_reference'}
+
+# Cents; the engine and the loop may round the last cumulative total a cent apart
+CHECK_TOLERANCE = 0.011
+
+
+def loan_args(term, extra, down, home_price=300000, interest_rate=6.5, monthly_income=6000):
+    return (home_price, down, interest_rate, term, monthly_income, extra, True, 100, 150)
+
+
+def loan_name(term, extra, down):
+    return f"{term}y" + ("+extra" if extra else "") + ("+pmi" if down < 20 else "")
+
+
+def random_loans(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return (
+        rng.uniform(100000, 900000, n), rng.choice([0.0, 3.5, 10.0, 20.0], n), rng.uniform(3, 9, n),
+        rng.choice([15, 30], n), rng.uniform(3000, 20000, n), rng.integers(0, 20, n), rng.random(n) < 0.7,
+        rng.choice([0.0, 100.0, 350.0], n), rng.choice([0.0, 150.0, 275.0], n),
+    )
+
+
+# ----------------------------------------------------------------------------------------
+# Reference check
+# -----------------------------------------------------------------------------------------
+def check_reference(samples=200, seed=0):
+    cases = [loan_args(*loan) for loan in LOANS]
+    cases += [tuple(np.asarray(values[i]).item() for values in random_loans(samples, seed)) for i in range(samples)]
+
+    row_mismatches, value_mismatches, max_diff = 0, 0, 0.0
+    for args in cases:
+        expected = amortize_reference(*args)
+        actual = schedule_frame(amortize(*args))
+        # The loop can leave a $0 row behind for float residue the engine treats as paid off
+        if len(expected) == len(actual) + 1 and expected['Principal'].iloc[-1] == 0:
+            expected = expected.iloc[:-1]
+        if len(expected) != len(actual):
+            row_mismatches += 1
+            continue
+        diff = float((expected[COLUMNS] - actual[COLUMNS]).abs().to_numpy().max()) if len(actual) else 0.0
+        max_diff = max(max_diff, diff)
+        value_mismatches += diff > CHECK_TOLERANCE
+
+    summary = payoff_summary(*random_loans(samples, seed))
+    schedules = amortize_stack(*random_loans(samples, seed))
+    month_mismatches = int(sum(len(columns['Month']) != n for columns, n in zip(schedules, summary['Payoff Months'])))
+
+    return {
+        'cases': len(cases),
+        'row_mismatches': row_mismatches,
+        'value_mismatches': int(value_mismatches),
+        'max_abs_diff': round(max_diff, 6),
+        'summary_month_mismatches': month_mismatches,
+        'passed': row_mismatches == 0 and value_mismatches == 0 and month_mismatches == 0,
+    }
+
+
+# ----------------------------------------------------------------------------------------
+# Cases
+# -----------------------------------------------------------------------------------------
+def build_cases(max_batch=max(BATCH_SIZES), out_dir=None):
+    # name -> (callable, items per call)
+    import plotly.graph_objects as go
+
+    from components.charts import line_trace
+    from engine.export import csv_bytes, parquet_bytes
+    from engine.report import render_items, report_items
+
+    cases = {}
+    for loan in LOANS:
+        args = loan_args(*loan)
+        cases[f"amortize/{loan_name(*loan)}"] = (lambda args=args: amortize(*args), 1)
+        cases[f"reference/{loan_name(*loan)}"] = (lambda args=args: amortize_reference(*args), 1)
+
+    cases["costs/1200"] = (lambda: simulate_hoa_and_maintenance(1200, 100, 150), 1)
+    cases["costs_reference/1200"] = (lambda: simulate_hoa_and_maintenance_reference(1200, 100, 150), 1)
+
+    for n in BATCH_SIZES:
+        if n <= max_batch:
+            loans = random_loans(n)
+            cases[f"summary/{n}"] = (lambda loans=loans: payoff_summary(*loans), n)
+    for n in (1000, 100000):
+        if n <= max_batch:
+            loans = random_loans(n)
+            cases[f"payoff_target/{n}"] = (lambda loans=loans: extra_for_payoff(*loans[:4], 180), n)
+            cases[f"interest_cap/{n}"] = (lambda loans=loans: extra_for_interest_cap(*loans[:4], 100000.0), n)
+    loans = random_loans(50)
+    cases["budget_split/50"] = (lambda loans=loans: split_budget(*loans[:4], 5000.0), 50)
+    for n in (50, 1000):
+        loans = random_loans(n)
+        cases[f"stack/{n}"] = (lambda loans=loans: amortize_stack(*loans), n)
+        events = arm_events(loans[2], loans[3], 4.0)
+        cases[f"arm/{n}"] = (lambda loans=loans, events=events: amortize_events(*loans, events=events), n)
+        # Biweekly, a yearly lump sum and two steps in the extra payment
+        plan = merge_events(recurring_lump_sum(5000.0, until=360), extra_steps([36, 84], [200.0, 500.0]))
+        cases[f"plan/{n}"] = (lambda loans=loans, plan=plan: amortize_events(*loans, events=plan, payment_factor=13 / 12), n)
+
+    columns = amortize(*loan_args(30, 0, 10.0))
+    cases["frame/30y"] = (lambda: schedule_frame(columns), 1)
+    cases["rollup/30y"] = (lambda: rollup(columns, 12, 300000, 30000, 6000), 1)
+
+    def balance_figure():
+        fig = go.Figure()
+        fig.add_trace(line_trace(columns['Month'], columns['Balance'], mode='lines+markers', name='Balance'))
+        fig.update_layout(xaxis_title="Month", yaxis_title="Balance ($)", template="plotly_white")
+        return fig.to_json()
+
+    cases["figure/balance"] = (balance_figure, 1)
+
+    report = report_items({
+        "Home Price": 300000, "Loan Amount": 270000.0, "Interest Rate": 6.5, "Loan Term": 30,
+        "P&I": 1706.58, "Tax": 300.0, "Insurance": 100.0, "PMI": 123.75, "HOA": 100, "Maintenance": 150,
+        "Total Payment": 2480.33, "DTI": 41.34, "Payoff Time": "17y 2m", "Total Paid": 612345.67, "Total Interest": 212345.67,
+    })
+    cases["report/pdf"] = (lambda: render_items(report), 1)
+
+    cases["export/csv"] = (lambda: csv_bytes(columns), 1)
+    cases["export/parquet"] = (lambda: parquet_bytes(columns), 1)
+    if out_dir is not None:
+        schedules = make_schedules(200)
+        for fmt, write in WRITERS.items():
+            path = os.path.join(out_dir, f"schedules.{fmt}")
+            cases[f"export/{fmt}-200"] = (lambda write=write, path=path: write(enumerate(schedules), path), 200)
+    return cases
+
+
+def time_case(fn, repeats=5):
+    # autorange picks the loop count that makes one run last at least 0.2 s
+    timer = timeit.Timer(fn)
+    loops, _ = timer.autorange()
+    runs = [seconds / loops for seconds in timer.repeat(repeat=repeats, number=loops)]
+    return {'best': min(runs), 'median': float(np.median(runs)), 'loops': loops, 'repeats': repeats}
+
+
+def run_suite(repeats=5, max_batch=max(BATCH_SIZES), pattern=None, log=sys.stderr):
+    with tempfile.TemporaryDirectory() as out_dir:
+        cases = build_cases(max_batch, out_dir)
+        results = {}
+        for name, (fn, items) in cases.items():
+            if pattern and pattern not in name:
+                continue
+            result = time_case(fn, repeats)
+            result['items'] = items
+            results[name] = result
+            print(f"{name:<32} {result['best'] * 1000:>10.3f} ms  ({result['best'] / items * 1e6:,.2f} us/item)", file=log)
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance=0.25):
+    # Cases slower than baseline by more than `tolerance`, as (name, baseline s, current s, ratio)
+    regressions = []
+    for name, result in results.items():
+        if name.split('/')[0] in REFERENCE_GROUPS:
+            continue
+        previous = baseline.get('cases', {}).get(name)
+        if previous is None:
+            continue
+        ratio = result['best'] / previous['best']
+        if ratio > 1 + tolerance:
+            regressions.append((name, previous['best'], result['best'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the mortgage engine against a saved baseline.")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", help="write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--max-batch", type=int, default=max(BATCH_SIZES), help="largest summary batch to time")
+    parser.add_argument("--filter", help="only time cases whose name contains this")
+    parser.add_argument("--skip-check", action="store_true", help="skip the reference check")
+    args = parser.parse_args(argv)
+
+    check = None if args.skip_check else check_reference()
+    if check is not None:
+        print(f"reference check: {'passed' if check['passed'] else 'FAILED'} {check}", file=sys.stderr)
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+        },
+        'check': check,
+        'cases': run_suite(args.repeats, args.max_batch, args.filter),
+    }
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+
+    failed = check is not None and not check['passed']
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report['cases'], json.load(f), args.tolerance)
+        for name, before, after, ratio in regressions:
+            print(f"REGRESSION {name}: {before * 1000:.3f} ms -> {after * 1000:.3f} ms ({ratio:.2f}x)", file=sys.stderr)
+        failed = failed or bool(regressions)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,86 @@
+import json
+
+import numpy as np
 import streamlit as st
 import plotly.graph_objects as go
 
+# Traces longer than this are drawn with WebGL instead of SVG
+WEBGL_THRESHOLD = 500
+# About one point per two horizontal pixels of a chart inside an expander
+PIXEL_BUDGET = 300
+
+
+def minmax_downsample(x, y, budget=PIXEL_BUDGET):
+    # Keep the lowest and highest point of each bucket (plus both ends), so peaks like the
+    # maintenance spikes survive. Returns the kept indices in x order.
+    n = len(y)
+    if n <= budget:
+        return np.arange(n)
+    buckets = max(budget // 2, 1)
+    size = -(-n // buckets)
+    buckets = -(-n // size)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+    # A bucket of nothing but NaN (gaps in the data) keeps its first point
+    padded[np.isnan(padded).all(axis=1), 0] = 0.0
+    offsets = np.arange(buckets) * size
+    keep = np.concatenate([
+        [0, n - 1],
+        offsets + np.nanargmin(padded, axis=1),
+        offsets + np.nanargmax(padded, axis=1),
+    ])
+    return np.unique(keep)
+
+
+# Values sampled per series to estimate its JSON size per point
+SIZE_SAMPLE = 32
+
+
+def _json_bytes_per_value(values):
+    # Average JSON length of an evenly spaced sample, so the estimate costs the same for any length
+    values = np.asarray(values)
+    sample = values[np.linspace(0, len(values) - 1, min(len(values), SIZE_SAMPLE)).astype(int)]
+    return len(json.dumps(sample.tolist())) / len(sample)
+
+
+def line_trace(x, y, stats=None, pixel_budget=PIXEL_BUDGET, webgl_threshold=WEBGL_THRESHOLD, **scatter_kwargs):
+    # Drop-in for go.Scatter on long series. The visible range is what gets downsampled, so
+    # narrowing it (the year-range slider) brings back every exact point once it fits the budget.
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    keep = minmax_downsample(x, y, pixel_budget)
+    trace_type = go.Scattergl if len(x) > webgl_threshold else go.Scatter
+    if len(keep) < len(x) and scatter_kwargs.get('mode') == 'lines+markers':
+        scatter_kwargs['mode'] = 'lines'
+
+    if stats is not None:
+        stats['points_in'] = stats.get('points_in', 0) + len(x)
+        stats['points_out'] = stats.get('points_out', 0) + len(keep)
+        if len(keep) < len(x):
+            saved = (len(x) - len(keep)) * (_json_bytes_per_value(x) + _json_bytes_per_value(y))
+            stats['bytes_saved'] = stats.get('bytes_saved', 0) + int(saved)
+
+    return trace_type(x=x[keep], y=y[keep], **scatter_kwargs)
+
+
+def payload_caption(stats):
+    if stats.get('bytes_saved'):
+        st.caption(
+            f"Showing {stats['points_out']:,} of {stats['points_in']:,} points "
+            f"({stats['bytes_saved'] / 1024:,.1f} KB less to send). Narrow the range for every point."
+        )
+
+
 def draw_balance_chart(filtered_df, key_suffix=""):
     st.markdown(f'<div class="chart-kpi"><h3>📈 Balance Timeline ({key_suffix})</h3></div>', unsafe_allow_html=True)
     with st.expander(f"📉 Balance Over Time ({key_suffix})", expanded=True):
+        stats = {}
         fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=filtered_df["Month"],
-            y=filtered_df["Balance"],
+        fig.add_trace(line_trace(
+            filtered_df["Month"],
+            filtered_df["Balance"],
+            stats,
             mode='lines+markers',
             name='Balance',
             line=dict(color='blue')
@@ -20,3 +93,4 @@ def draw_balance_chart(filtered_df, key_suffix=""):
             margin=dict(r=120)
         )
         st.plotly_chart(fig, use_container_width=True, key=f"balance_chart_{key_suffix}")
+        payload_caption(stats)
@@ -0,0 +1,52 @@
+import streamlit as st
+from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
+
+from engine.history import SORTABLE
+
+PAGE_SIZES = [10, 25, 50, 100]
+
+
+def render_history_grid(store, key="history"):
+    # One page of saved calculations, sorted and filtered in SQLite.
+    # Returns the selected rows and the active filters.
+    lo_price, hi_price, lo_rate, hi_rate = store.bounds()
+    if lo_price is None:
+        st.info("No calculations saved yet.")
+        return [], None
+
+    col1, col2, col3 = st.columns(3)
+    sort_by = col1.selectbox("Sort By", SORTABLE, key=f"{key}_sort")
+    ascending = col2.radio("Order", ["Descending", "Ascending"], horizontal=True, key=f"{key}_order") == "Ascending"
+    page_size = col3.selectbox("Rows per Page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+
+    col1, col2 = st.columns(2)
+    price_range = col1.slider("Home Price", float(lo_price), float(max(hi_price, lo_price + 1)), (float(lo_price), float(max(hi_price, lo_price + 1))), key=f"{key}_price")
+    rate_range = col2.slider("Interest Rate", float(lo_rate), float(max(hi_rate, lo_rate + 0.01)), (float(lo_rate), float(max(hi_rate, lo_rate + 0.01))), key=f"{key}_rate")
+    filters = {'price_range': price_range, 'rate_range': rate_range}
+
+    pages = max(-(-store.count(**filters) // page_size), 1)
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1, key=f"{key}_page") - 1
+    frame, matching, pages = store.page(page, page_size, sort_by, ascending, **filters)
+
+    gb = GridOptionsBuilder.from_dataframe(frame)
+    gb.configure_default_column(groupable=True, value=True, editable=False, sortable=False)
+    gb.configure_selection(selection_mode="single", use_checkbox=True)
+    grid_options = gb.build()
+
+    grid_response = AgGrid(
+    frame,
+    gridOptions=grid_options,
+    height=400,
+    theme="streamlit",
+    fit_columns_on_grid_load=True,
+    update_mode=GridUpdateMode.SELECTION_CHANGED,
+    key=f"{key}_grid",
+    )
+    st.caption(f"Rows {page * page_size + 1 if matching else 0:,}–{min((page + 1) * page_size, matching):,} of {matching:,}")
+
+    selected = grid_response['selected_rows']
+    if selected is None:
+        selected = []
+    elif hasattr(selected, 'to_dict'):
+        selected = selected.to_dict('records')
+    return selected, filters
@@ -0,0 +1,48 @@
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from engine.instrument import stage_percentiles
+
+# Reruns kept per session for the panel
+PERF_RUNS = 50
+
+
+def render_perf_panel(records, recent=10):
+    records = list(records)
+    with st.sidebar.expander("⏱️ Performance", expanded=False):
+        stats = stage_percentiles(records)
+        table = pd.DataFrame([
+            {'Stage': name, 'p50 (ms)': s['p50'] * 1000, 'p95 (ms)': s['p95'] * 1000, 'Last (ms)': s['last'] * 1000, 'Runs': s['runs']}
+            for name, s in stats.items()
+        ]).sort_values('p95 (ms)', ascending=False)
+        st.dataframe(table.round(2), hide_index=True, use_container_width=True)
+
+        last = records[-recent:]
+        # Sub-stages (named "tab › part") are already inside their tab's time, so only top-level stages stack
+        stages = [name for name in stats if name != 'total' and '›' not in name]
+        fig = go.Figure([
+            go.Bar(
+            x=[record['run'] for record in last],
+            y=[record['stages'].get(name, {}).get('seconds', 0) * 1000 for record in last],
+            name=name
+            )
+            for name in stages
+        ])
+        fig.update_layout(
+        barmode='stack',
+        xaxis_title="Rerun",
+        yaxis_title="ms",
+        template="plotly_white",
+        height=300,
+        margin=dict(l=10, r=10, t=10, b=10),
+        showlegend=False
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+        memory = {name: entry for name, entry in records[-1]['stages'].items() if 'peak_kb' in entry}
+        if memory:
+            st.dataframe(pd.DataFrame([
+                {'Stage': name, 'Allocated (KB)': entry['allocated_kb'], 'Peak (KB)': entry['peak_kb']}
+                for name, entry in memory.items()
+            ]).round(1), hide_index=True, use_container_width=True)
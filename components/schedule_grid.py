@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from st_aggrid import AgGrid, GridOptionsBuilder
+
+PAGE_SIZES = [12, 24, 60, 120]
+
+
+def schedule_page(columns, page=0, page_size=24, sort_by=None, ascending=True, filter_by=None, filter_range=None):
+    # One page of a columnar schedule (dict of equal-length arrays). Filtering and sorting
+    # run on the arrays; only the rows of the requested page are copied into a DataFrame.
+    names = list(columns)
+    total = len(columns[names[0]]) if names else 0
+    rows = np.arange(total)
+
+    if filter_by is not None and filter_range is not None:
+        values = np.asarray(columns[filter_by])
+        lo, hi = filter_range
+        rows = rows[(values >= lo) & (values <= hi)]
+
+    if sort_by is not None:
+        order = np.argsort(np.asarray(columns[sort_by])[rows], kind='stable')
+        rows = rows[order if ascending else order[::-1]]
+
+    pages = max(-(-len(rows) // page_size), 1)
+    page = min(max(page, 0), pages - 1)
+    visible = rows[page * page_size:(page + 1) * page_size]
+    frame = pd.DataFrame({name: np.asarray(columns[name])[visible] for name in names})
+    return frame, len(rows), pages
+
+
+def render_schedule_grid(columns, key="schedule"):
+    names = list(columns)
+    col1, col2, col3 = st.columns(3)
+    sort_by = col1.selectbox("Sort By", names, key=f"{key}_sort")
+    ascending = col2.radio("Order", ["Ascending", "Descending"], horizontal=True, key=f"{key}_order") == "Ascending"
+    page_size = col3.selectbox("Rows per Page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+
+    col1, col2, col3 = st.columns(3)
+    filter_by = col1.selectbox("Filter Column", names, key=f"{key}_filter")
+    values = np.asarray(columns[filter_by])
+    lo = float(values.min()) if len(values) else 0.0
+    hi = float(values.max()) if len(values) else 0.0
+    # The bounds and page are keyed on the schedule's length and the column's range, so a new
+    # schedule starts from its own full range instead of the last one's bounds
+    data_key = f"{filter_by}_{len(values)}_{lo:g}_{hi:g}"
+    filter_lo = col2.number_input("From", value=lo, key=f"{key}_filter_lo_{data_key}")
+    filter_hi = col3.number_input("To", value=hi, key=f"{key}_filter_hi_{data_key}")
+
+    _, matching, pages = schedule_page(columns, 0, page_size, None, True, filter_by, (filter_lo, filter_hi))
+    page = st.number_input(
+        f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1, key=f"{key}_page_{data_key}"
+    ) - 1
+    frame, matching, pages = schedule_page(columns, page, page_size, sort_by, ascending, filter_by, (filter_lo, filter_hi))
+
+    gb = GridOptionsBuilder.from_dataframe(frame)
+    gb.configure_default_column(resizable=True, sortable=False, filter=False)
+    gridOptions = gb.build()
+    AgGrid(
+    frame,
+    gridOptions=gridOptions,
+    enable_enterprise_modules=False,
+    theme="material",
+    fit_columns_on_grid_load=True,
+    height=min(400, 60 + 30 * len(frame)),
+    key=f"{key}_grid",
+    )
+    st.caption(f"Rows {page * page_size + 1 if matching else 0:,}–{min((page + 1) * page_size, matching):,} of {matching:,}")
@@ -0,0 +1 @@
+# Lets pytest import the top-level engine/ and components/ packages from tests/
@@ -0,0 +1,44 @@
+import numpy as np
+
+from engine.amortization import level_payment, unwrap
+
+
+# ----------------------------------------------------------------------------------------
+# Maximum Affordable Price
+# -----------------------------------------------------------------------------------------
+def max_home_price(monthly_income, interest_rate, loan_term_years, property_tax_rate=1.2, annual_insurance=1200,
+                   base_hoa=100, base_maint=150, target_dti=28, down_payment_percent=None, down_payment=None):
+    # Highest home price whose total monthly payment (P&I, tax, insurance, initial PMI,
+    # HOA and maintenance, as on the Payment tab) is target_dti % of income.
+    # Give either down_payment_percent or a fixed cash down_payment. All arguments broadcast,
+    # so thousands of income / rate combinations solve in one call.
+    #
+    # The payment is linear in price on each side of the 20% PMI threshold, so each piece is
+    # solved exactly and the threshold handled with np.where; no iteration is needed.
+    # Monthly P&I per dollar borrowed
+    factor = level_payment(1.0, np.asarray(interest_rate, dtype=float) / 100 / 12, np.asarray(loan_term_years) * 12)
+    tax = np.asarray(property_tax_rate, dtype=float) / 100 / 12
+    pmi = np.where(np.asarray(loan_term_years) == 30, 0.0055, 0.003) / 12
+    budget = (np.asarray(target_dti, dtype=float) / 100 * np.asarray(monthly_income, dtype=float) -
+              np.asarray(annual_insurance, dtype=float) / 12 - base_hoa - base_maint)
+
+    if down_payment is None:
+        down_share = np.asarray(20.0 if down_payment_percent is None else down_payment_percent, dtype=float) / 100
+        per_dollar = (1 - down_share) * (factor + np.where(down_share < 0.2, pmi, 0.0)) + tax
+        price = budget / per_dollar
+    else:
+        cash = np.asarray(down_payment, dtype=float)
+        # Price up to 5x the cash down carries no PMI
+        no_pmi = (budget + cash * factor) / (factor + tax)
+        with_pmi = (budget + cash * (factor + pmi)) / (factor + pmi + tax)
+        price = np.where(no_pmi <= 5 * cash, no_pmi, np.maximum(with_pmi, 5 * cash))
+        # Can't borrow a negative amount; below the cash on hand every price is affordable
+        price = np.maximum(price, np.where(budget >= 0, cash, 0.0))
+        down_share = np.where(price > 0, cash / np.where(price > 0, price, 1), 1.0)
+
+    price = np.maximum(price, 0.0)
+    loan_amount = np.maximum(price * (1 - down_share), 0.0)
+    return {
+        'Max Home Price': unwrap(price),
+        'Max Loan Amount': unwrap(loan_amount),
+    }
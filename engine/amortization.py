@@ -0,0 +1,176 @@
+import numpy as np
+
+from engine.costs import MAINTENANCE_SPIKES, simulate_hoa_and_maintenance
+from engine.rounding import round_cents
+
+
+MAX_MONTHS = 1200
+
+# Balances this close to zero are float noise from the closed form, not money owed
+PAYOFF_TOLERANCE = 1e-6
+
+COLUMNS = [
+    'Month',
+    'Payment',
+    'Principal',
+    'Interest',
+    'PMI',
+    'HOA',
+    'Maintenance',
+    'Cumulative Principal',
+    'Cumulative Interest',
+    'Balance',
+]
+
+
+def level_payment(loan_amount, monthly_interest, total_months):
+    # P&I that pays loan_amount off in total_months level payments; arguments broadcast
+    loan_amount, monthly_interest, total_months = (
+        np.asarray(value, dtype=float) for value in (loan_amount, monthly_interest, total_months)
+    )
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        growth = (1 + monthly_interest) ** total_months
+        level = loan_amount * (monthly_interest * growth) / (growth - 1)
+        flat = loan_amount / total_months
+    return np.where(monthly_interest > 0, level, flat)
+
+
+def unwrap(value):
+    # A plain Python number for 0-d results, so scalar callers get scalars back
+    return value.item() if np.ndim(value) == 0 else value
+
+
+def monthly_principal_interest(loan_amount, monthly_interest, total_months):
+    return unwrap(level_payment(loan_amount, monthly_interest, total_months))
+
+
+def pmi_rate(loan_term_years):
+    return 0.0055 if loan_term_years == 30 else 0.003
+
+
+def initial_pmi_monthly(loan_amount, loan_term_years, down_payment_percent):
+    return (loan_amount * pmi_rate(loan_term_years)) / 12 if down_payment_percent < 20 else 0
+
+
+# ----------------------------------------------------------------------------------------
+# Amortization Schedule
+# -----------------------------------------------------------------------------------------
+def amortize(home_price, down_payment_percent, interest_rate, loan_term_years, monthly_income,
+             extra_payment_percent, pmi_drops_off=True, base_hoa=100, base_maint=150,
+             max_months=MAX_MONTHS, annual_inflation=0.03, maintenance_spikes=MAINTENANCE_SPIKES):
+    return amortize_stack(
+        home_price, down_payment_percent, interest_rate, loan_term_years, monthly_income,
+        extra_payment_percent, pmi_drops_off, base_hoa, base_maint,
+        max_months, annual_inflation, maintenance_spikes,
+    )[0]
+
+
+def amortize_stack(home_price, down_payment_percent, interest_rate, loan_term_years, monthly_income,
+                   extra_payment_percent, pmi_drops_off=True, base_hoa=100, base_maint=150,
+                   max_months=MAX_MONTHS, annual_inflation=0.03, maintenance_spikes=MAINTENANCE_SPIKES):
+    # Any number of scenarios amortized together as (scenario, month) arrays.
+    # Arguments broadcast to one value per scenario; returns one column dict per scenario.
+    home_price, down_payment_percent, interest_rate, loan_term_years, monthly_income, \
+        extra_payment_percent, pmi_drops_off, base_hoa, base_maint = np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(value, dtype=float)) for value in (
+                home_price, down_payment_percent, interest_rate, loan_term_years, monthly_income,
+                extra_payment_percent, pmi_drops_off, base_hoa, base_maint,
+            ))
+        )
+
+    down_payment = home_price * (down_payment_percent / 100)
+    loan_amount = home_price - down_payment
+    monthly_interest = interest_rate / 100 / 12
+    payment = level_payment(loan_amount, monthly_interest, loan_term_years * 12)
+    extra_payment = (extra_payment_percent / 100) * monthly_income
+
+    # Balance after k level payments, k = 0..max_months, without stepping month by month
+    k = np.arange(max_months + 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annuity = ((payment + extra_payment) / monthly_interest)[:, None]
+        balances = (loan_amount[:, None] - annuity) * (1 + monthly_interest[:, None]) ** k + annuity
+    flat = loan_amount[:, None] - (payment + extra_payment)[:, None] * k
+    balances = np.where(monthly_interest[:, None] > 0, balances, flat)
+
+    return tabulate_schedule(
+        balances, monthly_interest[:, None], payment[:, None], extra_payment[:, None], home_price, down_payment,
+        loan_term_years, pmi_drops_off, base_hoa, base_maint, max_months, annual_inflation, maintenance_spikes,
+    )
+
+
+def tabulate_schedule(balances, monthly_interest, payment, extra_payment, home_price, down_payment,
+                      loan_term_years, pmi_drops_off, base_hoa, base_maint, max_months=MAX_MONTHS,
+                      annual_inflation=0.03, maintenance_spikes=MAINTENANCE_SPIKES):
+    # Schedule columns from a (scenario, 0..max_months) balance path. monthly_interest, the
+    # scheduled P&I and the extra principal are (scenario, 1) for a level loan or
+    # (scenario, month) when they change.
+    scenarios = np.arange(len(balances))
+    loan_amount = home_price - down_payment
+
+    settled = balances[:, 1:] <= PAYOFF_TOLERANCE
+    paid_off = settled.any(axis=1)
+    payoff_months = np.where(paid_off, settled.argmax(axis=1) + 1, max_months)
+    horizon = int(payoff_months.max())
+
+    # Costs are only simulated out to the last payoff month
+    hoa, maintenance = simulate_hoa_and_maintenance(
+        horizon, base_hoa[:, None], base_maint[:, None], annual_inflation, maintenance_spikes
+    )
+
+    opening = balances[:, :horizon]
+    closing = balances[:, 1:horizon + 1].copy()
+    interest = opening * monthly_interest[:, :horizon]
+    principal = (payment[:, :horizon] - interest) + extra_payment[:, :horizon]
+    total_payment = payment[:, :horizon] + extra_payment[:, :horizon] + hoa + maintenance
+
+    # Final partial payment clears whatever is left
+    done = scenarios[paid_off]
+    last = payoff_months[paid_off] - 1
+    principal[done, last] = opening[done, last]
+    total_payment[done, last] = opening[done, last] + interest[done, last] + hoa[done, last] + maintenance[done, last]
+    closing[done, last] = 0.0
+
+    cumulative_principal = np.cumsum(principal, axis=1)
+    cumulative_interest = np.cumsum(interest, axis=1)
+
+    pmi_monthly = np.where(
+        down_payment / home_price * 100 < 20,
+        loan_amount * np.where(loan_term_years == 30, pmi_rate(30), pmi_rate(15)) / 12,
+        0.0,
+    )
+    equity_percent = (cumulative_principal + down_payment[:, None]) / home_price[:, None] * 100
+    charged = (pmi_drops_off[:, None] == 0) | (equity_percent < 20)
+    pmi = np.where(charged & (pmi_monthly[:, None] > 0), pmi_monthly[:, None], 0.0)
+
+    table = {
+        'Payment': round_cents(total_payment + pmi),
+        'Principal': round_cents(principal),
+        'Interest': round_cents(interest),
+        'PMI': round_cents(pmi),
+        'HOA': hoa,
+        'Maintenance': maintenance,
+        'Cumulative Principal': round_cents(cumulative_principal),
+        'Cumulative Interest': round_cents(cumulative_interest),
+        'Balance': round_cents(closing),
+    }
+    months = np.arange(1, horizon + 1)
+    return [
+        {'Month': months[:n], **{name: values[s, :n] for name, values in table.items()}}
+        for s, n in zip(scenarios, payoff_months.tolist())
+    ]
+
+
+def schedule_frame(columns):
+    # pandas is only loaded by the views that want a DataFrame
+    import pandas as pd
+
+    return pd.DataFrame({name: columns[name] for name in COLUMNS})
+
+
+def month_range(columns, first_month, last_month):
+    # Rows for months first_month..last_month as views into the schedule arrays. Months are
+    # sorted, so two binary searches find the bounds instead of a mask over every row.
+    month = np.asarray(columns["Month"])
+    start = np.searchsorted(month, first_month, side='left')
+    stop = np.searchsorted(month, last_month, side='right')
+    return {name: np.asarray(columns[name])[start:stop] for name in COLUMNS}
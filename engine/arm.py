@@ -0,0 +1,266 @@
+import numpy as np
+
+from engine.amortization import MAX_MONTHS, level_payment, tabulate_schedule
+from engine.costs import MAINTENANCE_SPIKES
+
+
+# Fixed for fixed_months, then index + margin every reset_every months. Each reset moves at
+# most periodic_cap, and the rate never leaves [min(rate_floor, start rate), start rate + lifetime_cap].
+ARM_DEFAULTS = {
+    'fixed_months': 60,
+    'reset_every': 12,
+    'margin': 2.75,
+    'periodic_cap': 2.0,
+    'lifetime_cap': 5.0,
+    'rate_floor': 2.0,
+}
+
+# Month of an event slot that never takes effect
+NEVER = 2 ** 31
+
+
+def capped_rates(interest_rate, index_rates, terms=ARM_DEFAULTS):
+    # Note rate after each reset, index_rates[..., reset] -> rates[..., reset]. Only the
+    # periodic cap carries from one reset to the next, so the loop is over resets, never months.
+    interest_rate = np.asarray(interest_rate, dtype=float)
+    index_rates = np.asarray(index_rates, dtype=float)
+    rates = np.empty(np.broadcast_shapes(interest_rate.shape + (1,), index_rates.shape))
+    floor = np.minimum(terms['rate_floor'], interest_rate)
+    ceiling = interest_rate + terms['lifetime_cap']
+    rate = interest_rate
+    for reset in range(rates.shape[-1]):
+        target = index_rates[..., reset] + terms['margin']
+        target = np.clip(target, rate - terms['periodic_cap'], rate + terms['periodic_cap'])
+        rate = np.clip(target, floor, ceiling)
+        rates[..., reset] = rate
+    return rates
+
+
+# ----------------------------------------------------------------------------------------
+# Events
+# -----------------------------------------------------------------------------------------
+# Events are a dict of [scenario, event] arrays. Only month is required:
+#   month  payments made before the event; what changes applies from payment month + 1
+#   rate   annual rate % from then on, or NaN to keep the current rate
+#   term   months left to run from the event, restarting the clock (a refinance), or NaN to
+#          keep the current maturity
+#   cost   amount added to the balance at the event, e.g. closing costs rolled into a refinance
+#   extra  monthly extra payment from then on, or NaN to keep the current one
+#   lump   one-off payment made with payment `month`, straight to principal
+# A rate or term re-solves the scheduled P&I over the months left (a reset or refinance);
+# extra payments and lump sums only shorten the loan. Within a month, events without a rate or
+# term apply first, so a reset or refinance is solved on the balance after that month's lump
+# sums and costs. Slots at month NEVER do nothing.
+EVENT_FIELDS = {'month': NEVER, 'rate': np.nan, 'term': np.nan, 'cost': 0.0, 'extra': np.nan, 'lump': 0.0}
+
+
+def event_columns(events):
+    # Every field of EVENT_FIELDS, broadcast to one shape with at least one event axis
+    events = events or {'month': np.zeros(0, dtype=np.int64)}
+    columns = np.broadcast_arrays(*(
+        np.atleast_1d(np.asarray(events.get(name, default), dtype=np.int64 if name == 'month' else float))
+        for name, default in EVENT_FIELDS.items()
+    ))
+    return dict(zip(EVENT_FIELDS, columns))
+
+
+def merge_events(*events):
+    # One event set from several, e.g. ARM resets plus a payment plan. segment_balances sorts
+    # the events, so the result does not depend on the order they are merged in.
+    columns = [event_columns(each) for each in events if each]
+    if not columns:
+        return None
+    lead = np.broadcast_shapes(*(each['month'].shape[:-1] for each in columns))
+    return {
+        name: np.concatenate([np.broadcast_to(each[name], lead + each[name].shape[-1:]) for each in columns], axis=-1)
+        for name in EVENT_FIELDS
+    }
+
+
+def stack_events(events):
+    # One [scenario, event] set from per-scenario sets of different lengths, padded with NEVER slots
+    columns = [event_columns(each) for each in events]
+    width = max(each['month'].shape[-1] for each in columns)
+    return {
+        name: np.stack([
+            np.concatenate([each[name].reshape(-1), np.full(width - each[name].size, default, dtype=each[name].dtype)])
+            for each in columns
+        ])
+        for name, default in EVENT_FIELDS.items()
+    }
+
+
+def arm_events(interest_rate, loan_term_years, index_rate, terms=None):
+    # One event per reset. index_rate is the index at each reset: a scalar or one value per
+    # scenario (the index stays where it is), or a [scenario, reset] path. Any of the ARM
+    # terms may also be given per scenario.
+    terms = {**ARM_DEFAULTS, **(terms or {})}
+    fixed_months = np.asarray(terms['fixed_months'], dtype=np.int64)
+    last_month = int(np.max(loan_term_years)) * 12
+    resets = max(0, -(-(last_month - int(fixed_months.min())) // int(terms['reset_every'])))
+    months = fixed_months[..., None] + int(terms['reset_every']) * np.arange(resets)
+
+    index_rate = np.asarray(index_rate, dtype=float)
+    if index_rate.ndim < 2:
+        index_rate = np.broadcast_to(index_rate[..., None], index_rate.shape + (resets,))
+    rates = capped_rates(interest_rate, index_rate, terms)
+    return {'month': np.broadcast_to(months, rates.shape), 'rate': rates}
+
+
+def refinance(events, month, rate, term_years, closing_costs=0.0):
+    # Adds a refinance at `month` into a fixed rate for a fresh term. Rate changes already
+    # scheduled from that month on belonged to the old loan and are dropped; payment events stay.
+    columns = event_columns(events)
+    month = np.asarray(month, dtype=np.int64)
+    dropped = ~np.isnan(columns['rate']) & (columns['month'] >= month[..., None])
+    columns['month'] = np.where(dropped, NEVER, columns['month'])
+    return merge_events(columns, {
+        'month': month[..., None],
+        'rate': np.asarray(rate, dtype=float)[..., None],
+        'term': np.asarray(term_years, dtype=float)[..., None] * 12,
+        'cost': np.asarray(closing_costs, dtype=float)[..., None],
+    })
+
+
+# ----------------------------------------------------------------------------------------
+# Segmented Amortization
+# -----------------------------------------------------------------------------------------
+def _level_payment(balance, monthly_interest, remaining):
+    # P&I that clears `balance` in `remaining` payments; a loan past maturity is due in full
+    return np.where(remaining > 0, level_payment(balance, monthly_interest, remaining), balance * (1 + monthly_interest))
+
+
+def _balance_after(balance, monthly_interest, payment, k):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annuity = payment / monthly_interest
+        level = (balance - annuity) * (1 + monthly_interest) ** k + annuity
+    return np.where(monthly_interest > 0, level, balance - payment * k)
+
+
+def segment_balances(loan_amount, interest_rate, term_months, extra_payment, events=None, max_months=MAX_MONTHS,
+                     payment_factor=1.0):
+    # Balance after k payments (k = 0..max_months) for each scenario, with the monthly rate,
+    # scheduled P&I and extra principal (extra payment plus lump sums) of every month. Between
+    # events the balance follows the level-payment closed form, so Python only loops over
+    # events, never months. payment_factor scales the scheduled P&I actually paid: 13/12 for
+    # biweekly half-payments, which add up to one extra payment a year.
+    loan_amount = np.asarray(loan_amount, dtype=float)
+    n = len(loan_amount)
+    interest_rate, term_months, extra_payment, payment_factor = (
+        np.broadcast_to(np.asarray(value, dtype=float), (n,))
+        for value in (interest_rate, term_months, extra_payment, payment_factor)
+    )
+    columns = event_columns(events)
+    shape = (n, columns['month'].shape[-1])
+    recasts = ~np.isnan(columns['rate']) | ~np.isnan(columns['term'])
+    # By month, then recasts after the lump sums, costs and extra changes of the same month
+    order = np.lexsort((np.broadcast_to(recasts, shape), np.broadcast_to(columns['month'], shape)), axis=-1)
+    columns = {
+        name: np.take_along_axis(np.broadcast_to(values, order.shape), order, axis=1) for name, values in columns.items()
+    }
+
+    starts = np.concatenate([np.zeros((n, 1), dtype=np.int64), np.clip(columns['month'], 0, max_months)], axis=1)
+    ends = np.concatenate([starts[:, 1:], np.full((n, 1), max_months)], axis=1)
+    first = {'rate': interest_rate, 'term': term_months, 'cost': 0.0, 'extra': extra_payment, 'lump': 0.0}
+    segments = {
+        name: np.concatenate([np.broadcast_to(np.asarray(first[name], dtype=float), (n,))[:, None], columns[name]], axis=1)
+        for name in first
+    }
+
+    openings, rates, levels, extras, lumps = (np.empty(starts.shape) for _ in range(5))
+    opening = loan_amount
+    rate = maturity = level = extra = np.zeros(n)
+    for segment in range(starts.shape[1]):
+        start = starts[:, segment]
+        new_rate, new_term = segments['rate'][:, segment], segments['term'][:, segment]
+        recast = ~np.isnan(new_rate) | ~np.isnan(new_term)
+        rate = np.where(np.isnan(new_rate), rate, new_rate / 100 / 12)
+        maturity = np.where(np.isnan(new_term), maturity, start + new_term)
+        extra = np.where(np.isnan(segments['extra'][:, segment]), extra, segments['extra'][:, segment])
+
+        opening = np.maximum(opening + segments['cost'][:, segment], 0.0)
+        lump = np.clip(segments['lump'][:, segment], 0.0, opening)
+        opening = opening - lump
+        level = np.where(recast, _level_payment(opening, rate, maturity - start), level)
+
+        openings[:, segment], rates[:, segment], levels[:, segment], lumps[:, segment] = opening, rate, level, lump
+        extras[:, segment] = level * (payment_factor - 1) + extra
+        opening = _balance_after(opening, rate, level + extras[:, segment], ends[:, segment] - start)
+
+    balances = np.empty((n, max_months + 1))
+    balances[:, 0] = loan_amount
+    payment = levels + extras
+    if (starts == starts[:1]).all():
+        # Every scenario shares the event months (one ARM product or payment plan, say): fill
+        # each segment's columns with per-scenario values broadcast along the months
+        monthly_interest, scheduled, extra_principal = (np.empty((n, max_months)) for _ in range(3))
+        for segment, (start, end) in enumerate(zip(starts[0].tolist(), ends[0].tolist())):
+            if end > start:
+                r = rates[:, segment, None]
+                balances[:, start + 1:end + 1] = _balance_after(
+                    openings[:, segment, None], r, payment[:, segment, None], np.arange(1, end - start + 1)
+                )
+                monthly_interest[:, start:end] = r
+                scheduled[:, start:end] = levels[:, segment, None]
+                extra_principal[:, start:end] = extras[:, segment, None]
+    else:
+        # Segment of each payment: an event at month m switches segments from payment m + 1 on
+        rows = np.arange(n)[:, None]
+        marks = np.zeros((n, max_months + 1), dtype=np.int64)
+        np.add.at(marks, (np.broadcast_to(rows, order.shape), starts[:, 1:]), 1)
+        segment_of = np.cumsum(marks[:, :max_months], axis=1)
+        monthly_interest = rates[rows, segment_of]
+        scheduled = levels[rows, segment_of]
+        extra_principal = extras[rows, segment_of]
+        balances[:, 1:] = _balance_after(
+            openings[rows, segment_of], monthly_interest, payment[rows, segment_of],
+            np.arange(1, max_months + 1) - starts[rows, segment_of],
+        )
+    # The balance carried out of each event month has its lump sum paid and any costs rolled in
+    np.put_along_axis(balances, starts[:, 1:], openings[:, 1:], axis=1)
+    paid_in = (starts[:, 1:] > 0) & (starts[:, 1:] <= max_months) & (lumps[:, 1:] > 0)
+    rows, slots = np.nonzero(paid_in)
+    np.add.at(extra_principal, (rows, starts[rows, slots + 1] - 1), lumps[rows, slots + 1])
+    return balances, monthly_interest, scheduled, extra_principal
+
+
+def amortize_events(home_price, down_payment_percent, interest_rate, loan_term_years, monthly_income,
+                    extra_payment_percent, pmi_drops_off=True, base_hoa=100, base_maint=150, events=None,
+                    payment_factor=1.0, max_months=MAX_MONTHS, annual_inflation=0.03,
+                    maintenance_spikes=MAINTENANCE_SPIKES):
+    # amortization.amortize_stack with events (ARM resets, refinances, extra payment changes,
+    # lump sums); the same columns per scenario. interest_rate and the extra % of income hold
+    # until an event changes them.
+    home_price, down_payment_percent, interest_rate, loan_term_years, monthly_income, \
+        extra_payment_percent, pmi_drops_off, base_hoa, base_maint = np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(value, dtype=float)) for value in (
+                home_price, down_payment_percent, interest_rate, loan_term_years, monthly_income,
+                extra_payment_percent, pmi_drops_off, base_hoa, base_maint,
+            ))
+        )
+    down_payment = home_price * (down_payment_percent / 100)
+    extra_payment = (extra_payment_percent / 100) * monthly_income
+    balances, monthly_interest, scheduled, extra_principal = segment_balances(
+        home_price - down_payment, interest_rate, loan_term_years * 12, extra_payment, events, max_months,
+        payment_factor,
+    )
+    return tabulate_schedule(
+        balances, monthly_interest, scheduled, extra_principal, home_price, down_payment,
+        loan_term_years, pmi_drops_off, base_hoa, base_maint, max_months, annual_inflation, maintenance_spikes,
+    )
+
+
+def schedule_summary(columns, principal_interest):
+    # summary.payoff_summary's keys read off a built schedule, for loans with events
+    payments = len(columns['Month'])
+    pmi_months = int(np.count_nonzero(columns['PMI']))
+    return {
+        'Payoff Months': payments,
+        'Monthly P&I': float(principal_interest),
+        'First Payment': float(columns['Payment'][0]) if payments else 0.0,
+        'Total Interest': float(columns['Cumulative Interest'][-1]) if payments else 0.0,
+        'Total Paid': float(np.sum(columns['Payment'])),
+        'Initial PMI': float(columns['PMI'][0]) if payments else 0.0,
+        'PMI Months': pmi_months,
+        'PMI Drop Month': pmi_months + 1 if 0 < pmi_months < payments else 0,
+    }
@@ -0,0 +1,143 @@
+"""Headless batch runner: amortize a whole loan book from CSV or Parquet.
+
+    python -m engine.batch loans.csv --out results/ --workers 8 --schedules
+
+Input columns use the names in engine.loans.LOAN_FIELDS; any column left out
+takes the sidebar default. An optional ``loan_id`` column is carried through.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+import pandas as pd
+
+from engine.amortization import amortize_stack
+from engine.export import write_csv, write_parquet
+from engine.loans import LOAN_DEFAULTS, LOAN_FIELDS, amortize_args
+from engine.summary import payoff_summary, total_monthly_payment
+
+# Loans amortized together per amortize_stack call when writing schedules
+SCHEDULE_BATCH = 1000
+
+
+def read_loans(path, chunk_size):
+    # Yield DataFrame chunks so a multi-million row book is never fully in memory
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def normalize_loans(df, start):
+    loans = pd.DataFrame(index=df.index)
+    loans['loan_id'] = df['loan_id'] if 'loan_id' in df else np.arange(start, start + len(df))
+    for field in LOAN_FIELDS:
+        loans[field] = df[field] if field in df else LOAN_DEFAULTS[field]
+    loans['pmi_drops_off'] = loans['pmi_drops_off'].astype(bool)
+    return loans.reset_index(drop=True)
+
+
+def summarize_loans(loans):
+    home_price = loans['home_price'].to_numpy(float)
+    down_payment_percent = loans['down_payment_percent'].to_numpy(float)
+    monthly_income = loans['monthly_income'].to_numpy(float)
+    summary = payoff_summary(*(loans[field].to_numpy() for field in [
+        'home_price', 'down_payment_percent', 'interest_rate', 'loan_term_years', 'monthly_income',
+        'extra_payment_percent', 'pmi_drops_off', 'base_hoa', 'base_maint',
+    ]))
+
+    loan_amount = home_price * (1 - down_payment_percent / 100)
+    monthly_payment = total_monthly_payment(
+        summary, home_price, loans['property_tax_rate'].to_numpy(float), loans['annual_insurance'].to_numpy(float),
+        loans['base_hoa'].to_numpy(float), loans['base_maint'].to_numpy(float),
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dti = np.where(monthly_income > 0, monthly_payment / monthly_income * 100, np.nan)
+
+    return pd.DataFrame({
+        'loan_id': loans['loan_id'].to_numpy(),
+        'Loan Amount': np.round(loan_amount, 2),
+        'Monthly P&I': np.round(summary['Monthly P&I'], 2),
+        'Total Monthly Payment': np.round(monthly_payment, 2),
+        'DTI': np.round(dti, 2),
+        'Payoff Months': summary['Payoff Months'],
+        'Total Interest': np.round(summary['Total Interest'], 2),
+        'Total Paid': np.round(summary['Total Paid'], 2),
+        'PMI Months': summary['PMI Months'],
+    })
+
+
+def schedule_loans(loans, batch_size=SCHEDULE_BATCH):
+    # (loan_id, columns) per loan. Loans are amortized batch_size at a time in one vectorized
+    # call and streamed out, so only one batch of a shard's schedules is in memory at once.
+    loan_ids = loans['loan_id'].tolist()
+    for start in range(0, len(loans), batch_size):
+        batch = loans.iloc[start:start + batch_size]
+        schedules = amortize_stack(*amortize_args({field: batch[field].to_numpy() for field in LOAN_FIELDS}))
+        yield from zip(loan_ids[start:start + batch_size], schedules)
+
+
+def write_frame(df, path):
+    if path.endswith('.parquet'):
+        write_parquet(df, path)
+    else:
+        write_csv(df, path)
+
+
+def process_shard(shard, df, start, out_dir, fmt, schedules):
+    # Runs in a worker: results go straight to disk instead of back through the pool
+    loans = normalize_loans(df, start)
+    write_frame(summarize_loans(loans), os.path.join(out_dir, f"summary-{shard:05d}.{fmt}"))
+    if schedules:
+        path = os.path.join(out_dir, f"schedule-{shard:05d}.{fmt}")
+        write = write_parquet if fmt == 'parquet' else write_csv
+        write(schedule_loans(loans), path, label_column='loan_id')
+    return len(loans)
+
+
+def run_batch(path, out_dir, workers=None, chunk_size=100000, fmt='csv', schedules=False, log=sys.stderr):
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    done = 0
+    pending = set()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        start = 0
+        for shard, df in enumerate(read_loans(path, chunk_size)):
+            # Keep at most two shards per worker in flight so reading never races ahead of compute
+            while len(pending) >= workers * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                done += sum(f.result() for f in finished)
+            pending.add(pool.submit(process_shard, shard, df, start, out_dir, fmt, schedules))
+            start += len(df)
+        for future in pending:
+            done += future.result()
+
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed if elapsed > 0 else float('inf')
+    print(f"{done:,} loans in {elapsed:.2f}s ({rate:,.0f} loans/s, {workers} workers)", file=log)
+    return {'loans': done, 'seconds': elapsed, 'loans_per_second': rate, 'workers': workers}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Amortize a loan book from CSV or Parquet.")
+    parser.add_argument("loans", help="CSV or .parquet file of loans")
+    parser.add_argument("--out", default="batch_output", help="Output directory for shard files")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="Loans per shard")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="Output file format")
+    parser.add_argument("--schedules", action="store_true", help="Also write full monthly schedules")
+    args = parser.parse_args(argv)
+
+    run_batch(args.loans, args.out, args.workers, args.chunk_size, args.format, args.schedules)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+import numpy as np
+
+from engine.amortization import amortize
+from engine.arm import amortize_events, schedule_summary
+from engine.fixedpoint import CentsSchedule, amortize_cents
+from engine.loans import LOAN_FIELDS, amortize_args
+from engine.payments import has_plan, payment_factor, plan_events, plan_key
+from engine.rollups import loan_rollup
+from engine.summary import payoff_summary
+
+
+# Decimal places kept per field; number inputs that differ below this are the same loan
+KEY_PRECISION = {
+    'home_price': 2,
+    'down_payment_percent': 4,
+    'interest_rate': 4,
+    'property_tax_rate': 4,
+    'annual_insurance': 2,
+    'monthly_income': 2,
+    'extra_payment_percent': 4,
+    'base_hoa': 2,
+    'base_maint': 2,
+}
+
+
+# Share of max_disk_bytes the disk tier is trimmed back to once it goes over
+DISK_PRUNE_TO = 0.9
+
+
+def cache_key(loan):
+    key = []
+    for field in LOAN_FIELDS:
+        value = loan[field]
+        if field == 'pmi_drops_off':
+            key.append(bool(value))
+        elif field == 'loan_term_years':
+            key.append(int(value))
+        else:
+            key.append(round(float(value), KEY_PRECISION[field]))
+    return tuple(key)
+
+
+def _freeze(result):
+    # One cached result can be handed to every session at once, so nothing in it stays writable.
+    # A CentsSchedule only hands out fresh or read-only arrays already.
+    columns, summary = result
+    if not isinstance(columns, CentsSchedule):
+        # Rows of a stacked run are views into one block; owned copies let eviction free them
+        columns = {name: values.copy() if values.base is not None else values for name, values in columns.items()}
+        for values in columns.values():
+            values.flags.writeable = False
+        columns = MappingProxyType(columns)
+    return columns, MappingProxyType(dict(summary))
+
+
+def _table_bytes(columns):
+    return sum(values.nbytes for values in columns.values())
+
+
+def _result_bytes(result):
+    columns, _ = result
+    if isinstance(columns, CentsSchedule):
+        return columns.nbytes
+    return _table_bytes(columns)
+
+
+class ScheduleCache:
+    # LRU of (columns, summary) results, bounded by entry count and array bytes,
+    # with an optional directory of .npz files that outlives the process. Safe to share
+    # between threads (e.g. every Streamlit session); stored results are read-only.
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, disk_dir=None, max_disk_bytes=512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        # key -> {months per period: rollup table}, dropped along with the key's entry
+        self._rollups = {}
+        # key -> bytes counted for it when stored; a CentsSchedule grows as derived columns are
+        # read, so eviction subtracts what was added rather than the current size
+        self._charged = {}
+        self._bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.RLock()
+        # The disk tier's files are read and written outside _lock; this one only guards the
+        # running size total and pruning, so a miss never waits on another session's disk I/O
+        self._disk_lock = threading.Lock()
+        self._disk_bytes = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_bytes = sum(stat.st_size for stat, _ in self._disk_files())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        result = self._load(key)
+        with self._lock:
+            if result is not None:
+                self.disk_hits += 1
+                return self._remember(key, result)
+            self.misses += 1
+            return None
+
+    def put(self, key, result):
+        # Returns the stored, read-only copy of result
+        with self._lock:
+            result = self._remember(key, result)
+        self._store(key, result)
+        return result
+
+    def _schedule_key(self, loan, exact):
+        exact = exact and not has_plan(loan)
+        return cache_key(loan) + plan_key(loan) + (('cents',) if exact else ()), exact
+
+    def get_or_compute(self, loan, exact=False):
+        # exact=True keeps a fixed-point CentsSchedule, whose summary is totalled from it in cents.
+        # A loan with a payment plan (engine.payments) goes through the event engine instead.
+        key, exact = self._schedule_key(loan, exact)
+        result = self.get(key)
+        if result is None:
+            # Computed outside the lock; two sessions missing on the same key both compute it
+            args = amortize_args(loan)
+            if has_plan(loan):
+                schedule = amortize_events(*args, events=plan_events(loan), payment_factor=payment_factor(loan))[0]
+                result = (schedule, schedule_summary(schedule, payoff_summary(*args)['Monthly P&I']))
+            elif exact:
+                schedule = amortize_cents(*args)
+                result = (schedule, schedule.summary())
+            else:
+                result = (amortize(*args), payoff_summary(*args))
+            result = self.put(key, result)
+        return result
+
+    def summary(self, loan, exact=False):
+        # The loan's summary without building its schedule when the closed form covers it (plain
+        # monthly payments, float engine); payment plans and exact cents need the schedule
+        key, exact = self._schedule_key(loan, exact)
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key][1]
+        if has_plan(loan) or exact:
+            return self.get_or_compute(loan, exact)[1]
+        return payoff_summary(*amortize_args(loan))
+
+    def rollup(self, loan, months_per_period=12, exact=False):
+        # Period totals of the loan's schedule (engine.rollups), built on first request and kept
+        # with its cache entry, so every later chart, KPI and report reads the compact table
+        key, _ = self._schedule_key(loan, exact)
+        with self._lock:
+            table = self._rollups.get(key, {}).get(months_per_period)
+        if table is None:
+            columns, _ = self.get_or_compute(loan, exact)
+            table = loan_rollup(columns, loan, months_per_period)
+            for values in table.values():
+                values.flags.writeable = False
+            with self._lock:
+                if key in self._entries and months_per_period not in self._rollups.get(key, {}):
+                    self._rollups.setdefault(key, {})[months_per_period] = table
+                    # Charged to the entry, so evicting it gives the rollup's bytes back too
+                    self._charged[key] += _table_bytes(table)
+                    self._bytes += _table_bytes(table)
+                    self._evict()
+        return table
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._rollups.clear()
+            self._charged.clear()
+            self._bytes = 0
+
+    def _remember(self, key, result):
+        result = _freeze(result)
+        if key in self._entries:
+            self._forget(key)
+        self._entries[key] = result
+        self._charged[key] = _result_bytes(result)
+        self._bytes += self._charged[key]
+        self._evict()
+        return result
+
+    def _evict(self):
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._forget(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _forget(self, key):
+        del self._entries[key]
+        self._rollups.pop(key, None)
+        self._bytes -= self._charged.pop(key)
+
+    # ----------------------------------------------------------------------------------------
+    # Disk tier
+    # -----------------------------------------------------------------------------------------
+    def _path(self, key):
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_dir, f"{digest}.npz")
+
+    def _load(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if any(name.startswith('cents:') for name in data.files):
+                    columns = CentsSchedule.from_arrays(
+                        {name[len('cents:'):]: data[name] for name in data.files if name.startswith('cents:')}
+                    )
+                else:
+                    columns = {name[len('col:'):]: data[name] for name in data.files if name.startswith('col:')}
+                summary = json.loads(str(data['summary']))
+        except (OSError, ValueError, KeyError):
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Pruned by another session since it was read
+            pass
+        return columns, summary
+
+    def _store(self, key, result):
+        if not self.disk_dir:
+            return
+        columns, summary = result
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if isinstance(columns, CentsSchedule):
+            arrays = {f"cents:{name}": values for name, values in columns.arrays().items()}
+        else:
+            arrays = {f"col:{name}": values for name, values in columns.items()}
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, summary=json.dumps(dict(summary)), **arrays)
+        written = os.path.getsize(tmp_path)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        with self._disk_lock:
+            self._disk_bytes += written - replaced
+            if self._disk_bytes > self.max_disk_bytes:
+                self._prune_disk()
+
+    def _disk_files(self):
+        # (stat, path) of every cached file, oldest first; files another process removes are skipped
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith('.npz'):
+                path = os.path.join(self.disk_dir, name)
+                try:
+                    files.append((os.stat(path), path))
+                except FileNotFoundError:
+                    continue
+        return sorted(files, key=lambda item: item[0].st_mtime)
+
+    def _prune_disk(self):
+        # Only runs once the running total passes the limit. The directory is rescanned, since
+        # other processes may share it, and trimmed to DISK_PRUNE_TO of the limit so the next few
+        # writes don't prune again.
+        files = self._disk_files()
+        total = sum(stat.st_size for stat, _ in files)
+        for stat, path in files:
+            if total <= self.max_disk_bytes * DISK_PRUNE_TO:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= stat.st_size
+        self._disk_bytes = total
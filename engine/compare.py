@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from engine.amortization import amortize_stack
+from engine.arm import ARM_DEFAULTS, amortize_events, arm_events, merge_events, schedule_summary, stack_events
+from engine.cache import cache_key
+from engine.loans import LOAN_FIELDS, amortize_args
+from engine.optimizer import split_budget
+from engine.payments import has_plan, payment_factor, plan_events, plan_key
+from engine.summary import payoff_summary, total_monthly_payment
+
+
+def is_arm(loan):
+    # Loans with an ARM fixed period reset to index + margin (engine.arm.ARM_DEFAULTS) after it
+    return loan.get('arm_fixed_years', 0) > 0
+
+
+def scenario_key(loan):
+    key = cache_key(loan) + plan_key(loan)
+    if is_arm(loan):
+        key += ('arm', int(loan['arm_fixed_years']), round(float(loan['arm_index_rate']), 4))
+    return key
+
+
+def scenario_events(loan):
+    # ARM resets and payment-plan events for one loan dict, or None for a plain fixed-rate loan
+    events = [plan_events(loan)]
+    if is_arm(loan):
+        events.append(arm_events(
+            loan['interest_rate'], loan['loan_term_years'], loan['arm_index_rate'],
+            {'fixed_months': int(loan['arm_fixed_years']) * 12},
+        ))
+    return merge_events(*events)
+
+
+def amortize_scenarios(loans, cache=None):
+    # (columns, summary) per loan. Cached scenarios are reused; the rest are stacked into one
+    # amortize_stack / payoff_summary call for plain fixed-rate loans and one amortize_events
+    # call for ARMs and payment plans, rather than amortized one by one.
+    keys = [scenario_key(loan) for loan in loans]
+    results = [cache.get(key) if cache is not None else None for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    events = {i: scenario_events(loans[i]) for i in missing}
+    level = [i for i in missing if events[i] is None and not has_plan(loans[i])]
+    evented = [i for i in missing if i not in level]
+
+    if level:
+        args = [np.array(values) for values in zip(*(amortize_args(loans[i]) for i in level))]
+        schedules = amortize_stack(*args)
+        summaries = payoff_summary(*args)
+        for row, i in enumerate(level):
+            summary = {name: values[row].item() for name, values in summaries.items()}
+            results[i] = (schedules[row], summary)
+
+    if evented:
+        args = [np.array(values) for values in zip(*(amortize_args(loans[i]) for i in evented))]
+        schedules = amortize_events(
+            *args, events=stack_events([events[i] for i in evented]),
+            payment_factor=np.array([payment_factor(loans[i]) for i in evented]),
+        )
+        principal_interest = np.atleast_1d(payoff_summary(*args)['Monthly P&I'])
+        for row, i in enumerate(evented):
+            results[i] = (schedules[row], schedule_summary(schedules[row], principal_interest[row]))
+
+    if cache is not None:
+        for i in missing:
+            results[i] = cache.put(keys[i], results[i])
+    return results
+
+
+def compare_scenarios(loans, names=None, cache=None):
+    names = names or [f"Loan {i + 1}" for i in range(len(loans))]
+    results = amortize_scenarios(loans, cache)
+
+    fields = {field: np.array([loan[field] for loan in loans], dtype=float) for field in LOAN_FIELDS}
+    summaries = {name: np.array([summary[name] for _, summary in results]) for name in results[0][1]} if results else {}
+    monthly_payment = total_monthly_payment(
+        summaries, fields['home_price'], fields['property_tax_rate'], fields['annual_insurance'],
+        fields['base_hoa'], fields['base_maint'],
+    ) if results else np.array([])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dti = np.where(fields['monthly_income'] > 0, monthly_payment / fields['monthly_income'] * 100, np.nan)
+
+    payoff_months = summaries.get('Payoff Months', np.array([], dtype=int))
+    table = pd.DataFrame({
+        'Scenario': names,
+        'Home Price': fields['home_price'],
+        'Loan Amount': fields['home_price'] * (1 - fields['down_payment_percent'] / 100),
+        'Interest Rate': fields['interest_rate'],
+        'Rate Type': [
+            f"{int(loan['arm_fixed_years'])}/{12 // ARM_DEFAULTS['reset_every']} ARM" if is_arm(loan) else "Fixed"
+            for loan in loans
+        ],
+        'Term (years)': fields['loan_term_years'].astype(int),
+        'Monthly Payment': np.round(monthly_payment, 2),
+        'DTI %': np.round(dti, 2),
+        'Time to Payoff': [f"{n // 12}y {n % 12}m" for n in payoff_months],
+        'Total Interest': np.round(summaries.get('Total Interest', []), 2),
+        'Total Paid': np.round(summaries.get('Total Paid', []), 2),
+    })
+    return table, [columns for columns, _ in results]
+
+
+def budget_split(loans, budget, names=None):
+    # Which scenarios an extra monthly budget should go to for the most interest saved, on top of
+    # each loan's own extra payment. Uses each loan's starting rate and monthly payments.
+    names = names or [f"Loan {i + 1}" for i in range(len(loans))]
+    fields = {field: np.array([loan[field] for loan in loans], dtype=float) for field in LOAN_FIELDS}
+    split = split_budget(
+        fields['home_price'], fields['down_payment_percent'], fields['interest_rate'], fields['loan_term_years'],
+        budget, extra_payment=fields['extra_payment_percent'] / 100 * fields['monthly_income'],
+    )
+    return pd.DataFrame({
+        'Scenario': names,
+        'Added Extra Payment': np.round(split['Extra Payment'], 2),
+        'Total Interest': np.round(split['Total Interest'], 2),
+        'Interest Saved': np.round(split['Interest Saved'], 2),
+    })
@@ -0,0 +1,59 @@
+from functools import lru_cache
+
+import numpy as np
+
+from engine.rounding import round_cents
+
+
+# (every N months, one-off amount) pairs. Spikes from several entries stack, so the
+# default is $1,500 every 5 years and $2,500 every 10.
+MAINTENANCE_SPIKES = ((60, 1500.0), (120, 1000.0))
+
+_CURVE_BLOCK = 1200
+
+
+@lru_cache(maxsize=32)
+def _inflation_curve(annual_inflation, length):
+    curve = (1 + annual_inflation) ** (np.arange(length) / 12)
+    curve.flags.writeable = False
+    return curve
+
+
+def inflation_factors(months, annual_inflation=0.03):
+    # One curve per inflation rate, grown in whole blocks when a longer horizon is asked for
+    length = max(_CURVE_BLOCK, -(-months // _CURVE_BLOCK) * _CURVE_BLOCK)
+    return _inflation_curve(float(annual_inflation), length)[:months]
+
+
+def spike_amounts(months, spikes=MAINTENANCE_SPIKES):
+    amounts = np.zeros(months)
+    for every, amount in spikes:
+        amounts[every::every] += amount
+    return amounts
+
+
+def inflated_total(months, base, annual_inflation=0.03):
+    # Sum of base * (1 + inflation) ** (m / 12) for m = 0..months-1, without the array
+    growth = (1 + annual_inflation) ** (1 / 12)
+    if growth == 1:
+        return base * months
+    return base * (growth ** months - 1) / (growth - 1)
+
+
+def spike_total(months, spikes=MAINTENANCE_SPIKES):
+    last = np.maximum(np.asarray(months) - 1, 0)
+    return sum(amount * (last // every) for every, amount in spikes)
+
+
+# -----------------------------------------------------------------------------------------
+# Simulate HOA and Maintenance
+# ------------------------------------------------------------------------------------------
+def simulate_hoa_and_maintenance(months, base_hoa=100, base_maint=150, annual_inflation=0.03,
+                                 spikes=MAINTENANCE_SPIKES):
+    inflation_factor = inflation_factors(months, annual_inflation)
+
+    # Bases may be (n, 1) arrays to simulate several scenarios at once
+    hoa = base_hoa * inflation_factor
+    maintenance = base_maint * inflation_factor + spike_amounts(months, spikes)
+
+    return round_cents(hoa), round_cents(maintenance)
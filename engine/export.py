@@ -0,0 +1,139 @@
+import io
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from engine.amortization import COLUMNS
+
+CHUNK_ROWS = 50000
+
+# Parquet / Arrow column types: months fit in int16, money stays float64 so cents are exact
+COMPACT_DTYPES = {'Month': 'int16'}
+
+
+def iter_batches(source, chunk_rows=CHUNK_ROWS, label_column='Scenario'):
+    # Normalize what we export into DataFrame chunks of at most chunk_rows rows:
+    #   - one schedule as a mapping of column arrays (a dict or CentsSchedule)
+    #   - a DataFrame (e.g. batch schedules with a loan_id column)
+    #   - an iterable of (label, columns) pairs for several scenarios
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, max(len(source), 1), chunk_rows):
+            yield source.iloc[start:start + chunk_rows]
+        return
+    if isinstance(source, Mapping):
+        source = [(None, source)]
+
+    # Small schedules are gathered as arrays until a chunk fills, so one DataFrame is built
+    # per chunk and Parquet row groups stay large
+    pending, pending_rows = [], 0
+    for label, columns in source:
+        names = [name for name in COLUMNS if name in columns] or list(columns)
+        rows = len(columns[names[0]])
+        for start in range(0, rows, chunk_rows):
+            chunk = {name: np.asarray(columns[name])[start:start + chunk_rows] for name in names}
+            if label is not None:
+                chunk = {label_column: np.repeat(label, len(chunk[names[0]])), **chunk}
+            pending.append(chunk)
+            pending_rows += len(chunk[names[0]])
+            if pending_rows >= chunk_rows:
+                yield _concat(pending)
+                pending, pending_rows = [], 0
+    if pending:
+        yield _concat(pending)
+
+
+def _concat(chunks):
+    return pd.DataFrame({name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]})
+
+
+# ----------------------------------------------------------------------------------------
+# CSV
+# -----------------------------------------------------------------------------------------
+def iter_csv(source, chunk_rows=CHUNK_ROWS, label_column='Scenario'):
+    # CSV bytes one chunk at a time; peak memory is one chunk, not the whole file
+    header = True
+    for chunk in iter_batches(source, chunk_rows, label_column):
+        yield chunk.to_csv(index=False, header=header).encode('utf-8')
+        header = False
+
+
+def write_csv(source, target, chunk_rows=CHUNK_ROWS, label_column='Scenario'):
+    with _open(target) as f:
+        for block in iter_csv(source, chunk_rows, label_column):
+            f.write(block)
+
+
+def csv_bytes(source):
+    buffer = io.BytesIO()
+    write_csv(source, buffer)
+    return buffer.getvalue()
+
+
+# ----------------------------------------------------------------------------------------
+# Parquet / Arrow IPC
+# -----------------------------------------------------------------------------------------
+def _arrow_batches(source, chunk_rows, label_column):
+    import pyarrow as pa
+
+    schema = None
+    for chunk in iter_batches(source, chunk_rows, label_column):
+        chunk = chunk.astype({name: dtype for name, dtype in COMPACT_DTYPES.items() if name in chunk})
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if schema is None:
+            schema = table.schema
+        yield table.cast(schema)
+
+
+def write_parquet(source, target, chunk_rows=CHUNK_ROWS, compression='zstd', label_column='Scenario'):
+    # One row group per chunk, written as it is produced
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for table in _arrow_batches(source, chunk_rows, label_column):
+            if writer is None:
+                writer = pq.ParquetWriter(target, table.schema, compression=compression)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_arrow(source, target, chunk_rows=CHUNK_ROWS, compression='zstd', label_column='Scenario'):
+    # Arrow IPC file (Feather v2), readable with pyarrow.ipc / pandas.read_feather
+    import pyarrow as pa
+
+    writer = None
+    try:
+        for table in _arrow_batches(source, chunk_rows, label_column):
+            if writer is None:
+                options = pa.ipc.IpcWriteOptions(compression=compression)
+                writer = pa.ipc.new_file(target, table.schema, options=options)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def parquet_bytes(source):
+    buffer = io.BytesIO()
+    write_parquet(source, buffer)
+    return buffer.getvalue()
+
+
+def arrow_bytes(source):
+    buffer = io.BytesIO()
+    write_arrow(source, buffer)
+    return buffer.getvalue()
+
+
+@contextmanager
+def _open(target):
+    # Paths are opened (and closed) here; file objects are written to as-is
+    if hasattr(target, 'write'):
+        yield target
+    else:
+        with open(target, 'wb') as f:
+            yield f
@@ -0,0 +1,296 @@
+from collections.abc import Mapping
+from functools import cached_property
+
+import numpy as np
+
+from engine.amortization import COLUMNS, MAX_MONTHS, level_payment, pmi_rate
+from engine.costs import MAINTENANCE_SPIKES, simulate_hoa_and_maintenance
+from engine.rounding import round_cents
+
+# Interest rates are held as integer millionths of a percent: 6.5% -> 6_500_000
+RATE_SCALE = 10 ** 6
+_MONTHLY_DENOMINATOR = 100 * 12 * RATE_SCALE
+
+# Below this many scenarios the month loop runs on Python ints, which beats numpy's per-call overhead
+_PYTHON_LOOP_MAX = 8
+
+
+def to_cents(dollars):
+    # Dollars -> int64 cents with the engine's usual half-cent rule (see rounding.round_cents)
+    return np.rint(round_cents(dollars) * 100).astype(np.int64)
+
+
+def _read_only(values):
+    view = values.view()
+    view.flags.writeable = False
+    return view
+
+
+def _div_round(numerator, denominator):
+    # Non-negative integer division rounded half up: the lender's rule for a month's interest
+    return (2 * numerator + denominator) // (2 * denominator)
+
+
+# ----------------------------------------------------------------------------------------
+# Month recurrence in whole cents
+# -----------------------------------------------------------------------------------------
+# Each month: interest = balance * rate / 12 rounded half up to the cent; principal is the
+# scheduled P&I plus extra minus that interest. The payment that would overpay, or the
+# scheduled last month of the term, pays exactly the remaining balance (the true-up), so the
+# balance always lands on zero with no float residue.
+def _recurrence_python(loan, rate, payment, term, max_months):
+    principal, interest = [], []
+    balance = loan
+    for month in range(1, max_months + 1):
+        if balance <= 0:
+            break
+        charged = _div_round(balance * rate, _MONTHLY_DENOMINATOR)
+        paid = payment - charged
+        if paid >= balance or month == term:
+            paid = balance
+        principal.append(paid)
+        interest.append(charged)
+        balance -= paid
+    return np.array(principal, dtype=np.int64), np.array(interest, dtype=np.int64)
+
+
+def _recurrence_numpy(loan, rate, payment, term, max_months):
+    # All scenarios step together; finished ones are masked out until the last one pays off
+    if len(loan) and int(loan.max()) * int(rate.max()) * 2 >= 2 ** 63:
+        raise OverflowError("balance x rate exceeds int64; amortize this loan on its own")
+    principal = np.zeros((len(loan), max_months), dtype=np.int64)
+    interest = np.zeros((len(loan), max_months), dtype=np.int64)
+    balance = loan.copy()
+    months = np.zeros(len(loan), dtype=np.int64)
+    active = balance > 0
+    for m in range(max_months):
+        if not active.any():
+            break
+        charged = _div_round(balance * rate, _MONTHLY_DENOMINATOR)
+        paid = payment - charged
+        paid = np.where((paid >= balance) | (m + 1 == term), balance, paid)
+        principal[:, m] = np.where(active, paid, 0)
+        interest[:, m] = np.where(active, charged, 0)
+        balance = np.where(active, balance - paid, balance)
+        months += active
+        active &= balance > 0
+    return [(principal[s, :n], interest[s, :n]) for s, n in enumerate(months.tolist())]
+
+
+# ----------------------------------------------------------------------------------------
+# Compact schedule
+# -----------------------------------------------------------------------------------------
+class CentsSchedule(Mapping):
+    # One loan's schedule stored as two int64 cent arrays (principal, interest) plus scalars.
+    # Everything else (months, PMI, HOA, maintenance, payments, running totals, balance,
+    # DTI %) is derived on first access. Indexing by a COLUMNS name returns float dollars, so
+    # a CentsSchedule drops in wherever a dict of schedule columns is expected.
+
+    def __init__(self, principal, interest, loan, home, down, payment, pmi_monthly, pmi_drops_off, monthly_income,
+                 base_hoa, base_maint, annual_inflation=0.03, maintenance_spikes=MAINTENANCE_SPIKES):
+        # The schedule cache hands the same instance to every caller, so the arrays are frozen
+        self.principal = _read_only(principal)
+        self.interest = _read_only(interest)
+        self.loan = int(loan)
+        self.home = int(home)
+        self.down = int(down)
+        self.payment = int(payment)
+        self.pmi_monthly = int(pmi_monthly)
+        self.pmi_drops_off = bool(pmi_drops_off)
+        self.monthly_income = int(monthly_income)
+        self.base_hoa = float(base_hoa)
+        self.base_maint = float(base_maint)
+        self.annual_inflation = float(annual_inflation)
+        self.maintenance_spikes = tuple((int(every), float(amount)) for every, amount in maintenance_spikes)
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __contains__(self, name):
+        return name in self.keys()
+
+    def keys(self):
+        return COLUMNS + ['DTI %']
+
+    def __getitem__(self, name):
+        if name == 'Month':
+            return self.month
+        if name == 'DTI %':
+            return self.dti_percent
+        if name not in _CENTS_COLUMNS:
+            raise KeyError(name)
+        return getattr(self, _CENTS_COLUMNS[name]) / 100
+
+    @property
+    def months(self):
+        return len(self.principal)
+
+    @property
+    def nbytes(self):
+        # Stored arrays plus whatever derived columns have been materialized so far
+        return sum(value.nbytes for value in vars(self).values() if isinstance(value, np.ndarray))
+
+    @cached_property
+    def month(self):
+        return _read_only(np.arange(1, self.months + 1, dtype=np.int32))
+
+    @cached_property
+    def cumulative_principal_cents(self):
+        return _read_only(np.cumsum(self.principal))
+
+    @cached_property
+    def cumulative_interest_cents(self):
+        return _read_only(np.cumsum(self.interest))
+
+    @cached_property
+    def balance_cents(self):
+        return _read_only(self.loan - self.cumulative_principal_cents)
+
+    @cached_property
+    def pmi_months(self):
+        if not self.pmi_monthly:
+            return 0
+        if not self.pmi_drops_off:
+            return self.months
+        # Charged while equity after the payment is under 20%; equity only grows, so it is a prefix
+        under = (self.cumulative_principal_cents + self.down) * 5 < self.home
+        return int(under.argmin()) if not under.all() else self.months
+
+    @cached_property
+    def pmi_cents(self):
+        pmi = np.zeros(self.months, dtype=np.int64)
+        pmi[:self.pmi_months] = self.pmi_monthly
+        return _read_only(pmi)
+
+    @cached_property
+    def _costs_cents(self):
+        hoa, maintenance = simulate_hoa_and_maintenance(
+            self.months, self.base_hoa, self.base_maint, self.annual_inflation, self.maintenance_spikes
+        )
+        return _read_only(to_cents(hoa)), _read_only(to_cents(maintenance))
+
+    @property
+    def hoa_cents(self):
+        return self._costs_cents[0]
+
+    @property
+    def maintenance_cents(self):
+        return self._costs_cents[1]
+
+    @cached_property
+    def payment_cents(self):
+        return _read_only(self.principal + self.interest + self.pmi_cents + self.hoa_cents + self.maintenance_cents)
+
+    @cached_property
+    def dti_percent(self):
+        if not self.monthly_income:
+            return _read_only(np.full(self.months, np.nan))
+        return _read_only(self.payment_cents / self.monthly_income * 100)
+
+    def summary(self):
+        # Same keys as summary.payoff_summary, totalled exactly in cents
+        pmi_months = self.pmi_months
+        return {
+            'Payoff Months': self.months,
+            'Monthly P&I': self.payment / 100,
+            'First Payment': int(self.payment_cents[0]) / 100 if self.months else 0.0,
+            'Total Interest': int(self.interest.sum()) / 100,
+            'Total Paid': int(self.payment_cents.sum()) / 100,
+            'Initial PMI': self.pmi_monthly / 100,
+            'PMI Months': pmi_months,
+            'PMI Drop Month': pmi_months + 1 if self.pmi_monthly and pmi_months < self.months else 0,
+        }
+
+    # Stored state only, for the schedule cache's disk tier
+    def arrays(self):
+        state = {name: value for name, value in vars(self).items() if name in _STATE}
+        state['maintenance_spikes'] = np.array(self.maintenance_spikes, dtype=float).reshape(-1, 2)
+        return state
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        state = {name: arrays[name] for name in _STATE}
+        state['maintenance_spikes'] = arrays['maintenance_spikes'].tolist()
+        return cls(**state)
+
+
+_CENTS_COLUMNS = {
+    'Payment': 'payment_cents',
+    'Principal': 'principal',
+    'Interest': 'interest',
+    'PMI': 'pmi_cents',
+    'HOA': 'hoa_cents',
+    'Maintenance': 'maintenance_cents',
+    'Cumulative Principal': 'cumulative_principal_cents',
+    'Cumulative Interest': 'cumulative_interest_cents',
+    'Balance': 'balance_cents',
+}
+
+_STATE = [
+    'principal', 'interest', 'loan', 'home', 'down', 'payment', 'pmi_monthly', 'pmi_drops_off',
+    'monthly_income', 'base_hoa', 'base_maint', 'annual_inflation', 'maintenance_spikes',
+]
+
+
+# ----------------------------------------------------------------------------------------
+# Fixed-point Amortization
+# -----------------------------------------------------------------------------------------
+def amortize_cents(home_price, down_payment_percent, interest_rate, loan_term_years, monthly_income,
+                   extra_payment_percent, pmi_drops_off=True, base_hoa=100, base_maint=150,
+                   max_months=MAX_MONTHS, annual_inflation=0.03, maintenance_spikes=MAINTENANCE_SPIKES):
+    return amortize_cents_stack(
+        home_price, down_payment_percent, interest_rate, loan_term_years, monthly_income,
+        extra_payment_percent, pmi_drops_off, base_hoa, base_maint,
+        max_months, annual_inflation, maintenance_spikes,
+    )[0]
+
+
+def amortize_cents_stack(home_price, down_payment_percent, interest_rate, loan_term_years, monthly_income,
+                         extra_payment_percent, pmi_drops_off=True, base_hoa=100, base_maint=150,
+                         max_months=MAX_MONTHS, annual_inflation=0.03, maintenance_spikes=MAINTENANCE_SPIKES):
+    # Same arguments and broadcasting as amortization.amortize_stack; returns a CentsSchedule per scenario
+    home_price, down_payment_percent, interest_rate, loan_term_years, monthly_income, \
+        extra_payment_percent, pmi_drops_off, base_hoa, base_maint = np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(value, dtype=float)) for value in (
+                home_price, down_payment_percent, interest_rate, loan_term_years, monthly_income,
+                extra_payment_percent, pmi_drops_off, base_hoa, base_maint,
+            ))
+        )
+
+    home = to_cents(home_price)
+    down = to_cents(home_price * (down_payment_percent / 100))
+    loan = home - down
+    rate = np.rint(interest_rate * RATE_SCALE).astype(np.int64)
+    term = (loan_term_years * 12).astype(np.int64)
+
+    # The scheduled P&I is the float annuity payment rounded to the cent, as a lender quotes it
+    monthly_interest = interest_rate / 100 / 12
+    principal_interest = to_cents(level_payment(loan / 100, monthly_interest, term))
+    payment = principal_interest + to_cents((extra_payment_percent / 100) * monthly_income)
+
+    # Eligibility follows the quoted down payment %, not the rounded cents, so exactly 20% never carries PMI
+    pmi_monthly = np.where(
+        down_payment_percent < 20,
+        to_cents((loan / 100) * np.where(loan_term_years == 30, pmi_rate(30), pmi_rate(15)) / 12),
+        0,
+    )
+
+    if len(loan) < _PYTHON_LOOP_MAX:
+        paths = [
+            _recurrence_python(int(loan[s]), int(rate[s]), int(payment[s]), int(term[s]), max_months)
+            for s in range(len(loan))
+        ]
+    else:
+        paths = _recurrence_numpy(loan, rate, payment, term, max_months)
+
+    income = to_cents(monthly_income)
+    return [
+        CentsSchedule(
+            principal, interest, loan[s], home[s], down[s], principal_interest[s], pmi_monthly[s], pmi_drops_off[s],
+            income[s], base_hoa[s], base_maint[s], annual_inflation, maintenance_spikes,
+        )
+        for s, (principal, interest) in enumerate(paths)
+    ]
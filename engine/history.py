@@ -0,0 +1,137 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from engine.cache import cache_key
+from engine.payments import plan_key
+
+# Archive column -> SQLite column
+HISTORY_COLUMNS = {
+    'Home Price': 'home_price',
+    'Loan Amount': 'loan_amount',
+    'Interest Rate': 'interest_rate',
+    'Loan Term': 'loan_term',
+    'Monthly Payment': 'monthly_payment',
+    'Years to Payoff': 'years_to_payoff',
+    'Total Interest': 'total_interest',
+}
+
+SORTABLE = ['Saved', 'Home Price', 'Interest Rate', 'Loan Amount', 'Monthly Payment', 'Total Interest']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    input_hash TEXT PRIMARY KEY,
+    saved REAL NOT NULL,
+    home_price REAL,
+    loan_amount REAL,
+    interest_rate REAL,
+    loan_term INTEGER,
+    monthly_payment REAL,
+    years_to_payoff TEXT,
+    total_interest REAL,
+    inputs TEXT
+);
+CREATE INDEX IF NOT EXISTS history_home_price ON history (home_price);
+CREATE INDEX IF NOT EXISTS history_interest_rate ON history (interest_rate);
+CREATE INDEX IF NOT EXISTS history_saved ON history (saved);
+"""
+
+
+def input_hash(loan):
+    # Same normalized inputs as the schedule cache, so widget noise does not add rows
+    return hashlib.sha256(repr(cache_key(loan) + plan_key(loan)).encode('utf-8')).hexdigest()[:32]
+
+
+class HistoryStore:
+    # Saved calculations in SQLite, one row per distinct set of inputs. Recalculating a saved
+    # loan only refreshes its timestamp; the session remembers its last max_session hashes so
+    # plain reruns do not touch the database at all.
+
+    def __init__(self, path=':memory:', max_session=500, max_rows=100000):
+        self.path = path
+        self.max_session = max_session
+        self.max_rows = max_rows
+        self._recent = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL lets other sessions read while one writes; NORMAL skips an fsync per insert
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def record(self, loan, entry):
+        key = input_hash(loan)
+        if key in self._recent:
+            self._recent.move_to_end(key)
+            return False
+        self._recent[key] = True
+        while len(self._recent) > self.max_session:
+            self._recent.popitem(last=False)
+
+        row = [key, time.time()] + [entry.get(name) for name in HISTORY_COLUMNS]
+        row.append(json.dumps({field: _plain(value) for field, value in loan.items()}))
+        columns = ['input_hash', 'saved'] + list(HISTORY_COLUMNS.values()) + ['inputs']
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO history ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                "ON CONFLICT(input_hash) DO UPDATE SET saved = excluded.saved",
+                [_plain(value) for value in row],
+            )
+            if self.max_rows:
+                self._conn.execute(
+                    "DELETE FROM history WHERE saved < (SELECT saved FROM history ORDER BY saved DESC LIMIT 1 OFFSET ?)",
+                    (self.max_rows - 1,),
+                )
+        return True
+
+    def _where(self, price_range=None, rate_range=None):
+        clauses, params = [], []
+        for column, bounds in (('home_price', price_range), ('interest_rate', rate_range)):
+            if bounds is not None:
+                clauses.append(f"{column} BETWEEN ? AND ?")
+                params.extend(bounds)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def count(self, price_range=None, rate_range=None):
+        where, params = self._where(price_range, rate_range)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM history{where}", params).fetchone()[0]
+
+    def query(self, price_range=None, rate_range=None, sort_by='Saved', ascending=False, limit=-1, offset=0):
+        where, params = self._where(price_range, rate_range)
+        order = 'saved' if sort_by == 'Saved' else HISTORY_COLUMNS[sort_by]
+        select = ', '.join(f'{column} AS "{name}"' for name, column in HISTORY_COLUMNS.items())
+        sql = (
+            f"SELECT datetime(saved, 'unixepoch', 'localtime') AS Saved, {select} FROM history{where} "
+            f"ORDER BY {order} {'ASC' if ascending else 'DESC'} LIMIT ? OFFSET ?"
+        )
+        import pandas as pd
+
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=params + [limit, offset])
+
+    def page(self, page=0, page_size=25, sort_by='Saved', ascending=False, price_range=None, rate_range=None):
+        # Same contract as schedule_page: (frame, matching rows, page count)
+        matching = self.count(price_range, rate_range)
+        pages = max(-(-matching // page_size), 1)
+        page = min(max(page, 0), pages - 1)
+        frame = self.query(price_range, rate_range, sort_by, ascending, page_size, page * page_size)
+        return frame, matching, pages
+
+    def bounds(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT MIN(home_price), MAX(home_price), MIN(interest_rate), MAX(interest_rate) FROM history"
+            ).fetchone()
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM history")
+        self._recent.clear()
+
+
+def _plain(value):
+    return value.item() if hasattr(value, 'item') else value
@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+
+# tracemalloc is process-wide: it runs while any memory timer is inside a stage and stops when
+# the last one leaves, unless something else had already started it. Stages release it in a
+# finally, so a rerun or stop that interrupts the script can't leave it running.
+_tracing_lock = threading.Lock()
+_tracing = {'timers': 0, 'owned': False}
+
+
+def _start_tracing():
+    with _tracing_lock:
+        if not _tracing['timers']:
+            _tracing['owned'] = not tracemalloc.is_tracing()
+            if _tracing['owned']:
+                tracemalloc.start()
+        _tracing['timers'] += 1
+
+
+def _stop_tracing():
+    with _tracing_lock:
+        _tracing['timers'] -= 1
+        if not _tracing['timers'] and _tracing['owned']:
+            tracemalloc.stop()
+            _tracing['owned'] = False
+
+
+class StageTimer:
+    # Wall-clock time per named stage of one rerun, plus allocation counters when memory=True.
+    # Disabled timers hand back a nullcontext, so instrumented code costs next to nothing.
+
+    def __init__(self, enabled=False, memory=False, log_path=None, run=0):
+        self.enabled = enabled
+        self.memory = enabled and memory
+        self.log_path = log_path
+        self.run = run
+        self.stages = {}
+        self.started = time.perf_counter()
+        self.finished = False
+
+    def stage(self, name):
+        return self._stage(name) if self.enabled else nullcontext()
+
+    @contextmanager
+    def _stage(self, name):
+        if self.memory:
+            _start_tracing()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            # A stage entered more than once in a run (e.g. one per tab block) accumulates
+            entry = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0})
+            entry['seconds'] += time.perf_counter() - started
+            entry['calls'] += 1
+            if self.memory:
+                current, peak = tracemalloc.get_traced_memory()
+                _stop_tracing()
+                entry['allocated_kb'] = entry.get('allocated_kb', 0.0) + (current - before) / 1024
+                entry['peak_kb'] = max(entry.get('peak_kb', 0.0), (peak - before) / 1024)
+
+    def restart(self, run):
+        # Starts a fresh record on the same settings, e.g. for a fragment rerun after the full run finished
+        self.run = run
+        self.stages = {}
+        self.started = time.perf_counter()
+        self.finished = False
+
+    def finish(self):
+        # The run's record; appended as one JSON line to log_path when set
+        self.finished = True
+        if not self.enabled:
+            return None
+        record = {
+            'run': self.run,
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'total_seconds': time.perf_counter() - self.started,
+            'stages': self.stages,
+        }
+        if self.log_path:
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+        return record
+
+
+def stage_percentiles(records, percentiles=(50, 95)):
+    # {stage: {'p50': s, 'p95': s, 'last': s, 'runs': n}} across run records; 'total' is the whole rerun
+    series = {}
+    for record in records:
+        series.setdefault('total', []).append(record['total_seconds'])
+        for name, entry in record['stages'].items():
+            series.setdefault(name, []).append(entry['seconds'])
+    return {
+        name: {
+            **{f"p{p}": float(value) for p, value in zip(percentiles, np.percentile(values, percentiles))},
+            'last': values[-1],
+            'runs': len(values),
+        }
+        for name, values in series.items()
+    }
@@ -0,0 +1,64 @@
+# Loan inputs shared by the Streamlit sidebar, the batch runner and anything else that
+# feeds the engine. Names follow the sidebar variables in run_mortgage_calculator_popup.py.
+LOAN_FIELDS = [
+    'home_price',
+    'down_payment_percent',
+    'interest_rate',
+    'loan_term_years',
+    'property_tax_rate',
+    'annual_insurance',
+    'monthly_income',
+    'extra_payment_percent',
+    'pmi_drops_off',
+    'base_hoa',
+    'base_maint',
+]
+
+# Loan type -> (down payment %, interest rate %, term in years)
+LOAN_PRESETS = {
+    "Conventional (20%)": (20.0, 6.5, 30),
+    "FHA (3.5%)": (3.5, 6.0, 30),
+    "VA (0%)": (0.0, 6.25, 30),
+    "Custom": (10.0, 6.5, 30),
+}
+
+LOAN_DEFAULTS = {
+    'home_price': 300000,
+    'down_payment_percent': LOAN_PRESETS["Conventional (20%)"][0],
+    'interest_rate': LOAN_PRESETS["Conventional (20%)"][1],
+    'loan_term_years': LOAN_PRESETS["Conventional (20%)"][2],
+    'property_tax_rate': 1.2,
+    'annual_insurance': 1200,
+    'monthly_income': 6000,
+    'extra_payment_percent': 10,
+    'pmi_drops_off': True,
+    'base_hoa': 100,
+    'base_maint': 150,
+}
+
+# Home prices a shared schedule cache is warmed at (see preset_loans)
+WARM_HOME_PRICES = tuple(range(200000, 800001, 25000))
+
+
+def preset_defaults(loan_type):
+    return LOAN_PRESETS.get(loan_type, LOAN_PRESETS["Custom"])
+
+
+def preset_loans(home_prices=WARM_HOME_PRICES, terms=(15, 30)):
+    # The sidebar's default inputs under every loan type preset, at each home price and term:
+    # the scenarios most sessions start from
+    return [
+        {**LOAN_DEFAULTS, 'home_price': home_price, 'down_payment_percent': down, 'interest_rate': rate, 'loan_term_years': term}
+        for down, rate, _ in LOAN_PRESETS.values()
+        for term in terms
+        for home_price in home_prices
+    ]
+
+
+def amortize_args(loan):
+    # Positional arguments for amortization.amortize / summary.payoff_summary
+    return (
+        loan['home_price'], loan['down_payment_percent'], loan['interest_rate'], loan['loan_term_years'],
+        loan['monthly_income'], loan['extra_payment_percent'], loan['pmi_drops_off'], loan['base_hoa'],
+        loan['base_maint'],
+    )
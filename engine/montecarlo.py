@@ -0,0 +1,191 @@
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from engine.amortization import initial_pmi_monthly, monthly_principal_interest
+from engine.arm import capped_rates, segment_balances
+from engine.costs import MAINTENANCE_SPIKES, spike_amounts
+
+
+STRESS_DEFAULTS = {
+    # ARM-style resets: fixed for fixed_months, then index + margin every reset_every months
+    'fixed_months': 60,
+    'reset_every': 12,
+    'margin': 2.75,
+    'index_drift': 0.0,
+    'index_volatility': 1.0,
+    'periodic_cap': 2.0,
+    'lifetime_cap': 5.0,
+    'rate_floor': 2.0,
+    # HOA / maintenance inflation, drawn once per path
+    'inflation_mean': 0.03,
+    'inflation_sd': 0.015,
+    # Yearly income growth plus the chance of a year at reduced income
+    'income_growth_mean': 0.02,
+    'income_growth_sd': 0.03,
+    'income_shock_prob': 0.03,
+    'income_shock_size': 0.5,
+}
+
+BANDS = (5, 50, 95)
+HISTOGRAM_BINS = 2000
+
+
+def _draw_reset_rates(rng, n_paths, resets, interest_rate, params):
+    # Note rate after each reset, per path: the index takes a random step at every reset
+    steps = rng.normal(params['index_drift'], params['index_volatility'], (resets, n_paths)).T
+    steps[:, 0] += interest_rate - params['margin']
+    return capped_rates(interest_rate, np.cumsum(steps, axis=1), params)
+
+
+def _draw_income(rng, n_paths, months, monthly_income, params):
+    years = -(-months // 12)
+    growth = rng.normal(params['income_growth_mean'], params['income_growth_sd'], (n_paths, years))
+    growth[:, 0] = 0.0
+    level = monthly_income * np.exp(np.cumsum(growth, axis=1))
+    shocked = rng.random((n_paths, years)) < params['income_shock_prob']
+    level = np.where(shocked, level * (1 - params['income_shock_size']), level)
+    return np.repeat(level, 12, axis=1)[:, :months]
+
+
+def amortize_paths(loan_amount, months, interest_rate, extra_payment, events):
+    # Balance after each month and P&I actually paid, for every path at once. The rate-change
+    # engine re-solves the payment over the remaining term at each reset.
+    n_paths = len(events['rate'])
+    balances, monthly_interest, _, _ = segment_balances(
+        np.full(n_paths, float(loan_amount)), interest_rate, months, extra_payment, events, months
+    )
+    balances = np.maximum(balances, 0.0)
+    paid = balances[:, :-1] * (1 + monthly_interest) - balances[:, 1:]
+    return balances[:, 1:], paid
+
+
+def _histogram(values, lo, hi, bins):
+    n_paths, months = values.shape
+    width = (hi - lo) / bins
+    index = np.clip(((values - lo) / width).astype(np.int64), 0, bins - 1)
+    flat = index + np.arange(months)[None, :] * bins
+    return np.bincount(flat.ravel(), minlength=months * bins).reshape(months, bins)
+
+
+def simulate_chunk(loan, n_paths, seed, params, ranges, bins=HISTOGRAM_BINS):
+    # One worker's share of paths, reduced to fixed-size histograms before returning
+    rng = np.random.default_rng(seed)
+    months = int(loan['loan_term_years']) * 12
+    home_price = loan['home_price']
+    down_payment = home_price * (loan['down_payment_percent'] / 100)
+    loan_amount = home_price - down_payment
+
+    reset_months = np.arange(params['fixed_months'], months, params['reset_every'])
+    reset_rates = _draw_reset_rates(rng, n_paths, len(reset_months), loan['interest_rate'], params)
+    income = _draw_income(rng, n_paths, months, loan['monthly_income'], params)
+    extra_payment = (loan['extra_payment_percent'] / 100) * loan['monthly_income']
+    balances, paid = amortize_paths(
+        loan_amount, months, loan['interest_rate'], extra_payment, {'month': reset_months, 'rate': reset_rates}
+    )
+
+    inflation = rng.normal(params['inflation_mean'], params['inflation_sd'], n_paths)
+    factors = (1 + inflation)[:, None] ** (np.arange(months)[None, :] / 12)
+    hoa = loan['base_hoa'] * factors
+    maintenance = loan['base_maint'] * factors + spike_amounts(months, MAINTENANCE_SPIKES)[None, :]
+
+    pmi_monthly = initial_pmi_monthly(loan_amount, loan['loan_term_years'], loan['down_payment_percent'])
+    if loan['pmi_drops_off']:
+        pmi = np.where(balances > 0.8 * home_price, pmi_monthly, 0.0)
+    else:
+        pmi = np.where(paid > 0, pmi_monthly, 0.0)
+
+    fixed_costs = home_price * (loan['property_tax_rate'] / 100) / 12 + loan['annual_insurance'] / 12
+    payment = paid + pmi + hoa + maintenance + fixed_costs
+    dti = payment / np.maximum(income, 1.0) * 100
+
+    return {
+        name: _histogram(values, *ranges[name], bins)
+        for name, values in (('Balance', balances), ('Payment', payment), ('DTI %', dti))
+    }
+
+
+def _ranges(loan, params):
+    home_price = loan['home_price']
+    loan_amount = home_price * (1 - loan['down_payment_percent'] / 100)
+    months = int(loan['loan_term_years']) * 12
+    worst_rate = (loan['interest_rate'] + params['lifetime_cap']) / 100 / 12
+    worst_payment = (
+        monthly_principal_interest(loan_amount, worst_rate, months) +
+        (loan['extra_payment_percent'] / 100) * loan['monthly_income'] +
+        loan_amount * 0.0055 / 12 +
+        home_price * (loan['property_tax_rate'] / 100) / 12 + loan['annual_insurance'] / 12 +
+        (loan['base_hoa'] + loan['base_maint']) * 4 + max((a for _, a in MAINTENANCE_SPIKES), default=0) * 2
+    )
+    return {
+        'Balance': (0.0, max(loan_amount, 1.0)),
+        'Payment': (0.0, worst_payment),
+        'DTI %': (0.0, 200.0),
+    }
+
+
+def _bands(histograms, ranges, paths, bins=HISTOGRAM_BINS):
+    bands = {}
+    for name, counts in histograms.items():
+        lo, hi = ranges[name]
+        width = (hi - lo) / bins
+        cdf = np.cumsum(counts, axis=1)
+        for q in BANDS:
+            target = q / 100 * paths
+            index = np.minimum((cdf < target).sum(axis=1), bins - 1)
+            rows = np.arange(len(cdf))
+            below = np.where(index > 0, cdf[rows, np.maximum(index - 1, 0)], 0)
+            inside = np.maximum(counts[rows, index], 1)
+            bands[f"{name} P{q}"] = lo + width * (index + np.clip((target - below) / inside, 0, 1))
+    return pd.DataFrame({'Month': np.arange(1, len(cdf) + 1), **bands})
+
+
+def stream_stress_test(loan, paths=10000, seed=0, chunk_size=5000, workers=1, params=None):
+    # Yields (paths done, P5/P50/P95 bands) as chunks finish. Memory is bounded by
+    # chunk_size and the histogram size, never by the total path count. Chunk seeds come
+    # from one SeedSequence, so results depend on seed and chunk_size but not on workers.
+    params = {**STRESS_DEFAULTS, **(params or {})}
+    ranges = _ranges(loan, params)
+    sizes = [min(chunk_size, paths - start) for start in range(0, paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    totals = None
+    done = 0
+
+    def merge(histograms, size):
+        nonlocal totals, done
+        totals = histograms if totals is None else {k: totals[k] + v for k, v in histograms.items()}
+        done += size
+        return done, _bands(totals, ranges, done)
+
+    if workers > 1:
+        # forkserver rather than fork, so workers don't inherit a threaded caller's state (a web server's sockets, say)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('forkserver')) as pool:
+            # At most `workers` chunks in flight, merged in submission order and dropped once
+            # merged, so memory stays bounded by the worker count rather than by paths
+            chunks = zip(sizes, seeds)
+            pending = deque(
+                (pool.submit(simulate_chunk, loan, size, s, params, ranges), size) for size, s in islice(chunks, workers)
+            )
+            while pending:
+                future, size = pending.popleft()
+                histograms = future.result()
+                del future
+                for next_size, s in islice(chunks, 1):
+                    pending.append((pool.submit(simulate_chunk, loan, next_size, s, params, ranges), next_size))
+                yield merge(histograms, size)
+    else:
+        for size, s in zip(sizes, seeds):
+            yield merge(simulate_chunk(loan, size, s, params, ranges), size)
+
+
+def run_stress_test(loan, paths=10000, seed=0, chunk_size=5000, workers=None, params=None):
+    workers = workers or min(os.cpu_count() or 1, max(1, -(-paths // chunk_size)))
+    result = None
+    for _, result in stream_stress_test(loan, paths, seed, chunk_size, workers, params):
+        pass
+    return result
@@ -0,0 +1,104 @@
+import numpy as np
+
+from engine.amortization import MAX_MONTHS, level_payment, unwrap
+from engine.summary import interest_to_payoff
+
+# Equal slices a budget is handed out in by split_budget
+BUDGET_SLICES = 200
+
+
+def _loan_terms(home_price, down_payment_percent, interest_rate, loan_term_years):
+    # Loan amount, monthly rate and scheduled P&I, broadcast together
+    home_price, down_payment_percent, interest_rate, loan_term_years = np.broadcast_arrays(
+        *(np.asarray(value, dtype=float) for value in (home_price, down_payment_percent, interest_rate, loan_term_years))
+    )
+    loan_amount = home_price * (1 - down_payment_percent / 100)
+    monthly_interest = interest_rate / 100 / 12
+    return loan_amount, monthly_interest, level_payment(loan_amount, monthly_interest, loan_term_years * 12)
+
+
+def _cents_up(values):
+    # Extra payments are quoted rounded up to the cent, so paying the quote always meets the goal
+    return np.ceil(np.round(values * 100, 6)) / 100
+
+
+# ----------------------------------------------------------------------------------------
+# Payoff Targets
+# -----------------------------------------------------------------------------------------
+def extra_for_payoff(home_price, down_payment_percent, interest_rate, loan_term_years, target_months):
+    # Smallest extra monthly payment that pays the loan off within target_months: the level
+    # payment over target_months less the scheduled P&I. Solved in closed form per loan; targets
+    # at or past the term need nothing extra.
+    loan_amount, monthly_interest, principal_interest = _loan_terms(
+        home_price, down_payment_percent, interest_rate, loan_term_years
+    )
+    target_months = np.maximum(np.asarray(target_months, dtype=float), 1)
+    needed = level_payment(loan_amount, monthly_interest, target_months) - principal_interest
+    return unwrap(_cents_up(np.maximum(needed, 0.0)))
+
+
+def extra_for_interest_cap(home_price, down_payment_percent, interest_rate, loan_term_years, interest_cap,
+                           max_months=MAX_MONTHS):
+    # Smallest extra monthly payment, in whole cents, that keeps total interest at or under
+    # interest_cap. Total interest only falls as the payment rises, so every loan is bisected at
+    # once, one closed-form evaluation per step. NaN where even paying off in the first month
+    # costs more.
+    loan_amount, monthly_interest, principal_interest = _loan_terms(
+        home_price, down_payment_percent, interest_rate, loan_term_years
+    )
+    interest_cap = np.broadcast_to(np.asarray(interest_cap, dtype=float), loan_amount.shape)
+    _, interest = interest_to_payoff(loan_amount, monthly_interest, principal_interest, max_months)
+    met = interest <= interest_cap
+    # Cents of extra payment that clear the whole loan with the first payment
+    hi = np.where(met, 0, _cents_up(np.maximum(loan_amount * (1 + monthly_interest) - principal_interest, 0.0)) * 100)
+    hi = np.round(hi).astype(np.int64)
+    _, least = interest_to_payoff(loan_amount, monthly_interest, principal_interest + hi / 100, max_months)
+    feasible = met | (least <= interest_cap)
+
+    # hi cents always meets the cap; lo cents never does, unless no extra is needed at all
+    lo = np.zeros_like(hi)
+    while (hi - lo > 1).any():
+        mid = (lo + hi) // 2
+        _, interest = interest_to_payoff(loan_amount, monthly_interest, principal_interest + mid / 100, max_months)
+        under = interest <= interest_cap
+        hi = np.where(under, mid, hi)
+        lo = np.where(under, lo, mid)
+    return unwrap(np.where(feasible, hi / 100, np.nan))
+
+
+# ----------------------------------------------------------------------------------------
+# Budget Split
+# -----------------------------------------------------------------------------------------
+def split_budget(home_price, down_payment_percent, interest_rate, loan_term_years, budget, extra_payment=0.0,
+                 slices=BUDGET_SLICES, max_months=MAX_MONTHS):
+    # Divides a monthly budget for extra payments across loans to save the most total interest.
+    # The budget goes out in equal slices, each to the loan whose total interest falls most from
+    # it (one vectorized closed-form call per slice). extra_payment is what each loan already
+    # gets; the result is what to add on top.
+    loan_amount, monthly_interest, principal_interest = _loan_terms(
+        home_price, down_payment_percent, interest_rate, loan_term_years
+    )
+    loan_amount, monthly_interest, principal_interest = (
+        np.atleast_1d(value) for value in (loan_amount, monthly_interest, principal_interest)
+    )
+    payment = principal_interest + np.broadcast_to(np.asarray(extra_payment, dtype=float), loan_amount.shape)
+    allocation = np.zeros(len(loan_amount))
+    _, before = interest_to_payoff(loan_amount, monthly_interest, payment, max_months)
+    current = before.copy()
+
+    step = float(budget) / slices if slices else 0.0
+    for _ in range(slices if step > 0 else 0):
+        _, trial = interest_to_payoff(loan_amount, monthly_interest, payment + allocation + step, max_months)
+        gain = current - trial
+        best = int(np.argmax(gain))
+        if gain[best] <= 0:
+            # Every loan is already paid off with its first payment
+            break
+        allocation[best] += step
+        current[best] = trial[best]
+
+    return {
+        'Extra Payment': allocation,
+        'Total Interest': current,
+        'Interest Saved': before - current,
+    }
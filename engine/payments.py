@@ -0,0 +1,77 @@
+import numpy as np
+
+from engine.amortization import MAX_MONTHS
+from engine.arm import merge_events
+
+# Frequency -> (payments a year, share of the monthly P&I in each). Biweekly and weekly plans
+# add up to 13 monthly payments' worth a year; interest still accrues monthly.
+PAYMENT_FREQUENCIES = {
+    'monthly': (12, 1.0),
+    'semimonthly': (24, 0.5),
+    'biweekly': (26, 0.5),
+    'weekly': (52, 0.25),
+}
+
+# A loan's payment plan, next to the engine.loans fields; these values mean "no plan"
+PLAN_DEFAULTS = {
+    'payment_frequency': 'monthly',
+    'annual_lump_sum': 0.0,
+    'lump_sum_month': 12,
+    'extra_step_year': 0,
+    'extra_step_percent': 0.0,
+}
+
+
+def lump_sums(months, amounts):
+    # One-off payments, each made with payment `month`
+    return {'month': np.asarray(months, dtype=np.int64), 'lump': np.asarray(amounts, dtype=float)}
+
+
+def recurring_lump_sum(amount, every=12, first=12, until=MAX_MONTHS):
+    # The same payment every `every` months from `first` on, e.g. a yearly bonus
+    months = np.arange(first, until + 1, every)
+    return lump_sums(months, np.broadcast_to(np.asarray(amount, dtype=float)[..., None], np.shape(amount) + months.shape))
+
+
+def extra_steps(months, extra_payments):
+    # The monthly extra payment changes to extra_payments[i] after payment months[i]
+    return {'month': np.asarray(months, dtype=np.int64), 'extra': np.asarray(extra_payments, dtype=float)}
+
+
+# ----------------------------------------------------------------------------------------
+# Plans on loan dicts
+# -----------------------------------------------------------------------------------------
+def has_plan(loan):
+    return any(loan.get(field, default) != default for field, default in PLAN_DEFAULTS.items()
+               if field != 'lump_sum_month')
+
+
+def plan_key(loan):
+    # Cache-key suffix for a loan's payment plan; empty when it has none
+    if not has_plan(loan):
+        return ()
+    return ('plan',) + tuple(
+        round(float(loan.get(field, default)), 2) if field != 'payment_frequency' else loan.get(field, default)
+        for field, default in PLAN_DEFAULTS.items()
+    )
+
+
+def payment_factor(loan):
+    # Scheduled P&I actually paid per month, relative to monthly payments
+    per_year, share = PAYMENT_FREQUENCIES[loan.get('payment_frequency', PLAN_DEFAULTS['payment_frequency'])]
+    return per_year * share / 12
+
+
+def plan_events(loan, max_months=MAX_MONTHS):
+    # Events for a loan dict's plan: the yearly lump sum and the step in extra % of income
+    plan = {**PLAN_DEFAULTS, **{field: loan[field] for field in PLAN_DEFAULTS if field in loan}}
+    events = []
+    if plan['annual_lump_sum'] > 0:
+        until = min(int(loan['loan_term_years']) * 12, max_months)
+        events.append(recurring_lump_sum(plan['annual_lump_sum'], 12, int(plan['lump_sum_month']), until))
+    if plan['extra_step_year'] > 0:
+        # From the first payment of that loan year on
+        events.append(extra_steps(
+            [(int(plan['extra_step_year']) - 1) * 12], [plan['extra_step_percent'] / 100 * loan['monthly_income']]
+        ))
+    return merge_events(*events)
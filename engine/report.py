@@ -0,0 +1,184 @@
+"""PDF summary reports rendered to bytes, cached by content, and batched into zips.
+
+    python -m engine.report history.csv --out reports.zip --workers 4
+"""
+import argparse
+import hashlib
+import io
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+from fpdf import FPDF
+
+# Batches smaller than this render in-process; starting a pool costs more than it saves
+POOL_MIN_REPORTS = 64
+
+REPORT_CACHE_SIZE = 256
+
+MONEY, PERCENT, PLAIN = '${:,.2f}', '{}%', '{}'
+
+# (section title, [(label, field, format)]); fields missing from a record are left out,
+# so full summaries and the shorter archive rows share one layout
+REPORT_SECTIONS = [
+    ("Loan Overview", [
+        ("Home Price", "Home Price", MONEY),
+        ("Loan Amount", "Loan Amount", MONEY),
+        ("Interest Rate", "Interest Rate", PERCENT),
+        ("Loan Term", "Loan Term", '{} years'),
+    ]),
+    ("Monthly Payment Breakdown", [
+        ("Principal & Interest", "P&I", MONEY),
+        ("Property Tax", "Tax", MONEY),
+        ("Insurance", "Insurance", MONEY),
+        ("PMI", "PMI", MONEY),
+        ("HOA", "HOA", MONEY),
+        ("Maintenance", "Maintenance", MONEY),
+        ("Total Monthly", "Total Payment", MONEY),
+        ("Monthly Payment", "Monthly Payment", MONEY),
+    ]),
+    ("Affordability Check", [
+        ("DTI (Debt-to-Income Ratio)", "DTI", '{:.2f}%'),
+    ]),
+    ("Payoff Summary", [
+        ("Time to Payoff", "Payoff Time", PLAIN),
+        ("Time to Payoff", "Years to Payoff", PLAIN),
+        ("Total Paid", "Total Paid", MONEY),
+        ("Total Interest Paid", "Total Interest", MONEY),
+    ]),
+]
+
+REPORT_FIELDS = [field for _, rows in REPORT_SECTIONS for _, field, _ in rows]
+
+# Optional per-year rows (engine.rollups.report_rows), printed as a table after the sections
+YEARLY_FIELD = "Yearly Summary"
+YEARLY_COLUMNS = [("Year", PLAIN), ("Principal", MONEY), ("Interest", MONEY), ("Balance", MONEY), ("Equity", '{:.1f}%')]
+
+
+class MortgagePDF(FPDF):
+    def header(self):
+        self.set_font("Arial", "B", 12)
+        self.cell(0, 10, "Mortgage Summary Report", ln=True, align="C")
+        self.ln(10)
+
+    def section_title(self, title):
+        self.set_font("Arial", "B", 11)
+        self.cell(0, 10, title, ln=True)
+        self.ln(1)
+
+    def section_body(self, text):
+        self.set_font("Arial", "", 10)
+        self.multi_cell(0, 8, _latin1(text))
+        self.ln()
+
+    def section_table(self, columns, rows):
+        widths = [20] + [40] * (len(columns) - 1)
+        self.set_font("Arial", "B", 9)
+        for width, (name, _) in zip(widths, columns):
+            self.cell(width, 6, name, border=1, align="C")
+        self.ln()
+        self.set_font("Arial", "", 9)
+        for row in rows:
+            for width, (_, template), value in zip(widths, columns, row):
+                self.cell(width, 6, _format(template, value), border=1, align="R")
+            self.ln()
+
+
+def _latin1(text):
+    # The core PDF fonts only cover latin-1; anything else would fail at output time
+    return text.encode('latin-1', 'replace').decode('latin-1')
+
+
+def report_items(summary_data):
+    # The report's inputs as a hashable tuple in layout order; numpy scalars become plain
+    # Python values so equal summaries hash equally whatever produced them
+    items = []
+    for field in REPORT_FIELDS:
+        value = summary_data.get(field)
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            continue
+        items.append((field, value.item() if isinstance(value, np.generic) else value))
+    if summary_data.get(YEARLY_FIELD):
+        items.append((YEARLY_FIELD, tuple(tuple(row) for row in summary_data[YEARLY_FIELD])))
+    return tuple(items)
+
+
+def report_key(summary_data):
+    return hashlib.sha256(repr(report_items(summary_data)).encode('utf-8')).hexdigest()[:16]
+
+
+def _format(template, value):
+    try:
+        return template.format(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def render_items(items):
+    values = dict(items)
+    pdf = MortgagePDF()
+    pdf.add_page()
+    for title, rows in REPORT_SECTIONS:
+        lines = [f"{label}: {_format(template, values[field])}" for label, field, template in rows if field in values]
+        if lines:
+            pdf.section_title(title)
+            pdf.section_body("\n".join(lines))
+    if YEARLY_FIELD in values:
+        pdf.section_title(YEARLY_FIELD)
+        pdf.section_table(YEARLY_COLUMNS, values[YEARLY_FIELD])
+    return pdf.output(dest='S').encode('latin-1')
+
+
+@lru_cache(maxsize=REPORT_CACHE_SIZE)
+def _cached_render(items):
+    return render_items(items)
+
+
+# ----------------------------------------------------------------------------------------
+# Single and batch rendering
+# -----------------------------------------------------------------------------------------
+def report_bytes(summary_data):
+    # Same summary, same bytes: reruns and repeat downloads reuse the rendered PDF
+    return _cached_render(report_items(summary_data))
+
+
+def render_reports(records, workers=None):
+    items = [report_items(record) for record in records]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(items) < POOL_MIN_REPORTS:
+        return [_cached_render(item) for item in items]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('forkserver')) as pool:
+        return list(pool.map(render_items, items, chunksize=max(1, len(items) // (workers * 4))))
+
+
+def reports_zip(records, names=None, workers=None):
+    records = list(records)
+    names = names or [f"mortgage_report_{i + 1:04d}_{report_key(record)}.pdf" for i, record in enumerate(records)]
+    buffer = io.BytesIO()
+    # PDF streams are already compressed, so entries are stored as-is
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for name, pdf in zip(names, render_reports(records, workers)):
+            archive.writestr(name, pdf)
+    return buffer.getvalue()
+
+
+def main(argv=None):
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Render a PDF report per row into one zip.")
+    parser.add_argument("records", help="CSV or .parquet file with report fields as columns")
+    parser.add_argument("--out", default="reports.zip")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    df = pd.read_parquet(args.records) if args.records.endswith('.parquet') else pd.read_csv(args.records)
+    with open(args.out, 'wb') as f:
+        f.write(reports_zip(df.to_dict('records'), workers=args.workers))
+    print(f"{len(df):,} reports written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
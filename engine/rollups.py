@@ -0,0 +1,71 @@
+import numpy as np
+
+from engine.rounding import round_cents
+
+# View name -> months per period; any other whole number of months works as a custom period
+ROLLUP_PERIODS = {
+    'Monthly': 1,
+    'Quarterly': 3,
+    'Yearly': 12,
+}
+
+# Schedule columns summed over each period
+FLOW_COLUMNS = ['Payment', 'Principal', 'Interest', 'PMI', 'HOA', 'Maintenance']
+
+# 'Month' is each period's last month and 'Balance' the balance after it, so a rollup plots and
+# slices like the monthly schedule. 'DTI %' is the period's average, 'Equity %' as of its end.
+ROLLUP_COLUMNS = ['Period', 'Month', 'Months'] + FLOW_COLUMNS + ['Balance', 'DTI %', 'Equity %']
+
+
+def rollup(columns, months_per_period, home_price, down_payment, monthly_income):
+    # Per-period totals of one schedule. The flow columns are stacked and summed in a single
+    # np.add.reduceat over the rows where each period starts; everything else is read off the
+    # period's first and last rows.
+    month = np.asarray(columns['Month'])
+    period = (month - 1) // months_per_period
+    starts = np.flatnonzero(np.diff(period, prepend=-1))
+    ends = np.append(starts[1:], len(month))[:len(starts)] - 1
+    counts = ends - starts + 1
+
+    flows = np.vstack([np.asarray(columns[name], dtype=float) for name in FLOW_COLUMNS])
+    totals = np.add.reduceat(flows, starts, axis=1) if len(starts) else flows
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dti = totals[0] / counts / monthly_income * 100 if monthly_income > 0 else np.full(len(starts), np.nan)
+    equity = (np.asarray(columns['Cumulative Principal'])[ends] + down_payment) / home_price * 100
+
+    return {
+        'Period': period[starts] + 1,
+        'Month': month[ends],
+        'Months': counts,
+        **dict(zip(FLOW_COLUMNS, round_cents(totals))),
+        'Balance': np.asarray(columns['Balance'])[ends],
+        'DTI %': dti,
+        'Equity %': equity,
+    }
+
+
+def loan_rollup(columns, loan, months_per_period):
+    # rollup() with the home price, down payment and income taken from a loan dict
+    home_price = loan['home_price']
+    return rollup(
+        columns, months_per_period, home_price, home_price * (loan['down_payment_percent'] / 100), loan['monthly_income']
+    )
+
+
+def period_range(table, first_month, last_month):
+    # Rows of a rollup for the periods overlapping months first_month..last_month
+    ends = table['Month']
+    begins = ends - table['Months'] + 1
+    start = np.searchsorted(ends, first_month, side='left')
+    stop = np.searchsorted(begins, last_month, side='right')
+    return {name: values[start:stop] for name, values in table.items()}
+
+
+def report_rows(table):
+    # (period, principal, interest, balance, equity %) per period as plain values, for engine.report
+    return tuple(
+        (int(period), round(float(principal), 2), round(float(interest), 2), round(float(balance), 2), round(float(equity), 2))
+        for period, principal, interest, balance, equity in zip(
+            table['Period'], table['Principal'], table['Interest'], table['Balance'], table['Equity %']
+        )
+    )
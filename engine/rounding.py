@@ -0,0 +1,13 @@
+import numpy as np
+
+
+def round_cents(values):
+    # np.round scales by 100 first, which flips some half-cent ties that Python's
+    # round() (exact decimal) keeps; redo only those few elements with round()
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if ties.any():
+        rounded[ties] = [round(v, 2) for v in values[ties].tolist()]
+    return rounded
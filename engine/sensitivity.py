@@ -0,0 +1,44 @@
+import numpy as np
+
+from engine.summary import payoff_summary, total_monthly_payment
+
+
+GRID_METRICS = ['Monthly Payment', 'Payoff Months', 'Total Interest', 'DTI %']
+
+
+def sensitivity_grid(loan, interest_rates, home_prices, down_payment_percents=None, extra_payment_percents=None):
+    # Evaluate every rate x price x down % x extra % combination in one broadcast pass.
+    # Results are 4-D arrays indexed [rate, price, down, extra].
+    if down_payment_percents is None:
+        down_payment_percents = [loan['down_payment_percent']]
+    if extra_payment_percents is None:
+        extra_payment_percents = [loan['extra_payment_percent']]
+
+    rate = np.asarray(interest_rates, dtype=float).reshape(-1, 1, 1, 1)
+    price = np.asarray(home_prices, dtype=float).reshape(1, -1, 1, 1)
+    down = np.asarray(down_payment_percents, dtype=float).reshape(1, 1, -1, 1)
+    extra = np.asarray(extra_payment_percents, dtype=float).reshape(1, 1, 1, -1)
+
+    summary = payoff_summary(
+        price, down, rate, loan['loan_term_years'], loan['monthly_income'], extra,
+        loan['pmi_drops_off'], loan['base_hoa'], loan['base_maint'],
+    )
+    shape = np.broadcast_shapes(rate.shape, price.shape, down.shape, extra.shape)
+
+    monthly_payment = np.broadcast_to(total_monthly_payment(
+        summary, price, loan['property_tax_rate'], loan['annual_insurance'], loan['base_hoa'], loan['base_maint'],
+    ), shape)
+    dti = monthly_payment / loan['monthly_income'] * 100 if loan['monthly_income'] > 0 else np.full(shape, np.nan)
+
+    return {
+        'axes': {
+            'Interest Rate': rate.ravel(),
+            'Home Price': price.ravel(),
+            'Down Payment %': down.ravel(),
+            'Extra %': extra.ravel(),
+        },
+        'Monthly Payment': monthly_payment,
+        'Payoff Months': np.broadcast_to(summary['Payoff Months'], shape),
+        'Total Interest': np.broadcast_to(summary['Total Interest'], shape),
+        'DTI %': dti,
+    }
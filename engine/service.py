@@ -0,0 +1,360 @@
+"""Local HTTP/JSON service over the same engine as the Streamlit app.
+
+    python -m engine.service --port 8765 --workers 4
+
+Every endpoint takes POST bodies of one loan or ``{"loans": [...]}``. Loans use
+the names in engine.loans.LOAN_FIELDS, and any field left out takes the sidebar
+default. Results come back columnar: ``{"columns": {name: [values, ...]}}``.
+
+    /payment   monthly P&I, tax, insurance, PMI and total payment per loan
+    /summary   payoff months, totals and PMI timing per loan
+    /schedule  the full monthly schedule per loan, as column arrays
+    /compare   the Compare tab's table; add "schedules": true for the schedules
+    /health    GET, liveness and request counters
+
+Small payment and summary requests are answered on the event loop, because they
+are closed-form and cheaper than a process hop. Requests that arrive together are
+coalesced into one vectorized call and the columns split back per request.
+Schedules, comparisons and large batches go to a process pool.
+"""
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+import numpy as np
+
+from engine.amortization import COLUMNS, amortize_stack
+from engine.compare import compare_scenarios
+from engine.loans import LOAN_DEFAULTS, LOAN_FIELDS, amortize_args
+from engine.summary import payoff_summary, total_monthly_payment
+
+# Batches at least this large leave the event loop even for closed-form endpoints
+POOL_MIN_LOANS = 256
+
+MAX_BODY_BYTES = 16 * 1024 * 1024
+MAX_BATCH_LOANS = 100000
+# Full schedules run to ~75 KB per loan, so the schedule endpoints take far fewer
+MAX_SCHEDULE_LOANS = 1000
+
+
+class RequestError(ValueError):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ----------------------------------------------------------------------------------------
+# Payloads
+# -----------------------------------------------------------------------------------------
+def parse_loans(body, max_loans=MAX_BATCH_LOANS):
+    records = body.get('loans', [body]) if isinstance(body, dict) else body
+    if not isinstance(records, list) or not records:
+        raise RequestError(HTTPStatus.BAD_REQUEST, "expected a loan object or {\"loans\": [...]}")
+    if len(records) > max_loans:
+        raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"at most {max_loans} loans per request")
+
+    loans = []
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "each loan must be an object")
+        unknown = set(record) - set(LOAN_FIELDS) - {'loan_id', 'name'}
+        if unknown:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"unknown fields: {', '.join(sorted(unknown))}")
+        loan = {**LOAN_DEFAULTS, 'loan_id': i, **record}
+        if not isinstance(loan['pmi_drops_off'], bool):
+            raise RequestError(HTTPStatus.UNPROCESSABLE_ENTITY, "pmi_drops_off must be true or false")
+        try:
+            for field in LOAN_FIELDS:
+                if field != 'pmi_drops_off':
+                    loan[field] = float(loan[field])
+        except (TypeError, ValueError):
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"{field} must be a number")
+        # json.loads accepts NaN and Infinity, which would come back as nulls
+        not_finite = [field for field in LOAN_FIELDS if field != 'pmi_drops_off' and not math.isfinite(loan[field])]
+        if not_finite:
+            raise RequestError(HTTPStatus.UNPROCESSABLE_ENTITY, f"{', '.join(not_finite)} must be finite")
+        if loan['home_price'] <= 0 or not 0 <= loan['down_payment_percent'] < 100 or loan['loan_term_years'] <= 0:
+            raise RequestError(HTTPStatus.UNPROCESSABLE_ENTITY, "home_price, down_payment_percent and loan_term_years are out of range")
+        if loan['interest_rate'] < 0:
+            raise RequestError(HTTPStatus.UNPROCESSABLE_ENTITY, "interest_rate must not be negative")
+        loans.append(loan)
+    return loans
+
+
+def loan_arrays(loans):
+    return {field: np.array([loan[field] for loan in loans], dtype=bool if field == 'pmi_drops_off' else float)
+            for field in LOAN_FIELDS}
+
+
+def _json_values(values):
+    values = np.asarray(values)
+    if values.dtype.kind == 'f' and not np.isfinite(values).all():
+        return [value if np.isfinite(value) else None for value in values.tolist()]
+    return values.tolist()
+
+
+def columnar(columns):
+    return {name: _json_values(values) for name, values in columns.items()}
+
+
+# ----------------------------------------------------------------------------------------
+# Endpoints (plain functions, so they run the same on the loop or in a worker)
+# -----------------------------------------------------------------------------------------
+def _summaries(loans):
+    fields = loan_arrays(loans)
+    summary = payoff_summary(*(np.atleast_1d(value) for value in amortize_args(fields)))
+    summary = {name: np.atleast_1d(values) for name, values in summary.items()}
+    monthly = total_monthly_payment(
+        summary, fields['home_price'], fields['property_tax_rate'], fields['annual_insurance'],
+        fields['base_hoa'], fields['base_maint'],
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dti = np.where(fields['monthly_income'] > 0, monthly / fields['monthly_income'] * 100, np.nan)
+    return fields, summary, monthly, dti
+
+
+def payment(loans):
+    fields, summary, monthly, dti = _summaries(loans)
+    return {'columns': columnar({
+        'loan_id': [loan['loan_id'] for loan in loans],
+        'Loan Amount': np.round(fields['home_price'] * (1 - fields['down_payment_percent'] / 100), 2),
+        'Monthly P&I': np.round(summary['Monthly P&I'], 2),
+        'Property Tax': np.round(fields['home_price'] * fields['property_tax_rate'] / 100 / 12, 2),
+        'Insurance': np.round(fields['annual_insurance'] / 12, 2),
+        'PMI': np.round(summary['Initial PMI'], 2),
+        'HOA': fields['base_hoa'],
+        'Maintenance': fields['base_maint'],
+        'Total Monthly Payment': np.round(monthly, 2),
+        'DTI': np.round(dti, 2),
+    })}
+
+
+def summary(loans):
+    _, summary, monthly, dti = _summaries(loans)
+    return {'columns': columnar({
+        'loan_id': [loan['loan_id'] for loan in loans],
+        'Total Monthly Payment': np.round(monthly, 2),
+        'DTI': np.round(dti, 2),
+        **{name: np.round(values, 2) if values.dtype.kind == 'f' else values for name, values in summary.items()},
+    })}
+
+
+def schedule(loans):
+    fields = loan_arrays(loans)
+    schedules = amortize_stack(*amortize_args(fields))
+    return {'schedules': [
+        {'loan_id': loan['loan_id'], 'rows': len(columns['Month']), 'columns': columnar({name: columns[name] for name in COLUMNS})}
+        for loan, columns in zip(loans, schedules)
+    ]}
+
+
+def compare(loans, schedules=False):
+    names = [loan.get('name') or f"Loan {i + 1}" for i, loan in enumerate(loans)]
+    table, columns = compare_scenarios(loans, names)
+    result = {'columns': columnar({name: table[name].to_numpy() for name in table.columns})}
+    if schedules:
+        result['schedules'] = [columnar({name: values[name] for name in COLUMNS}) for values in columns]
+    return result
+
+
+ENDPOINTS = {
+    '/payment': payment,
+    '/summary': summary,
+    '/schedule': schedule,
+    '/compare': compare,
+}
+
+# Closed-form endpoints answered on the event loop when the batch is small
+INLINE = {'/payment', '/summary'}
+
+# Endpoints that amortize every loan month by month, capped at MAX_SCHEDULE_LOANS
+SCHEDULES = {'/schedule', '/compare'}
+
+
+def dispatch(path, loans, options):
+    if path == '/compare':
+        return compare(loans, bool(options.get('schedules')))
+    return ENDPOINTS[path](loans)
+
+
+# ----------------------------------------------------------------------------------------
+# HTTP front end
+# -----------------------------------------------------------------------------------------
+class CalculationService:
+    # Minimal HTTP/1.1 with keep-alive on asyncio streams; CPU work goes to `pool`
+    # (a ProcessPoolExecutor) unless workers=0, which keeps everything in-process
+
+    def __init__(self, host='127.0.0.1', port=8765, workers=None):
+        self.host = host
+        self.port = port
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.pool = None
+        self.server = None
+        self.requests = 0
+        self.errors = 0
+        self.coalesced = 0
+        self.started = time.time()
+        self._pending = {}
+
+    async def start(self):
+        if self.workers:
+            # Forked workers would inherit the listening and client sockets, so a closed
+            # connection never reaches EOF; forkserver workers start from a clean process
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(['engine.service'])
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            # Start the workers now rather than on the first schedule request
+            await asyncio.get_running_loop().run_in_executor(self.pool, os.getpid)
+        self.server = await asyncio.start_server(self._connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.close()
+
+    async def _connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, {'error': "headers too large"}, False)
+                    break
+
+                request_line, *header_lines = head.decode('latin-1').split("\r\n")
+                method, path, version = (request_line.split(" ") + ["", "", ""])[:3]
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get('connection', '').lower() != 'close' and version != 'HTTP/1.0'
+
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {'error': "invalid Content-Length"}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': "body too large"}, False)
+                    break
+                try:
+                    body = await reader.readexactly(length) if length else b""
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    # The client went away partway through the body
+                    break
+
+                status, payload = await self._handle(method, path.split("?", 1)[0], body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def _handle(self, method, path, body):
+        self.requests += 1
+        if path == '/health':
+            return HTTPStatus.OK, {'status': "ok", 'requests': self.requests, 'errors': self.errors,
+                                   'coalesced': self.coalesced, 'workers': self.workers,
+                                   'uptime': round(time.time() - self.started, 1)}
+        if path not in ENDPOINTS:
+            self.errors += 1
+            return HTTPStatus.NOT_FOUND, {'error': f"no endpoint {path}"}
+        if method != 'POST':
+            self.errors += 1
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': "use POST"}
+        try:
+            parsed = json.loads(body or b"{}")
+            loans = parse_loans(parsed, MAX_SCHEDULE_LOANS if path in SCHEDULES else MAX_BATCH_LOANS)
+            options = parsed if isinstance(parsed, dict) else {}
+            if path in INLINE and (self.pool is None or len(loans) < POOL_MIN_LOANS):
+                return HTTPStatus.OK, await self._coalesce(path, loans)
+            if self.pool is None:
+                return HTTPStatus.OK, dispatch(path, loans, options)
+            loop = asyncio.get_running_loop()
+            return HTTPStatus.OK, await loop.run_in_executor(self.pool, dispatch, path, loans, options)
+        except json.JSONDecodeError as error:
+            self.errors += 1
+            return HTTPStatus.BAD_REQUEST, {'error': f"invalid JSON: {error}"}
+        except RequestError as error:
+            self.errors += 1
+            return error.status, {'error': str(error)}
+        except Exception as error:
+            self.errors += 1
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"{type(error).__name__}: {error}"}
+
+    def _coalesce(self, path, loans):
+        # Requests parsed in the same loop iteration share one vectorized call
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(path, [])
+        if not pending:
+            loop.call_soon(self._flush, path)
+        pending.append((loans, future))
+        return future
+
+    def _flush(self, path):
+        batch = self._pending.pop(path, [])
+        self.coalesced += len(batch) - 1
+        try:
+            columns = ENDPOINTS[path]([loan for loans, _ in batch for loan in loans])['columns']
+        except Exception as error:
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        start = 0
+        for loans, future in batch:
+            end = start + len(loans)
+            future.set_result({'columns': {name: values[start:end] for name, values in columns.items()}})
+            start = end
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body
+        )
+        await writer.drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the mortgage engine over local HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes for schedules and large batches; 0 runs everything in-process")
+    args = parser.parse_args(argv)
+
+    service = CalculationService(args.host, args.port, args.workers)
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers")
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import numpy as np
+
+from engine.amortization import MAX_MONTHS, PAYOFF_TOLERANCE, level_payment, unwrap
+from engine.costs import MAINTENANCE_SPIKES, inflated_total, spike_total
+
+
+def _balance_at(loan_amount, monthly_interest, payment, k):
+    # The closed-form balance amortization.amortize_stack uses, evaluated at one month per scenario
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annuity = payment / monthly_interest
+        level = (loan_amount - annuity) * (1 + monthly_interest) ** k + annuity
+    return np.where(monthly_interest > 0, level, loan_amount - payment * k)
+
+
+def _first_month_at_or_below(loan_amount, monthly_interest, payment, target, max_months):
+    # Solve (L - A) g^k + A <= target for the smallest whole k, then nudge by one month
+    # where the log lands a hair on the wrong side of an integer
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annuity = payment / monthly_interest
+        ratio = (annuity - target) / (annuity - loan_amount)
+        k_level = np.log(ratio) / np.log1p(monthly_interest)
+        k_flat = (loan_amount - target) / payment
+    k = np.where(monthly_interest > 0, k_level, k_flat)
+    k = np.where(np.isfinite(k) & (k > 0), k, np.where(loan_amount <= target, 0, max_months))
+    k = np.clip(np.ceil(k), 0, max_months)
+
+    below = _balance_at(loan_amount, monthly_interest, payment, k) <= target
+    k = np.where(below, k, np.minimum(k + 1, max_months))
+    earlier = (k > 0) & (_balance_at(loan_amount, monthly_interest, payment, k - 1) <= target)
+    return np.where(earlier, k - 1, k).astype(np.int64)
+
+
+def interest_to_payoff(loan_amount, monthly_interest, payment, max_months=MAX_MONTHS):
+    # (payoff months, total interest) of a level monthly payment, in closed form
+    payoff_months = _first_month_at_or_below(loan_amount, monthly_interest, payment, PAYOFF_TOLERANCE, max_months)
+    final_balance = _balance_at(loan_amount, monthly_interest, payment, payoff_months)
+    # Whether or not the last payment was partial, lender receipts are n level payments plus the closing balance
+    return payoff_months, payment * payoff_months + final_balance - loan_amount
+
+
+# ----------------------------------------------------------------------------------------
+# Payoff Summary
+# -----------------------------------------------------------------------------------------
+def payoff_summary(home_price, down_payment_percent, interest_rate, loan_term_years, monthly_income,
+                   extra_payment_percent, pmi_drops_off=True, base_hoa=100, base_maint=150,
+                   max_months=MAX_MONTHS, annual_inflation=0.03, maintenance_spikes=MAINTENANCE_SPIKES):
+    # Headline numbers of amortization.amortize without building the schedule.
+    # Every argument may be a scalar or an array; arrays broadcast together.
+    home_price = np.asarray(home_price, dtype=float)
+    down_payment_percent = np.asarray(down_payment_percent, dtype=float)
+    interest_rate = np.asarray(interest_rate, dtype=float)
+    loan_term_years = np.asarray(loan_term_years)
+    pmi_drops_off = np.asarray(pmi_drops_off, dtype=bool)
+
+    down_payment = home_price * (down_payment_percent / 100)
+    loan_amount = home_price - down_payment
+    monthly_interest = interest_rate / 100 / 12
+    total_months = loan_term_years * 12
+
+    principal_interest = level_payment(loan_amount, monthly_interest, total_months)
+    extra_payment = (np.asarray(extra_payment_percent) / 100) * np.asarray(monthly_income)
+    payment = principal_interest + extra_payment
+
+    payoff_months, total_interest = interest_to_payoff(loan_amount, monthly_interest, payment, max_months)
+
+    pmi_rate = np.where(loan_term_years == 30, 0.0055, 0.003)
+    pmi_monthly = np.where(down_payment / home_price * 100 < 20, loan_amount * pmi_rate / 12, 0.0)
+    # PMI is charged while equity after the payment is under 20%, i.e. balance above 80% of price
+    equity_month = _first_month_at_or_below(loan_amount, monthly_interest, payment, 0.8 * home_price, max_months)
+    pmi_months = np.where(pmi_drops_off, np.minimum(np.maximum(equity_month - 1, 0), payoff_months), payoff_months)
+    pmi_months = np.where(pmi_monthly > 0, pmi_months, 0)
+    pmi_drop_month = np.where((pmi_monthly > 0) & (pmi_months < payoff_months), pmi_months + 1, 0)
+
+    hoa_total = inflated_total(payoff_months, np.asarray(base_hoa, dtype=float), annual_inflation)
+    maint_total = (inflated_total(payoff_months, np.asarray(base_maint, dtype=float), annual_inflation) +
+                   spike_total(payoff_months, maintenance_spikes))
+
+    first_payment = (np.minimum(payment, loan_amount * (1 + monthly_interest)) + np.asarray(base_hoa) + np.asarray(base_maint)
+                     + np.where(pmi_months > 0, pmi_monthly, 0.0))
+    total_paid = loan_amount + total_interest + hoa_total + maint_total + pmi_monthly * pmi_months
+
+    return {
+        'Payoff Months': unwrap(payoff_months),
+        'Monthly P&I': unwrap(principal_interest),
+        'First Payment': unwrap(first_payment),
+        'Total Interest': unwrap(total_interest),
+        'Total Paid': unwrap(total_paid),
+        'Initial PMI': unwrap(pmi_monthly),
+        'PMI Months': unwrap(pmi_months),
+        'PMI Drop Month': unwrap(pmi_drop_month),
+    }
+
+
+def total_monthly_payment(summary, home_price, property_tax_rate, annual_insurance, base_hoa, base_maint):
+    # The Payment tab's headline: P&I, tax, insurance, initial PMI, HOA and maintenance
+    return (
+        summary['Monthly P&I'] +
+        np.asarray(home_price) * (np.asarray(property_tax_rate) / 100) / 12 +
+        np.asarray(annual_insurance) / 12 +
+        summary['Initial PMI'] +
+        np.asarray(base_hoa) +
+        np.asarray(base_maint)
+    )
@@ -1,589 +1,723 @@
-#for people viewing this I put spacers in because I have horrible OCD and Im new to this
-from fpdf import FPDF
-import tempfile
-import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-from buttons import reset_year_filter
-from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
-from sidebar import render_sidebar
-
-
-st.set_page_config(page_title="Mortgage Calculator", layout="wide")
-
-
-# Load the CSS at the beginning of the app
-def load_local_css(file_path):
-    with open(file_path) as f:
-        st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
-
-load_local_css("assets/tabs.css")
-#---------------------------------------------------------------------------
-class MortgagePDF(FPDF):
-    def header(self):
-        self.set_font("Arial", "B", 12)
-        self.cell(0, 10, "Mortgage Summary Report", ln=True, align="C")
-        self.ln(10)
-    
-    def section_title(self, title):
-        self.set_font("Arial", "B", 11)
-        self.cell(0, 10, title, ln=True)
-        self.ln(1)
-        
-    def section_body(self, text):
-        self.set_font("Arial", "", 10)
-        self.multi_cell(0, 8, text)
-        self.ln()
-    
-    def generate_pdf_summary(summary_data):
-        pdf = MortgagePDF()
-        pdf.add_page()
-
-pdf.section_title("Loan Overview")
-overview = (
-f"Home Price: ${summary_data['Home Price']:,}\n"
-f"Loan Amount: ${summary_data['Loan Amount']:,}\n"
-f"Interest Rate: {summary_data['Interest Rate']}%\n"
-f"Loan Term: {summary_data['Loan Term']} years\n"
-)
-pdf.section_body(overview)
-
-pdf.section_title("Monthly Payment Breakdown")
-payment = (
-f"Principal & Interest: ${summary_data['P&I']:,}\n"
-f"Property Tax: ${summary_data['Tax']:,}\n"
-f"Insurance: ${summary_data['Insurance']:,}\n"
-f"PMI: ${summary_data['PMI']:,}\n"
-f"HOA: ${summary_data['HOA']:,}\n"
-f"Maintenance: ${summary_data['Maintenance']:,}\n"
-f"Total Monthly: ${summary_data['Total Payment']:,}"
-)
-pdf.section_body(payment)
-
-pdf.section_title("Affordability Check")
-pdf.section_body(f"DTI (Debt-to-Income Ratio): {summary_data['DTI']:.2f}%")
-
-pdf.section_title("Payoff Summary")
-payoff = (
-f"Time to Payoff: {summary_data['Payoff Time']}\n"
-f"Total Paid: ${summary_data['Total Paid']:,}\n"
-f"Total Interest Paid: ${summary_data['Total Interest']:,}"
-)
-pdf.section_body(payoff)
-
-temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-pdf.output(temp_file.name)
-return temp_file.name
-# -----------------------------------------------------------------------------------------
-# Simulate HOA and Maintenance
-# ------------------------------------------------------------------------------------------
-    def simulate_hoa_and_maintenance(months, base_hoa=100, base_maint=150, annual_inflation=0.03):
-        hoa_list = []
-        maint_list = []
-    for m in range(months):
-        inflation_factor = (1 + annual_inflation) ** (m / 12)
-
-        hoa = base_hoa * inflation_factor
-        maintenance = base_maint * inflation_factor
-
-    # Simulate major maintenance spikes every 5 or 10 years
-    if m % 60 == 0 and m != 0:
-        maintenance += 2000 * (0.75 + 0.5 * (m % 120 == 0))
-
-        hoa_list.append(round(hoa, 2))
-        maint_list.append(round(maintenance, 2))
-
-return hoa_list, maint_list
-
-# ----------------------------------------------------------------------------------------
-# Streamlit UI
-# -----------------------------------------------------------------------------------------
-st.set_page_config(page_title="Mortgage Calculator", layout="centered")
-st.title("🏡 Mortgage Calculator")
-
-    if "history" not in st.session_state:
-        st.session_state.history = []
-#------------------------------------------------------------------------------------------
-# Sidebar Inputs 
-#------------------------------------------------------------------------------------------
-st.sidebar.header("Loan Setup")
-home_price = st.sidebar.number_input("Home Price ($)", min_value=10000, value=300000, step=1000)
-loan_type = st.sidebar.selectbox("Loan Type Preset", ["Conventional (20%)", "FHA (3.5%)", "VA (0%)", "Custom"])
-
-    if loan_type == "Conventional (20%)":
-        default_down_percent = 20.0
-        default_interest = 6.5
-        default_term = 30
-    elif loan_type == "FHA (3.5%)":
-        default_down_percent = 3.5
-        default_interest = 6.0
-        default_term = 30
-    elif loan_type == "VA (0%)":
-        default_down_percent = 0.0
-        default_interest = 6.25
-        default_term = 30
-    else:
-        default_down_percent = 10.0
-        default_interest = 6.5
-        default_term = 30
-
-down_payment_percent_input = st.sidebar.number_input("Down Payment (% of Home Price)", 0.0, 100.0, value=default_down_percent, step=0.5)
-down_payment = home_price * (down_payment_percent_input / 100)
-
-loan_term_years = st.sidebar.selectbox("Loan Term (years)", [15, 30], index=0 if default_term == 15 else 1)
-interest_rate = st.sidebar.number_input("Interest Rate (%)", min_value=0.0, value=default_interest, step=0.1)
-property_tax_rate = st.sidebar.number_input("Property Tax Rate (%)", min_value=0.0, value=1.2, step=0.1)
-annual_insurance = st.sidebar.number_input("Annual Home Insurance ($)", min_value=0, value=1200, step=100)
-monthly_income = st.sidebar.number_input("Monthly Income ($)", min_value=0, value=6000, step=100)
-extra_payment_percent = st.sidebar.slider("Extra % of Income Toward Loan Payoff", 0, 50, 10)
-pmi_drops_off = st.sidebar.checkbox("PMI drops off at 20% equity", value=True)
-base_hoa = st.sidebar.number_input("Monthly HOA Fee ($)", min_value=0, value=100, step=50)
-base_maint = st.sidebar.number_input("Monthly Maintenance Estimate ($)", min_value=0, value=150, step=50)
-#----
-#sidebar   
-#----    
-render_sidebar()
-
-# ----------------------------
-# Sidebar Logic
-# ----------------------------
-
-
-# ----------------------------
-# Mortgage Calculation
-# ----------------------------
-if home_price > 0 and down_payment >= 0 and down_payment < home_price and interest_rate > 0 and monthly_income > 0:
-loan_amount = home_price - down_payment
-monthly_interest = interest_rate / 100 / 12
-total_months = loan_term_years * 12
-down_payment_percent = (down_payment / home_price) * 100
-
-monthly_principal_interest = (
-loan_amount *
-(monthly_interest * (1 + monthly_interest) ** total_months) /
-((1 + monthly_interest) ** total_months - 1)
-) if monthly_interest > 0 else loan_amount / total_months
-
-monthly_property_tax = (home_price * (property_tax_rate / 100)) / 12
-monthly_insurance = annual_insurance / 12
-pmi_rate = 0.0055 if loan_term_years == 30 else 0.003
-initial_pmi_monthly = (loan_amount * pmi_rate) / 12 if down_payment_percent < 20 else 0
-
-hoa_schedule, maint_schedule = simulate_hoa_and_maintenance(1200, base_hoa, base_maint)
-
-amortization_rows = []
-balance = loan_amount
-month = 1
-cumulative_interest = 0
-cumulative_principal = 0
-
-while balance > 0 and month <= 1200:
-monthly_hoa = hoa_schedule[month - 1]
-monthly_maintenance = maint_schedule[month - 1]
-
-interest_payment = balance * monthly_interest
-principal_payment = monthly_principal_interest - interest_payment
-extra_payment = (extra_payment_percent / 100) * monthly_income
-total_principal = principal_payment + extra_payment
-
-if total_principal > balance:
-total_principal = balance
-principal_payment = balance
-total_payment = balance + interest_payment + monthly_hoa + monthly_maintenance
-else:
-total_payment = (
-monthly_principal_interest +
-extra_payment +
-monthly_hoa +
-monthly_maintenance
-)
-
-balance -= total_principal
-cumulative_interest += interest_payment
-cumulative_principal += total_principal
-
-current_pmi = 0
-if initial_pmi_monthly > 0:
-equity_percent = (cumulative_principal + down_payment) / home_price * 100
-if not pmi_drops_off or equity_percent < 20:
-current_pmi = initial_pmi_monthly
-
-amortization_rows.append({
-'Month': month,
-'Payment': round(total_payment + current_pmi, 2),
-'Principal': round(total_principal, 2),
-'Interest': round(interest_payment, 2),
-'PMI': round(current_pmi, 2),
-'HOA': round(monthly_hoa, 2),
-'Maintenance': round(monthly_maintenance, 2),
-'Cumulative Principal': round(cumulative_principal, 2),
-'Cumulative Interest': round(cumulative_interest, 2),
-'Balance': round(balance, 2)
-})
-
-month += 1
-
-df_monthly = pd.DataFrame(amortization_rows)
-payoff_months = len(df_monthly)
-years = payoff_months // 12
-months = payoff_months % 12
-
-st.session_state.history.append({
-"Home Price": home_price,
-"Loan Amount": loan_amount,
-"Interest Rate": interest_rate,
-"Monthly Payment": round(df_monthly["Payment"].iloc[0], 2),
-"Years to Payoff": f"{years}y {months}m",
-"Total Interest": round(df_monthly['Interest'].sum(), 2)
-})
-
-# ----------------------------
-# Tabs
-# ----------------------------
-tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
-"📊 Payment",
-"💡 Affordable?",
-"📋 Table",
-"📈 Analysis",
-"📊 Compare",
-"📂 Archive",
-"💾 Export"
-
-
-])
-
-with tab1:
-
-min_year = int(df_monthly["Month"].min() / 12)
-max_year = int(df_monthly["Month"].max() / 12)
-
-# Show the reset button from the external file
-reset_year_filter(min_year, max_year)
-
-# Use the year_range from session state
-year_range = st.session_state.year_range
-month_start = year_range[0] * 12
-month_end = (year_range[1] + 1) * 12 - 1
-filtered_df = df_monthly[(df_monthly["Month"] >= month_start) & (df_monthly["Month"] <= month_end)]
-st.markdown('<div class="chart-kpi"><h3>📊 Monthly Payment Breakdown</h3></div>', unsafe_allow_html=True)        
-with st.expander("📌 Full Payment Breakdown", expanded=True):
-st.write(f"**Loan Amount:** ${loan_amount:,.2f}")
-st.write(f"**Principal & Interest:** ${monthly_principal_interest:,.2f}")
-st.write(f"**Property Tax:** ${monthly_property_tax:,.2f}")
-st.write(f"**Insurance:** ${monthly_insurance:,.2f}")
-if initial_pmi_monthly > 0:
-st.write(f"**PMI (Initial):** ${initial_pmi_monthly:,.2f}")
-st.write(f"**HOA (Initial):** ${base_hoa:,.2f}")
-st.write(f"**Maintenance (Initial):** ${base_maint:,.2f}")
-total_monthly_payment = monthly_principal_interest + monthly_property_tax + monthly_insurance + initial_pmi_monthly + base_hoa + base_maint
-st.markdown(f"### 👉 Total Monthly Payment: **${total_monthly_payment:,.2f}**")
-with st.expander("📌 Key Loan Metrics"):
-col1, col2, col3 = st.columns(3)
-col1.metric("Monthly Payment", f"${total_monthly_payment:,.0f}")
-col2.metric("Time to Payoff", f"{years}y {months}m")
-col3.metric("Total Interest", f"${df_monthly['Interest'].sum():,.0f}")
-
-
-
-
-with tab2:
-st.markdown('<div class="kpi-card">', unsafe_allow_html=True)  # Start wrapper
-st.markdown('<div class="chart-kpi"><h3>💡 Affordability Check</h3></div>', unsafe_allow_html=True)
-with st.expander("📈 Debt-to-Income (DTI) Analysis", expanded=True):
-payment_to_income = (total_monthly_payment / monthly_income) * 100
-st.write(f"Your mortgage payment is **{payment_to_income:.2f}%** of your monthly income.")
-if payment_to_income > 36:
-st.error("🚨 Exceeds 36% — risky debt-to-income ratio.")
-elif payment_to_income > 28:
-st.warning("⚠️ Above 28% — higher than recommended for housing.")
-else:
-st.success("✅ Affordable based on income.")
-df_monthly["DTI %"] = (df_monthly["Payment"] / monthly_income) * 100
-fig_dti = go.Figure()
-fig_dti.add_trace(go.Scatter(
-x=df_monthly["Month"],
-y=df_monthly["DTI %"],
-mode='lines+markers',
-name='DTI %',
-line=dict(color='darkblue')
-))
-fig_dti.update_layout(
-title="DTI Over Time",
-xaxis_title="Month",
-yaxis_title="DTI (%)",
-template="plotly_white",
-legend=dict(x=1.05, y=1),
-margin=dict(r=80)
-)
-
-st.plotly_chart(fig_dti, use_container_width=True)            
-st.markdown('</div>', unsafe_allow_html=True)
-
-with tab3:
-st.markdown('<div class="chart-kpi"><h3>📋 Monthly Amortization Schedule</h3></div>', unsafe_allow_html=True)
-
-with st.expander("📅 Amortization Table", expanded=True):
-gb = GridOptionsBuilder.from_dataframe(df_monthly.head(360))
-gb.configure_pagination(paginationAutoPageSize=True)
-gb.configure_default_column(resizable=True, filter=True, sortable=True)
-gridOptions = gb.build()
-AgGrid(
-df_monthly.head(360),
-gridOptions=gridOptions,
-enable_enterprise_modules=False,
-theme="material",  # Options: "streamlit", "alpine", "material", "balham", etc.
-fit_columns_on_grid_load=True,
-height=400,
-)
-
-with tab4: #TAB 4 
-min_year = int(df_monthly["Month"].min() / 12)
-max_year = int(df_monthly["Month"].max() / 12)
-year_range = st.slider("Select Year Range", min_year, max_year, (min_year, max_year))
-month_start = year_range[0] * 12
-month_end = (year_range[1] + 1) * 12 - 1
-filtered_df = df_monthly[(df_monthly["Month"] >= month_start) & (df_monthly["Month"] <= month_end)]
-# 📈 Balance Timeline
-
-st.markdown('<div class="chart-kpi"><h3>📈 Balance Timeline</h3></div>', unsafe_allow_html=True)
-with st.expander("📉 Balance Over Time", expanded=True):
-fig1 = go.Figure()
-fig1.add_trace(go.Scatter(
-x=filtered_df["Month"],
-y=filtered_df["Balance"],
-mode='lines+markers',
-name='Balance',
-line=dict(color='blue')
-))
-fig1.update_layout(
-xaxis_title="Month",
-yaxis_title="Balance ($)",
-template="plotly_white",
-legend=dict(x=1.05, y=1),
-margin=dict(r=120)
-)
-st.plotly_chart(fig1, use_container_width=True)
-
-# 📊 Principal vs Interest
-st.markdown('<div class="chart-kpi"><h3>📊 Principal vs Interest</h3></div>', unsafe_allow_html=True)
-with st.expander("📊 Principal vs Interest", expanded=True):
-fig2 = go.Figure()
-fig2.add_trace(go.Scatter(
-x=filtered_df["Month"],
-y=filtered_df["Principal"],
-mode='lines+markers',
-name='Principal',
-line=dict(color='green')
-))
-fig2.add_trace(go.Scatter(
-x=filtered_df["Month"],
-y=filtered_df["Interest"],
-mode='lines+markers',
-name='Interest',
-line=dict(color='red')
-))
-fig2.update_layout(
-xaxis_title="Month",
-yaxis_title="Amount ($)",
-template="plotly_white",
-legend=dict(x=1.05, y=1),
-margin=dict(r=120)
-)
-st.plotly_chart(fig2, use_container_width=True)
-
-# 🏠 HOA & Maintenance
-st.markdown('<div class="chart-kpi"><h3>🏠 HOA & Maintenance Over Time</h3></div>', unsafe_allow_html=True)
-with st.expander("🏠 HOA & Maintenance", expanded=True):
-fig3 = go.Figure()
-fig3.add_trace(go.Scatter(
-x=filtered_df["Month"],
-y=filtered_df["HOA"],
-mode='lines+markers',
-name='HOA',
-line=dict(color='purple')
-))
-fig3.add_trace(go.Scatter(
-x=filtered_df["Month"],
-y=filtered_df["Maintenance"],
-mode='lines+markers',
-name='Maintenance',
-line=dict(color='orange')
-))
-fig3.update_layout(
-xaxis_title="Month",
-yaxis_title="Monthly Cost ($)",
-template="plotly_white",
-legend=dict(x=1.05, y=1),
-margin=dict(r=120)
-)
-st.plotly_chart(fig3, use_container_width=True)
-
-with tab5:
-st.markdown('<div class="chart-kpi"><h3>📊 Side-by-Side Loan Comparison</h3></div>', unsafe_allow_html=True)
-st.info("This section will allow you to compare two mortgage scenarios side by side.")
-
-st.markdown("""
-       **Coming Next:**
-       - Two parallel input panels for Loan A and Loan B
-       - Independent amortization for each
-       - Comparison table of monthly payment, interest, payoff time, DTI
-       - Optional: side-by-side charting
-       """)
-
-with tab5:
-    st.markdown('<div class="chart-kpi"><h3>📊 Side-by-Side Loan Comparison</h3></div>', unsafe_allow_html=True)
-    col1, col2 = st.columns(2)
-    with col1:
-    st.markdown("### 🅰️ Loan A")
-    with st.expander("🅰️ Loan A Inputs"):
-    home_price_a = st.number_input("Home Price (A)", value=300000, key="price_a")
-    down_payment_a = st.number_input("Down Payment (A)", value=60000, key="down_a")
-    interest_a = st.number_input("Interest Rate % (A)", value=6.5, key="rate_a")
-    term_a = st.selectbox("Term (A)", [15, 30], index=1, key="term_a")
-    income_a = st.number_input("Monthly Income (A)", value=6000, key="income_a")
-    
-    with col2:
-    st.markdown("### 🅱️ Loan B")
-    with st.expander("🅱️ Loan B Inputs"):    
-    home_price_b = st.number_input("Home Price (B)", value=325000, key="price_b")
-    down_payment_b = st.number_input("Down Payment (B)", value=65000, key="down_b")
-    interest_b = st.number_input("Interest Rate % (B)", value=6.0, key="rate_b")
-    term_b = st.selectbox("Term (B)", [15, 30], index=1, key="term_b")
-    income_b = st.number_input("Monthly Income (B)", value=6000, key="income_b")
-
-def calc_mortgage(p, r, n):
-    r_month = r / 12 / 100
-    n_months = n * 12
-    return p / n_months if r_month == 0 else p * (r_month * (1 + r_month)**n_months) / ((1 + r_month)**n_months - 1)
-    
-    loan_amt_a = home_price_a - down_payment_a
-    loan_amt_b = home_price_b - down_payment_b
-    
-    monthly_a = calc_mortgage(loan_amt_a, interest_a, term_a)
-    monthly_b = calc_mortgage(loan_amt_b, interest_b, term_b)
-    
-    st.markdown("### 🔍 Loan Comparison Summary")
-    with st.expander("📊 Comparison Summary"):    
-    comparison = {
-    "Metric": [
-    "Home Price", "Loan Amount", "Interest Rate", "Term (years)",
-    "Monthly Payment", "DTI % (Monthly / Income)"
-    ],
-    "Loan A": [
-    f"${home_price_a:,.2f}", f"${loan_amt_a:,.2f}", f"{interest_a:.2f}%", f"{term_a}",
-    f"${monthly_a:,.2f}", f"{(monthly_a / income_a * 100):.2f}%"
-    ],
-    "Loan B": [
-    f"${home_price_b:,.2f}", f"${loan_amt_b:,.2f}", f"{interest_b:.2f}%", f"{term_b}",
-    f"${monthly_b:,.2f}", f"{(monthly_b / income_b * 100):.2f}%"
-    ]
-    }
-    
-    df_compare = pd.DataFrame(comparison)
-    st.dataframe(df_compare, use_container_width=True)    
-
-
-
-with tab6:
-    st.markdown('<div class="chart-kpi"><h3>📂 Calculation History</h3></div>', unsafe_allow_html=True)
-    with st.expander("📁 View Saved Calculations", expanded=True):
-    if st.session_state.history:
-    df_history = pd.DataFrame(st.session_state.history)
-    
-    gb = GridOptionsBuilder.from_dataframe(df_history)
-    gb.configure_pagination()
-    gb.configure_default_column(groupable=True, value=True, editable=False)
-    gb.configure_selection(selection_mode="single", use_checkbox=True)
-    grid_options = gb.build()
-    
-    grid_response = AgGrid(
-    df_history,
-    gridOptions=grid_options,
-    height=400,
-    theme="streamlit",
-    fit_columns_on_grid_load=True,
-    update_mode=GridUpdateMode.SELECTION_CHANGED
-    )
-    
-    selected = grid_response['selected_rows']
-    
-    if selected:
-    selected_data = selected[0]
-    
-    pdf_data = {
-    "Home Price": selected_data.get("Home Price"),
-    "Loan Amount": selected_data.get("Loan Amount"),
-    "Interest Rate": selected_data.get("Interest Rate"),
-    "Loan Term": selected_data.get("Loan Term"),
-    "P&I": selected_data.get("P&I"),
-    "Tax": selected_data.get("Tax"),
-    "Insurance": selected_data.get("Insurance"),
-    "PMI": selected_data.get("PMI"),
-    "HOA": selected_data.get("HOA"),
-    "Maintenance": selected_data.get("Maintenance"),
-    "Total Payment": selected_data.get("Total Payment"),
-    "DTI": selected_data.get("DTI"),
-    "Payoff Time": selected_data.get("Payoff Time"),
-    "Total Paid": selected_data.get("Total Paid"),
-    "Total Interest": selected_data.get("Total Interest"),
-    }
-
-from fpdf import FPDF
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    pdf.cell(200, 10, txt="🏡 Mortgage Report", ln=True, align="C")
-    
-    for key, value in pdf_data.items():
-    pdf.cell(200, 10, txt=f"{key}: {value}", ln=True)
-    
-    pdf_output = "/tmp/mortgage_report.pdf"
-    pdf.output(pdf_output)
-    
-    with open(pdf_output, "rb") as f:
-    st.download_button(
-    label="📥 Download Selected Report as PDF",
-    data=f,
-    file_name="mortgage_report.pdf",
-    mime="application/pdf"
-    )
-    else:
-    st.info("No calculations saved yet.")
-    
-    with tab7:
-    csv = df_monthly.to_csv(index=False).encode('utf-8')
-    st.download_button("Download CSV", data=csv, file_name="monthly_amortization.csv", mime="text/csv")
-    pdf_data = {
-    "Home Price": home_price,
-    "Loan Amount": loan_amount,
-    "Interest Rate": interest_rate,
-    "Loan Term": loan_term_years,
-    "P&I": round(monthly_principal_interest, 2),
-    "Tax": round(monthly_property_tax, 2),
-    "Insurance": round(monthly_insurance, 2),
-    "PMI": round(initial_pmi_monthly, 2),
-    "HOA": round(base_hoa, 2),
-    "Maintenance": round(base_maint, 2),
-    "Total Payment": round(total_monthly_payment, 2),
-    "DTI": round((total_monthly_payment / monthly_income) * 100, 2),
-    "Payoff Time": f"{years}y {months}m",
-    "Total Paid": round(df_monthly['Payment'].sum(), 2),
-    "Total Interest": round(df_monthly['Interest'].sum(), 2),
-    }
-    
-    pdf_path = generate_pdf_summary(pdf_data)
-
-with tab7:
-    with open(pdf_path, "rb") as file:
-    st.download_button(
-    label="📄 Download PDF Report",
-    data=file,
-    file_name="Mortgage_Summary.pdf",
-    mime="application/pdf"
-    )
-    ~
-    
-
-
-
-
+#for people viewing this I put spacers in because I have horrible OCD and Im new to this
+import functools
+import os
+from collections import deque
+import time
+import numpy as np
+import streamlit as st
+import plotly.graph_objects as go
+from buttons import reset_year_filter
+from components.charts import line_trace, payload_caption
+from sidebar import render_sidebar
+from engine import amortization
+from engine.affordability import max_home_price
+from engine.cache import ScheduleCache
+from engine.history import HistoryStore
+from engine.instrument import StageTimer
+from engine.payments import PAYMENT_FREQUENCIES, PLAN_DEFAULTS, has_plan
+from engine.rollups import ROLLUP_PERIODS, period_range
+# pandas, st_aggrid, fpdf and pyarrow are imported inside the tab or download that needs them,
+# so a cold start only pays for what the open tab uses
+
+
+st.set_page_config(page_title="Mortgage Calculator", layout="wide")
+
+# ?profile=1 (or MORTGAGE_PROFILE=1) times each stage of the rerun. MORTGAGE_PROFILE=memory also
+# counts allocations; tracemalloc is process-wide, so that is not available from the URL.
+# MORTGAGE_PROFILE_LOG appends one JSON record per rerun to that file.
+profile_mode = st.query_params.get("profile", os.environ.get("MORTGAGE_PROFILE", ""))
+st.session_state.perf_run = st.session_state.get("perf_run", 0) + 1
+perf = StageTimer(
+    enabled=profile_mode not in ("", "0"),
+    memory=os.environ.get("MORTGAGE_PROFILE") == "memory",
+    log_path=os.environ.get("MORTGAGE_PROFILE_LOG"),
+    run=st.session_state.perf_run,
+)
+
+
+def keep_perf_record(record):
+    if record:
+        from components.perf_panel import PERF_RUNS
+
+        st.session_state.setdefault("perf_runs", deque(maxlen=PERF_RUNS)).append(record)
+
+
+def tab_fragment(stage_name):
+    # Runs a tab body as an st.fragment, so its widgets rerun only that tab. A fragment rerun
+    # comes after the full run's timer finished; the timer restarts and records it as its own run.
+    def decorate(body):
+        @st.fragment
+        @functools.wraps(body)
+        def run_tab():
+            fragment_rerun = perf.finished
+            if fragment_rerun:
+                st.session_state.perf_run += 1
+                perf.restart(st.session_state.perf_run)
+            try:
+                with perf.stage(stage_name):
+                    body()
+            finally:
+                # Also when a rerun or stop cuts the fragment short, so the next one starts clean
+                record = perf.finish() if fragment_rerun else None
+            keep_perf_record(record)
+        return run_tab
+    return decorate
+
+
+# Load the CSS at the beginning of the app; the file is read once per process
+@st.cache_resource(show_spinner=False)
+def read_local_css(file_path):
+    with open(file_path) as f:
+        return f"<style>{f.read()}</style>"
+
+def load_local_css(file_path):
+    st.markdown(read_local_css(file_path), unsafe_allow_html=True)
+
+with perf.stage("css"):
+    load_local_css("assets/tabs.css")
+# ----------------------------------------------------------------------------------------
+# Streamlit UI
+# -----------------------------------------------------------------------------------------
+st.set_page_config(page_title="Mortgage Calculator", layout="centered")
+st.title("🏡 Mortgage Calculator")
+
+if "history_store" not in st.session_state:
+    # Saved calculations persist in SQLite; MORTGAGE_HISTORY_DB picks the file
+    st.session_state.history_store = HistoryStore(os.environ.get("MORTGAGE_HISTORY_DB", "mortgage_history.sqlite3"))
+
+
+# One schedule cache for every session in the process, so popular inputs are computed once.
+# MORTGAGE_CACHE_MB bounds its memory, MORTGAGE_CACHE_DIR keeps schedules across app restarts,
+# and MORTGAGE_WARM_CACHE=1 fills it with the loan type presets at common prices on first use.
+@st.cache_resource(show_spinner=False)
+def shared_schedule_cache():
+    cache = ScheduleCache(
+        max_entries=4096,
+        max_bytes=int(os.environ.get("MORTGAGE_CACHE_MB", "256")) * 1024 * 1024,
+        disk_dir=os.environ.get("MORTGAGE_CACHE_DIR"),
+    )
+    if os.environ.get("MORTGAGE_WARM_CACHE", "") not in ("", "0"):
+        from engine.compare import amortize_scenarios
+        from engine.loans import preset_loans
+
+        amortize_scenarios(preset_loans(), cache)
+    return cache
+
+schedule_cache = shared_schedule_cache()
+#------------------------------------------------------------------------------------------
+# Sidebar Inputs
+#------------------------------------------------------------------------------------------
+with perf.stage("sidebar"):
+    sidebar_inputs = render_sidebar()
+home_price = sidebar_inputs['home_price']
+down_payment_percent_input = sidebar_inputs['down_payment_percent']
+down_payment = home_price * (down_payment_percent_input / 100)
+
+loan_term_years = sidebar_inputs['loan_term_years']
+interest_rate = sidebar_inputs['interest_rate']
+property_tax_rate = sidebar_inputs['property_tax_rate']
+annual_insurance = sidebar_inputs['annual_insurance']
+monthly_income = sidebar_inputs['monthly_income']
+extra_payment_percent = sidebar_inputs['extra_payment_percent']
+pmi_drops_off = sidebar_inputs['pmi_drops_off']
+base_hoa = sidebar_inputs['base_hoa']
+base_maint = sidebar_inputs['base_maint']
+
+# ----------------------------
+# Sidebar Logic
+# ----------------------------
+
+
+# ----------------------------
+# Mortgage Calculation
+# ----------------------------
+if home_price > 0 and down_payment >= 0 and down_payment < home_price and interest_rate > 0 and monthly_income > 0:
+    loan_amount = home_price - down_payment
+    monthly_interest = interest_rate / 100 / 12
+    total_months = loan_term_years * 12
+    down_payment_percent = (down_payment / home_price) * 100
+
+    monthly_principal_interest = amortization.monthly_principal_interest(loan_amount, monthly_interest, total_months)
+
+    monthly_property_tax = (home_price * (property_tax_rate / 100)) / 12
+    monthly_insurance = annual_insurance / 12
+    initial_pmi_monthly = amortization.initial_pmi_monthly(loan_amount, loan_term_years, down_payment_percent)
+
+    # KPIs and the history row come from the closed-form summary; the schedule is only built by
+    # the tabs that list or chart months. Reruns with the same inputs reuse the cached result.
+    with perf.stage("summary"):
+        loan_summary = schedule_cache.summary(sidebar_inputs, exact=sidebar_inputs['exact_cents'])
+    total_monthly_payment = monthly_principal_interest + monthly_property_tax + monthly_insurance + initial_pmi_monthly + base_hoa + base_maint
+    payoff_months = loan_summary["Payoff Months"]
+    years = payoff_months // 12
+    months = payoff_months % 12
+
+    def loan_schedule():
+        with perf.stage("schedule"):
+            return schedule_cache.get_or_compute(sidebar_inputs, exact=sidebar_inputs['exact_cents'])[0]
+
+    def schedule_rollup(months_per_period):
+        # Period totals of the schedule above; built once per schedule and shared like it
+        return schedule_cache.rollup(sidebar_inputs, months_per_period, exact=sidebar_inputs['exact_cents'])
+
+    def period_view(key, default="Yearly"):
+        # Months per period for a chart: 1 plots the monthly rows, anything else a rollup
+        col1, col2 = st.columns(2)
+        view = col1.selectbox("View", [*ROLLUP_PERIODS, "Custom"], index=list(ROLLUP_PERIODS).index(default), key=f"{key}_view")
+        if view == "Custom":
+            return col2.number_input("Months per Period", min_value=1, max_value=120, value=6, key=f"{key}_months")
+        return ROLLUP_PERIODS[view]
+
+    def period_titles(months_per_period):
+        # (x axis title, "per ..." phrase) for a chart of monthly rows or period totals
+        name = {1: "month", 3: "quarter", 12: "year"}.get(months_per_period, f"{months_per_period}-month period")
+        return ("Month" if months_per_period == 1 else f"Month (end of each {name})"), f"per {name}"
+
+    with perf.stage("history"):
+        st.session_state.history_store.record(sidebar_inputs, {
+        "Home Price": home_price,
+        "Loan Amount": loan_amount,
+        "Interest Rate": interest_rate,
+        "Loan Term": loan_term_years,
+        "Monthly Payment": round(loan_summary["First Payment"], 2),
+        "Years to Payoff": f"{years}y {months}m",
+        "Total Interest": round(loan_summary["Total Interest"], 2)
+        })
+
+    if sidebar_inputs['exact_cents'] and has_plan(sidebar_inputs):
+        st.sidebar.caption("Exact cents covers plain monthly payments; this payment plan uses the standard engine.")
+
+    # ----------------------------
+    # Tabs
+    # ----------------------------
+    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
+    "📊 Payment",
+    "💡 Affordable?",
+    "📋 Table",
+    "📈 Analysis",
+    "📊 Compare",
+    "📂 Archive",
+    "💾 Export"
+
+
+    ], key="active_tab", on_change="rerun")
+    # Only the open tab's body runs; switching tabs reruns the script. Each tab is a fragment,
+    # so its own widgets rerun just that tab against the cached summary and schedule.
+
+    @tab_fragment("payment tab")
+    def payment_tab():
+        schedule_columns = loan_schedule()
+        min_year = int(schedule_columns["Month"][0] / 12)
+        max_year = int(schedule_columns["Month"][-1] / 12)
+
+        # Show the reset button from the external file
+        reset_year_filter(min_year, max_year)
+
+        st.markdown('<div class="chart-kpi"><h3>📊 Monthly Payment Breakdown</h3></div>', unsafe_allow_html=True)
+        with st.expander("📌 Full Payment Breakdown", expanded=True):
+            st.write(f"**Loan Amount:** ${loan_amount:,.2f}")
+            st.write(f"**Principal & Interest:** ${monthly_principal_interest:,.2f}")
+            if sidebar_inputs['payment_frequency'] != "monthly":
+                per_year, share = PAYMENT_FREQUENCIES[sidebar_inputs['payment_frequency']]
+                st.write(f"**{sidebar_inputs['payment_frequency'].title()} P&I:** "
+                         f"${monthly_principal_interest * share:,.2f} ({per_year} payments a year)")
+            st.write(f"**Property Tax:** ${monthly_property_tax:,.2f}")
+            st.write(f"**Insurance:** ${monthly_insurance:,.2f}")
+            if initial_pmi_monthly > 0:
+                st.write(f"**PMI (Initial):** ${initial_pmi_monthly:,.2f}")
+            st.write(f"**HOA (Initial):** ${base_hoa:,.2f}")
+            st.write(f"**Maintenance (Initial):** ${base_maint:,.2f}")
+            st.markdown(f"### 👉 Total Monthly Payment: **${total_monthly_payment:,.2f}**")
+        with st.expander("📌 Key Loan Metrics"):
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Monthly Payment", f"${total_monthly_payment:,.0f}")
+            col2.metric("Time to Payoff", f"{years}y {months}m")
+            col3.metric("Total Interest", f"${loan_summary['Total Interest']:,.0f}")
+            yearly = schedule_rollup(12)
+            equity_year = min(5, len(yearly["Period"]))
+            col1, col2, col3 = st.columns(3)
+            col1.metric("First-Year Interest", f"${yearly['Interest'][0]:,.0f}")
+            col2.metric("First-Year Principal", f"${yearly['Principal'][0]:,.0f}")
+            col3.metric(f"Equity After Year {equity_year}", f"{yearly['Equity %'][equity_year - 1]:.1f}%")
+        with st.expander("🎯 Payoff Goal"), perf.stage("payment › payoff goal"):
+            from engine.optimizer import extra_for_interest_cap, extra_for_payoff
+
+            col1, col2 = st.columns(2)
+            goal_years = col1.number_input("Pay Off Within (years)", 1, int(loan_term_years), max(1, int(loan_term_years) // 2))
+            interest_cap = col2.number_input("Total Interest Cap ($)", 0, None, int(round(loan_summary['Total Interest'] * 0.5, -3)), step=1000)
+            goal_extras = {
+                f"Paid off in {goal_years} years": extra_for_payoff(
+                    home_price, down_payment_percent_input, interest_rate, loan_term_years, goal_years * 12
+                ),
+                f"Interest under ${interest_cap:,.0f}": extra_for_interest_cap(
+                    home_price, down_payment_percent_input, interest_rate, loan_term_years, interest_cap
+                ),
+            }
+            col1, col2 = st.columns(2)
+            for col, (label, extra) in zip((col1, col2), goal_extras.items()):
+                if np.isnan(extra):
+                    col.metric(label, "Not reachable")
+                else:
+                    col.metric(label, f"${extra:,.2f}/mo", f"{extra / monthly_income * 100:.1f}% of income", delta_color="off")
+            st.caption(f"Smallest extra monthly payment for each goal, with plain monthly payments. You pay "
+                       f"{extra_payment_percent:g}% of income (${extra_payment_percent / 100 * monthly_income:,.2f}) extra now.")
+
+
+
+
+    @tab_fragment("affordability tab")
+    def affordability_tab():
+        st.markdown('<div class="kpi-card">', unsafe_allow_html=True)  # Start wrapper
+        st.markdown('<div class="chart-kpi"><h3>💡 Affordability Check</h3></div>', unsafe_allow_html=True)
+        with st.expander("📈 Debt-to-Income (DTI) Analysis", expanded=True):
+            payment_to_income = (total_monthly_payment / monthly_income) * 100
+            st.write(f"Your mortgage payment is **{payment_to_income:.2f}%** of your monthly income.")
+            if payment_to_income > 36:
+                st.error("🚨 Exceeds 36% — risky debt-to-income ratio.")
+            elif payment_to_income > 28:
+                st.warning("⚠️ Above 28% — higher than recommended for housing.")
+            else:
+                st.success("✅ Affordable based on income.")
+            months_per_period = period_view("dti")
+            if months_per_period == 1:
+                # A new array: the cached schedule is shared with other sessions and read-only
+                schedule_columns = loan_schedule()
+                dti_months, dti_percent = schedule_columns["Month"], np.asarray(schedule_columns["Payment"]) / monthly_income * 100
+            else:
+                dti_rollup = schedule_rollup(months_per_period)
+                dti_months, dti_percent = dti_rollup["Month"], dti_rollup["DTI %"]
+            fig_dti = go.Figure()
+            fig_dti_stats = {}
+            fig_dti.add_trace(line_trace(
+            dti_months,
+            dti_percent,
+            fig_dti_stats,
+            mode='lines+markers',
+            name='DTI %',
+            line=dict(color='darkblue')
+            ))
+            x_title, per_period = period_titles(months_per_period)
+            fig_dti.update_layout(
+            title="DTI Over Time",
+            xaxis_title=x_title,
+            yaxis_title="DTI (%)" if months_per_period == 1 else f"Average DTI {per_period} (%)",
+            template="plotly_white",
+            legend=dict(x=1.05, y=1),
+            margin=dict(r=80)
+            )
+
+            st.plotly_chart(fig_dti, use_container_width=True)
+            payload_caption(fig_dti_stats)
+        with st.expander("🎯 Maximum Affordable Price"):
+            target_dti = st.slider("Target Housing DTI (%)", 10, 50, 28)
+            affordable = max_home_price(
+                monthly_income, interest_rate, loan_term_years, property_tax_rate, annual_insurance,
+                base_hoa, base_maint, target_dti, down_payment_percent=down_payment_percent_input
+            )
+            col1, col2 = st.columns(2)
+            col1.metric("Max Home Price", f"${affordable['Max Home Price']:,.0f}")
+            col2.metric("Max Loan Amount", f"${affordable['Max Loan Amount']:,.0f}")
+            st.caption(f"At {down_payment_percent_input:g}% down, {interest_rate:g}% over {loan_term_years} years with your tax, insurance, HOA and maintenance.")
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    @tab_fragment("table tab")
+    def table_tab():
+        from components.schedule_grid import render_schedule_grid
+
+        st.markdown('<div class="chart-kpi"><h3>📋 Monthly Amortization Schedule</h3></div>', unsafe_allow_html=True)
+
+        with st.expander("📅 Amortization Table", expanded=True):
+            # Only the visible page is sent to the browser; sort and filter run on the cached arrays
+            render_schedule_grid(loan_schedule())
+
+    @tab_fragment("analysis tab")
+    def analysis_tab():
+        from engine.montecarlo import stream_stress_test
+
+        schedule_columns = loan_schedule()
+        min_year = int(schedule_columns["Month"][0] / 12)
+        max_year = int(schedule_columns["Month"][-1] / 12)
+        year_range = st.slider("Select Year Range", min_year, max_year, (min_year, max_year))
+        months_per_period = period_view("analysis")
+        # Views into the cached schedule or its rollup; moving the slider reruns only this tab
+        first_month, last_month = year_range[0] * 12, (year_range[1] + 1) * 12 - 1
+        if months_per_period == 1:
+            filtered = amortization.month_range(schedule_columns, first_month, last_month)
+        else:
+            filtered = period_range(schedule_rollup(months_per_period), first_month, last_month)
+        x_title, per_period = period_titles(months_per_period)
+        # 📈 Balance Timeline
+
+        st.markdown('<div class="chart-kpi"><h3>📈 Balance Timeline</h3></div>', unsafe_allow_html=True)
+        with st.expander("📉 Balance Over Time", expanded=True), perf.stage("analysis › balance chart"):
+            fig1 = go.Figure()
+            fig1_stats = {}
+            fig1.add_trace(line_trace(
+            filtered["Month"],
+            filtered["Balance"],
+            fig1_stats,
+            mode='lines+markers',
+            name='Balance',
+            line=dict(color='blue')
+            ))
+            fig1.update_layout(
+            xaxis_title=x_title,
+            yaxis_title="Balance ($)",
+            template="plotly_white",
+            legend=dict(x=1.05, y=1),
+            margin=dict(r=120)
+            )
+            st.plotly_chart(fig1, use_container_width=True)
+            payload_caption(fig1_stats)
+
+        # 📊 Principal vs Interest
+        st.markdown('<div class="chart-kpi"><h3>📊 Principal vs Interest</h3></div>', unsafe_allow_html=True)
+        with st.expander("📊 Principal vs Interest", expanded=True), perf.stage("analysis › principal vs interest chart"):
+            fig2 = go.Figure()
+            fig2_stats = {}
+            fig2.add_trace(line_trace(
+            filtered["Month"],
+            filtered["Principal"],
+            fig2_stats,
+            mode='lines+markers',
+            name='Principal',
+            line=dict(color='green')
+            ))
+            fig2.add_trace(line_trace(
+            filtered["Month"],
+            filtered["Interest"],
+            fig2_stats,
+            mode='lines+markers',
+            name='Interest',
+            line=dict(color='red')
+            ))
+            fig2.update_layout(
+            xaxis_title=x_title,
+            yaxis_title=f"Amount {per_period} ($)",
+            template="plotly_white",
+            legend=dict(x=1.05, y=1),
+            margin=dict(r=120)
+            )
+            st.plotly_chart(fig2, use_container_width=True)
+            payload_caption(fig2_stats)
+
+        # 🏠 HOA & Maintenance
+        st.markdown('<div class="chart-kpi"><h3>🏠 HOA & Maintenance Over Time</h3></div>', unsafe_allow_html=True)
+        with st.expander("🏠 HOA & Maintenance", expanded=True), perf.stage("analysis › HOA & maintenance chart"):
+            fig3 = go.Figure()
+            fig3_stats = {}
+            fig3.add_trace(line_trace(
+            filtered["Month"],
+            filtered["HOA"],
+            fig3_stats,
+            mode='lines+markers',
+            name='HOA',
+            line=dict(color='purple')
+            ))
+            fig3.add_trace(line_trace(
+            filtered["Month"],
+            filtered["Maintenance"],
+            fig3_stats,
+            mode='lines+markers',
+            name='Maintenance',
+            line=dict(color='orange')
+            ))
+            fig3.update_layout(
+            xaxis_title=x_title,
+            yaxis_title=f"Cost {per_period} ($)",
+            template="plotly_white",
+            legend=dict(x=1.05, y=1),
+            margin=dict(r=120)
+            )
+            st.plotly_chart(fig3, use_container_width=True)
+            payload_caption(fig3_stats)
+
+        # 🎲 Stress Test
+        st.markdown('<div class="chart-kpi"><h3>🎲 Stress Test</h3></div>', unsafe_allow_html=True)
+        with st.expander("🎲 Rate, Inflation & Income Scenarios"), perf.stage("analysis › stress test"):
+            st.caption("Simulates ARM-style rate resets after 5 years, HOA/maintenance inflation and income shocks.")
+            col1, col2 = st.columns(2)
+            stress_paths = col1.number_input("Paths", min_value=1000, max_value=100000, value=10000, step=1000)
+            stress_seed = col2.number_input("Seed", min_value=0, value=0, step=1)
+            if st.button("▶️ Run Stress Test"):
+                progress = st.progress(0.0)
+                for paths_done, stress_bands in stream_stress_test(sidebar_inputs, stress_paths, stress_seed):
+                    progress.progress(paths_done / stress_paths)
+                st.session_state.stress_bands = stress_bands
+
+            if "stress_bands" in st.session_state:
+                stress_bands = st.session_state.stress_bands
+                stress_metric = st.selectbox("Metric", ["Balance", "Payment", "DTI %"])
+                fig_stress = go.Figure()
+                fig_stress.add_trace(go.Scatter(
+                x=stress_bands["Month"],
+                y=stress_bands[f"{stress_metric} P95"],
+                mode='lines',
+                name='P95',
+                line=dict(color='lightsteelblue')
+                ))
+                fig_stress.add_trace(go.Scatter(
+                x=stress_bands["Month"],
+                y=stress_bands[f"{stress_metric} P5"],
+                mode='lines',
+                name='P5',
+                fill='tonexty',
+                line=dict(color='lightsteelblue')
+                ))
+                fig_stress.add_trace(go.Scatter(
+                x=stress_bands["Month"],
+                y=stress_bands[f"{stress_metric} P50"],
+                mode='lines',
+                name='P50',
+                line=dict(color='navy')
+                ))
+                fig_stress.update_layout(
+                xaxis_title="Month",
+                yaxis_title=stress_metric,
+                template="plotly_white",
+                legend=dict(x=1.05, y=1),
+                margin=dict(r=120)
+                )
+                st.plotly_chart(fig_stress, use_container_width=True)
+
+    @tab_fragment("compare tab")
+    def compare_tab():
+        import pandas as pd
+        from engine.arm import ARM_DEFAULTS
+        from engine.compare import budget_split, compare_scenarios
+        from engine.sensitivity import GRID_METRICS, sensitivity_grid
+
+        st.markdown('<div class="chart-kpi"><h3>📊 Side-by-Side Loan Comparison</h3></div>', unsafe_allow_html=True)
+        with st.expander("🧾 Scenarios", expanded=True):
+            st.caption("Add a row per offer. Tax, insurance and PMI rules come from the sidebar; its payment plan "
+                       "and exact cents do not, so every row is plain monthly payments plus its own Extra %. "
+                       f"An ARM fixed period above 0 makes the row an adjustable-rate loan that then resets every "
+                       f"{ARM_DEFAULTS['reset_every']} months to ARM Index % + {ARM_DEFAULTS['margin']}, moving at most "
+                       f"{ARM_DEFAULTS['periodic_cap']}% per reset and {ARM_DEFAULTS['lifetime_cap']}% over its start rate.")
+            scenario_inputs = st.data_editor(pd.DataFrame({
+            "Scenario": ["Loan A", "Loan B"],
+            "Home Price": [300000, 325000],
+            "Down Payment %": [20.0, 20.0],
+            "Interest Rate %": [6.5, 6.0],
+            "Term (years)": [30, 30],
+            "Monthly Income": [6000, 6000],
+            "Extra %": [extra_payment_percent, extra_payment_percent],
+            "HOA": [base_hoa, base_hoa],
+            "Maintenance": [base_maint, base_maint],
+            "ARM Fixed (years)": [0, 0],
+            "ARM Index %": [4.0, 4.0],
+            }), num_rows="dynamic", key="compare_scenarios", use_container_width=True)
+
+        scenario_inputs = scenario_inputs.dropna()
+        scenario_inputs = scenario_inputs[
+            (scenario_inputs["Home Price"] > 0) &
+            (scenario_inputs["Down Payment %"] >= 0) & (scenario_inputs["Down Payment %"] < 100) &
+            (scenario_inputs["Term (years)"] > 0)
+        ]
+        # Only the sidebar's tax, insurance and PMI settings carry over; the plan fields are reset
+        # so each row differs from the others by its own columns alone
+        compare_loans = [{
+        **sidebar_inputs,
+        **PLAN_DEFAULTS,
+        'exact_cents': False,
+        'home_price': row["Home Price"],
+        'down_payment_percent': row["Down Payment %"],
+        'interest_rate': row["Interest Rate %"],
+        'loan_term_years': int(row["Term (years)"]),
+        'monthly_income': row["Monthly Income"],
+        'extra_payment_percent': row["Extra %"],
+        'base_hoa': row["HOA"],
+        'base_maint': row["Maintenance"],
+        'arm_fixed_years': row["ARM Fixed (years)"],
+        'arm_index_rate': row["ARM Index %"],
+        } for row in scenario_inputs.to_dict("records")]
+
+        if compare_loans:
+            df_compare, compare_schedules = compare_scenarios(
+                compare_loans, list(scenario_inputs["Scenario"].astype(str)), cache=schedule_cache
+            )
+
+            st.markdown("### 🔍 Loan Comparison Summary")
+            with st.expander("📊 Comparison Summary", expanded=True):
+                st.dataframe(df_compare, use_container_width=True, hide_index=True)
+
+            with st.expander("📉 Balance Over Time", expanded=True):
+                fig_compare = go.Figure()
+                fig_compare_stats = {}
+                for name, columns in zip(df_compare["Scenario"], compare_schedules):
+                    fig_compare.add_trace(line_trace(
+                    columns["Month"],
+                    columns["Balance"],
+                    fig_compare_stats,
+                    mode='lines',
+                    name=name
+                    ))
+                fig_compare.update_layout(
+                xaxis_title="Month",
+                yaxis_title="Balance ($)",
+                template="plotly_white",
+                legend=dict(x=1.05, y=1),
+                margin=dict(r=120)
+                )
+                st.plotly_chart(fig_compare, use_container_width=True)
+                payload_caption(fig_compare_stats)
+
+            with st.expander("💰 Split an Extra Budget"):
+                extra_budget = st.number_input("Extra Monthly Budget ($)", 0, None, 500, step=50)
+                df_split = budget_split(compare_loans, extra_budget, list(df_compare["Scenario"]))
+                st.dataframe(df_split, use_container_width=True, hide_index=True)
+                st.caption("Each slice of the budget goes to the scenario where it saves the most interest, "
+                           "on top of its own Extra %. ARMs are treated at their starting rate.")
+        else:
+            st.info("Add at least one complete scenario to compare.")
+
+        # 🔥 Sensitivity Grid
+        st.markdown('<div class="chart-kpi"><h3>🔥 Rate × Price Sensitivity</h3></div>', unsafe_allow_html=True)
+        with st.expander("🔥 Sensitivity Grid"):
+            col1, col2 = st.columns(2)
+            grid_rates = col1.slider("Interest Rate Range (%)", 0.5, 15.0, (max(0.5, interest_rate - 2), min(15.0, interest_rate + 2)), step=0.125)
+            grid_prices = col2.slider("Home Price Range ($)", 10000, 3000000, (int(home_price * 0.5), int(home_price * 1.5)), step=10000)
+            grid_steps = col1.slider("Grid Resolution", 10, 100, 50)
+            grid_metric = col2.selectbox("Metric", GRID_METRICS)
+
+            # Only computed on request, and kept with the inputs it was computed from, so
+            # Compare reruns and the down payment / extra sliders below don't redo it
+            grid_inputs = (dict(sidebar_inputs), grid_rates, grid_prices, grid_steps)
+            if st.button("▶️ Compute Grid"):
+                grid_start = time.perf_counter()
+                grid = sensitivity_grid(
+                    sidebar_inputs,
+                    np.linspace(grid_rates[0], grid_rates[1], grid_steps),
+                    np.linspace(grid_prices[0], grid_prices[1], grid_steps),
+                    np.arange(0, 30.1, 2.5),
+                    np.arange(0, 50.1, 5),
+                )
+                st.session_state.sensitivity = {
+                    'inputs': grid_inputs, 'grid': grid, 'seconds': time.perf_counter() - grid_start,
+                }
+
+            if "sensitivity" in st.session_state:
+                grid = st.session_state.sensitivity['grid']
+                grid_seconds = st.session_state.sensitivity['seconds']
+                if st.session_state.sensitivity['inputs'] != grid_inputs:
+                    st.caption("The sidebar or ranges changed since this grid was computed; compute it again to update.")
+
+                col1, col2 = st.columns(2)
+                grid_down = col1.select_slider("Down Payment %", options=list(grid["axes"]["Down Payment %"]), value=20.0)
+                grid_extra = col2.select_slider("Extra % of Income", options=list(grid["axes"]["Extra %"]), value=10.0)
+                down_index = list(grid["axes"]["Down Payment %"]).index(grid_down)
+                extra_index = list(grid["axes"]["Extra %"]).index(grid_extra)
+
+                fig_grid = go.Figure(go.Heatmap(
+                x=grid["axes"]["Home Price"],
+                y=grid["axes"]["Interest Rate"],
+                z=grid[grid_metric][:, :, down_index, extra_index],
+                colorscale="Viridis",
+                colorbar=dict(title=grid_metric)
+                ))
+                fig_grid.update_layout(
+                xaxis_title="Home Price ($)",
+                yaxis_title="Interest Rate (%)",
+                template="plotly_white",
+                margin=dict(r=120)
+                )
+                st.plotly_chart(fig_grid, use_container_width=True)
+                st.caption(f"{grid[grid_metric].size:,} scenarios evaluated in {grid_seconds * 1000:.0f} ms")
+
+
+
+    @tab_fragment("archive tab")
+    def archive_tab():
+        from components.history_grid import render_history_grid
+        from engine import report
+
+        st.markdown('<div class="chart-kpi"><h3>📂 Calculation History</h3></div>', unsafe_allow_html=True)
+        with st.expander("📁 View Saved Calculations", expanded=True):
+            selected, history_filters = render_history_grid(st.session_state.history_store)
+
+            if selected:
+                selected_data = selected[0]
+
+                st.download_button(
+                label="📥 Download Selected Report as PDF",
+                data=lambda: report.report_bytes(selected_data),
+                file_name="mortgage_report.pdf",
+                mime="application/pdf"
+                )
+
+            if history_filters:
+                st.download_button(
+                label="🗂️ Download Matching Reports (ZIP)",
+                # Rendered in-process: no worker pool is started from the server
+                data=lambda: report.reports_zip(
+                    st.session_state.history_store.query(**history_filters).to_dict("records"), workers=1
+                ),
+                file_name="mortgage_reports.zip",
+                mime="application/zip"
+                )
+
+    @tab_fragment("export tab")
+    def export_tab():
+        from engine import export, report
+        from engine.rollups import report_rows
+
+        # Files, and the schedule behind them, are only built when a button is clicked
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.download_button("Download CSV", data=lambda: export.csv_bytes(loan_schedule()), file_name="monthly_amortization.csv", mime="text/csv")
+        with col2:
+            st.download_button("Download Parquet", data=lambda: export.parquet_bytes(loan_schedule()), file_name="monthly_amortization.parquet", mime="application/vnd.apache.parquet")
+        with col3:
+            st.download_button("Download Arrow", data=lambda: export.arrow_bytes(loan_schedule()), file_name="monthly_amortization.arrow", mime="application/vnd.apache.arrow.file")
+        pdf_data = {
+        "Home Price": home_price,
+        "Loan Amount": loan_amount,
+        "Interest Rate": interest_rate,
+        "Loan Term": loan_term_years,
+        "P&I": round(monthly_principal_interest, 2),
+        "Tax": round(monthly_property_tax, 2),
+        "Insurance": round(monthly_insurance, 2),
+        "PMI": round(initial_pmi_monthly, 2),
+        "HOA": round(base_hoa, 2),
+        "Maintenance": round(base_maint, 2),
+        "Total Payment": round(total_monthly_payment, 2),
+        "DTI": round((total_monthly_payment / monthly_income) * 100, 2),
+        "Payoff Time": f"{years}y {months}m",
+        "Total Paid": round(loan_summary["Total Paid"], 2),
+        "Total Interest": round(loan_summary["Total Interest"], 2),
+        }
+
+        st.download_button(
+        label="📄 Download PDF Report",
+        data=lambda: report.report_bytes({**pdf_data, report.YEARLY_FIELD: report_rows(schedule_rollup(12))}),
+        file_name="Mortgage_Summary.pdf",
+        mime="application/pdf"
+        )
+
+    # 🗂️ Render the open tab
+    for tab, render_tab in (
+        (tab1, payment_tab),
+        (tab2, affordability_tab),
+        (tab3, table_tab),
+        (tab4, analysis_tab),
+        (tab5, compare_tab),
+        (tab6, archive_tab),
+        (tab7, export_tab),
+    ):
+        if tab.open:
+            with tab:
+                render_tab()
+
+    # After the tab, which is what builds the schedule if anything does
+    cache_stats = schedule_cache.stats()
+    st.sidebar.caption(
+        f"Shared schedule cache: {cache_stats['entries']} schedules · {cache_stats['hits'] + cache_stats['disk_hits']} hits · "
+        f"{cache_stats['misses']} misses · {cache_stats['evictions']} evictions"
+    )
+
+perf_record = perf.finish()
+if perf_record:
+    from components.perf_panel import render_perf_panel
+
+    keep_perf_record(perf_record)
+    render_perf_panel(st.session_state.perf_runs)
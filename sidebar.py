@@ -1 +1,42 @@
+import streamlit as st
 
+from engine.loans import LOAN_DEFAULTS, LOAN_PRESETS, preset_defaults
+from engine.payments import PAYMENT_FREQUENCIES, PLAN_DEFAULTS
+
+
+def render_sidebar():
+    st.sidebar.header("Loan Setup")
+    home_price = st.sidebar.number_input("Home Price ($)", min_value=10000, value=LOAN_DEFAULTS['home_price'], step=1000)
+    loan_type = st.sidebar.selectbox("Loan Type Preset", list(LOAN_PRESETS))
+
+    default_down_percent, default_interest, default_term = preset_defaults(loan_type)
+
+    inputs = {
+        'loan_type': loan_type,
+        'home_price': home_price,
+        'down_payment_percent': st.sidebar.number_input("Down Payment (% of Home Price)", 0.0, 100.0, value=default_down_percent, step=0.5),
+        'loan_term_years': st.sidebar.selectbox("Loan Term (years)", [15, 30], index=0 if default_term == 15 else 1),
+        'interest_rate': st.sidebar.number_input("Interest Rate (%)", min_value=0.0, value=default_interest, step=0.1),
+        'property_tax_rate': st.sidebar.number_input("Property Tax Rate (%)", min_value=0.0, value=LOAN_DEFAULTS['property_tax_rate'], step=0.1),
+        'annual_insurance': st.sidebar.number_input("Annual Home Insurance ($)", min_value=0, value=LOAN_DEFAULTS['annual_insurance'], step=100),
+        'monthly_income': st.sidebar.number_input("Monthly Income ($)", min_value=0, value=LOAN_DEFAULTS['monthly_income'], step=100),
+        'extra_payment_percent': st.sidebar.slider("Extra % of Income Toward Loan Payoff", 0, 50, LOAN_DEFAULTS['extra_payment_percent']),
+        'pmi_drops_off': st.sidebar.checkbox("PMI drops off at 20% equity", value=LOAN_DEFAULTS['pmi_drops_off']),
+        'base_hoa': st.sidebar.number_input("Monthly HOA Fee ($)", min_value=0, value=LOAN_DEFAULTS['base_hoa'], step=50),
+        'base_maint': st.sidebar.number_input("Monthly Maintenance Estimate ($)", min_value=0, value=LOAN_DEFAULTS['base_maint'], step=50),
+        'exact_cents': st.sidebar.checkbox("Exact cents (fixed-point schedule)", value=False,
+                                           help="Round each month's interest to the cent and true up the last payment, as a lender statement does"),
+    }
+
+    with st.sidebar.expander("🗓️ Payment Plan"):
+        inputs['payment_frequency'] = st.selectbox(
+            "Payment Frequency", list(PAYMENT_FREQUENCIES), format_func=str.title,
+            help="Biweekly and weekly plans pay 13 monthly payments' worth a year",
+        )
+        inputs['annual_lump_sum'] = st.number_input("Yearly Lump Sum ($)", min_value=0, value=0, step=500,
+                                                    help="Paid toward principal with every 12th payment, e.g. a bonus")
+        inputs['lump_sum_month'] = PLAN_DEFAULTS['lump_sum_month']
+        inputs['extra_step_year'] = st.number_input("Change Extra % From Year", min_value=0, max_value=40, value=0,
+                                                    help="0 keeps the extra % above for the whole loan")
+        inputs['extra_step_percent'] = st.slider("New Extra % of Income", 0, 50, 0)
+    return inputs
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from benchmarks.reference import amortize_reference
+from benchmarks.run import CHECK_TOLERANCE, LOANS, loan_args, random_loans
+from engine.amortization import COLUMNS, amortize, amortize_stack, schedule_frame
+
+
+def assert_matches_reference(args):
+    expected = amortize_reference(*args)
+    actual = schedule_frame(amortize(*args))
+    # The loop can leave a $0 row behind for float residue the engine treats as paid off
+    if len(expected) == len(actual) + 1 and expected['Principal'].iloc[-1] == 0:
+        expected = expected.iloc[:-1]
+    assert len(actual) == len(expected)
+    np.testing.assert_allclose(actual[COLUMNS].to_numpy(), expected[COLUMNS].to_numpy(), rtol=0, atol=CHECK_TOLERANCE)
+
+
+@pytest.mark.parametrize('loan', LOANS)
+def test_matches_reference_loop(loan):
+    assert_matches_reference(loan_args(*loan))
+
+
+@pytest.mark.parametrize('i', range(25))
+def test_random_loans_match_reference_loop(i):
+    assert_matches_reference(tuple(np.asarray(values[i]).item() for values in random_loans(25, seed=3)))
+
+
+def test_zero_rate_matches_reference_loop():
+    assert_matches_reference((300000, 20.0, 0.0, 30, 6000, 5, True, 100, 150))
+
+
+def test_stack_rows_match_single_runs():
+    args = random_loans(40, seed=5)
+    for i, columns in enumerate(amortize_stack(*args)):
+        single = amortize(*(np.asarray(values[i]).item() for values in args))
+        assert list(columns) == COLUMNS
+        for name in COLUMNS:
+            np.testing.assert_array_equal(columns[name], single[name])
+
+
+def test_schedule_closes_out():
+    columns = amortize(*loan_args(30, 10, 10.0))
+    assert columns['Balance'][-1] == 0
+    assert columns['Cumulative Principal'][-1] == pytest.approx(300000 * 0.9, abs=0.01)
+    np.testing.assert_array_equal(columns['Month'], np.arange(1, len(columns['Month']) + 1))
+
@@ -0,0 +1,114 @@
+import os
+
+import numpy as np
+import pytest
+
+from engine.amortization import amortize
+from engine.cache import ScheduleCache, cache_key
+from engine.loans import LOAN_DEFAULTS, amortize_args
+
+
+def loan(home_price=300000, **fields):
+    return {**LOAN_DEFAULTS, 'home_price': home_price, **fields}
+
+
+def table_bytes(table):
+    return sum(values.nbytes for values in table.values())
+
+
+def test_second_lookup_is_a_hit():
+    cache = ScheduleCache()
+    first = cache.get_or_compute(loan())
+    second = cache.get_or_compute(loan())
+    assert second is first
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_key_ignores_float_noise():
+    assert cache_key(loan(300000.001)) == cache_key(loan(300000))
+    assert cache_key(loan(300000.01)) != cache_key(loan(300000))
+
+
+def test_results_are_read_only():
+    columns, summary = ScheduleCache().get_or_compute(loan())
+    with pytest.raises(ValueError):
+        columns['Balance'][0] = 0
+    with pytest.raises(TypeError):
+        summary['Total Interest'] = 0
+    np.testing.assert_array_equal(columns['Balance'], amortize(*amortize_args(loan()))['Balance'])
+
+
+def test_evicts_least_recently_used_entry():
+    cache = ScheduleCache(max_entries=2)
+    for price in (200000, 300000):
+        cache.get_or_compute(loan(price))
+    cache.get_or_compute(loan(200000))
+    cache.get_or_compute(loan(400000))
+    assert cache_key(loan(200000)) in cache
+    assert cache_key(loan(300000)) not in cache
+    assert cache.stats()['evictions'] == 1
+
+
+def test_byte_limit_keeps_at_least_one_entry():
+    cache = ScheduleCache(max_bytes=1)
+    for price in (200000, 300000, 400000):
+        cache.get_or_compute(loan(price))
+    assert len(cache) == 1
+    assert cache.stats()['evictions'] == 2
+
+
+@pytest.mark.parametrize('exact', [False, True])
+def test_byte_accounting_survives_eviction(exact):
+    # Each entry is charged its size when stored plus its rollups, even though reading derived
+    # columns grows a CentsSchedule afterwards
+    cache = ScheduleCache(max_entries=4)
+    charged = {}
+    for price in range(200000, 500000, 25000):
+        key = cache_key(loan(price)) + (('cents',) if exact else ())
+        columns, _ = cache.get_or_compute(loan(price), exact)
+        charged[key] = columns.nbytes if exact else table_bytes(columns)
+        charged[key] += table_bytes(cache.rollup(loan(price), 12, exact))
+        columns['Balance']
+        charged = {key: size for key, size in charged.items() if key in cache}
+        assert cache.stats()['bytes'] == sum(charged.values())
+    assert len(cache) == 4
+    cache.clear()
+    assert cache.stats()['bytes'] == 0
+
+
+def test_rollup_bytes_are_released_with_the_entry():
+    cache = ScheduleCache(max_entries=1)
+    columns, _ = cache.get_or_compute(loan(200000))
+    table = cache.rollup(loan(200000), 12)
+    assert cache.stats()['bytes'] == table_bytes(columns) + table_bytes(table)
+    columns, _ = cache.get_or_compute(loan(300000))
+    assert cache.stats()['bytes'] == table_bytes(columns)
+
+
+def test_summary_skips_the_schedule_for_plain_loans():
+    cache = ScheduleCache()
+    summary = cache.summary(loan())
+    assert len(cache) == 0
+    assert summary['Payoff Months'] == cache.get_or_compute(loan())[1]['Payoff Months']
+
+
+@pytest.mark.parametrize('exact', [False, True])
+def test_disk_tier_round_trip(tmp_path, exact):
+    first = ScheduleCache(disk_dir=str(tmp_path))
+    columns, summary = first.get_or_compute(loan(), exact)
+    second = ScheduleCache(disk_dir=str(tmp_path))
+    loaded, loaded_summary = second.get_or_compute(loan(), exact)
+    assert second.stats()['disk_hits'] == 1 and second.stats()['misses'] == 0
+    assert dict(loaded_summary) == dict(summary)
+    assert type(loaded) is type(columns)
+    for name in ('Month', 'Payment', 'Balance'):
+        np.testing.assert_array_equal(loaded[name], columns[name])
+
+
+def test_disk_tier_is_pruned_under_its_limit(tmp_path):
+    cache = ScheduleCache(max_entries=1, disk_dir=str(tmp_path), max_disk_bytes=200000)
+    for price in range(200000, 500000, 25000):
+        cache.get_or_compute(loan(price))
+    on_disk = sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path))
+    assert on_disk <= cache.max_disk_bytes
+    assert cache._disk_bytes == on_disk
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from engine.amortization import PAYOFF_TOLERANCE, level_payment
+from engine.arm import amortize_events, arm_events, event_columns, merge_events, refinance, segment_balances
+from engine.cache import ScheduleCache
+from engine.loans import LOAN_DEFAULTS
+from engine.payments import PLAN_DEFAULTS, extra_steps, lump_sums, payment_factor, plan_events, recurring_lump_sum
+
+
+def month_loop(loan_amount, interest_rate, term_months, extra_payment, events, payment_factor=1.0):
+    # Balance after each payment, one month at a time. After payment m, that month's costs,
+    # lump sums and extra changes apply, then any rate or term change re-solves the P&I.
+    columns = {name: values.reshape(-1) for name, values in event_columns(events).items()}
+    rate = interest_rate / 100 / 12
+    maturity = term_months
+    level = float(level_payment(loan_amount, rate, term_months))
+    extra = extra_payment
+    balance = loan_amount
+    balances = [balance]
+    for month in range(1, 1201):
+        if balance <= PAYOFF_TOLERANCE:
+            break
+        balance = balance * (1 + rate) - level * payment_factor - extra
+        todays = [i for i in range(len(columns['month'])) if columns['month'][i] == month]
+        recasts = [i for i in todays if not (np.isnan(columns['rate'][i]) and np.isnan(columns['term'][i]))]
+        for i in [i for i in todays if i not in recasts] + recasts:
+            balance = max(balance + columns['cost'][i], 0.0)
+            balance -= min(max(columns['lump'][i], 0.0), balance)
+            if not np.isnan(columns['extra'][i]):
+                extra = columns['extra'][i]
+            if i in recasts:
+                if not np.isnan(columns['rate'][i]):
+                    rate = columns['rate'][i] / 100 / 12
+                if not np.isnan(columns['term'][i]):
+                    maturity = month + columns['term'][i]
+                level = float(level_payment(balance, rate, maturity - month))
+        balances.append(balance)
+    return np.array(balances)
+
+
+def assert_matches_loop(loan_amount, interest_rate, term_months, extra_payment, events, payment_factor=1.0):
+    expected = month_loop(loan_amount, interest_rate, term_months, extra_payment, events, payment_factor)
+    balances, *_ = segment_balances(
+        np.array([loan_amount]), interest_rate, term_months, extra_payment, events, payment_factor=payment_factor
+    )
+    np.testing.assert_allclose(balances[0, :len(expected)], expected, rtol=1e-9, atol=1e-4)
+
+
+ARM = arm_events(5.63, 30, 4.0)
+YEARLY_LUMP = recurring_lump_sum(3000.0, 12, 12, 360)
+
+
+@pytest.mark.parametrize('events', [merge_events(ARM, YEARLY_LUMP), merge_events(YEARLY_LUMP, ARM)])
+def test_arm_with_lump_sums_matches_month_loop(events):
+    assert_matches_loop(360000.0, 5.63, 360, 400.0, events)
+
+
+def test_merge_order_does_not_change_schedule():
+    first, = amortize_events(400000, 10, 5.63, 30, 8000, 5, events=merge_events(ARM, YEARLY_LUMP))
+    second, = amortize_events(400000, 10, 5.63, 30, 8000, 5, events=merge_events(YEARLY_LUMP, ARM))
+    for name in first:
+        np.testing.assert_array_equal(first[name], second[name])
+
+
+def test_refinance_with_costs_and_lump_in_same_month_matches_month_loop():
+    events = refinance(merge_events(ARM, lump_sums([84], [10000.0])), 84, 4.5, 15, closing_costs=4000.0)
+    assert_matches_loop(360000.0, 5.63, 360, 0.0, events)
+
+
+def test_extra_steps_and_biweekly_match_month_loop():
+    events = merge_events(extra_steps([24, 120], [250.0, 0.0]), YEARLY_LUMP)
+    assert_matches_loop(250000.0, 6.5, 360, 100.0, events, payment_factor=13 / 12)
+
+
+def test_zero_rate_arm_matches_month_loop():
+    assert_matches_loop(200000.0, 0.0, 240, 0.0, arm_events(0.0, 20, 0.5))
+
+
+@pytest.mark.parametrize('plan', [
+    {'payment_frequency': 'biweekly'},
+    {'annual_lump_sum': 5000.0, 'lump_sum_month': 6},
+    {'payment_frequency': 'weekly', 'annual_lump_sum': 2000.0, 'extra_step_year': 3, 'extra_step_percent': 5.0},
+])
+def test_loan_plan_matches_month_loop(plan):
+    # A sidebar loan with a payment plan, as the schedule cache amortizes it
+    loan = {**LOAN_DEFAULTS, **PLAN_DEFAULTS, 'down_payment_percent': 10.0, **plan}
+    columns, summary = ScheduleCache().get_or_compute(loan)
+    loan_amount = loan['home_price'] * (1 - loan['down_payment_percent'] / 100)
+    extra = loan['extra_payment_percent'] / 100 * loan['monthly_income']
+    expected = month_loop(loan_amount, loan['interest_rate'], loan['loan_term_years'] * 12, extra,
+                          plan_events(loan), payment_factor(loan))
+    assert summary['Payoff Months'] == len(columns['Month']) == len(expected) - 1
+    # The loop overpays on the last month, where the schedule pays off exactly
+    assert columns['Balance'][-1] == 0 and expected[-1] <= PAYOFF_TOLERANCE
+    np.testing.assert_allclose(columns['Balance'][:-1], expected[1:-1], rtol=0, atol=0.005 + 1e-6)
@@ -0,0 +1,71 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.run import loan_args, random_loans
+from engine.amortization import COLUMNS, amortize, amortize_stack
+from engine.export import arrow_bytes, csv_bytes, iter_csv, parquet_bytes, write_parquet
+from engine.fixedpoint import amortize_cents
+
+
+def scenarios():
+    return [(f"Loan {i + 1}", columns) for i, columns in enumerate(amortize_stack(*random_loans(5, seed=2)))]
+
+
+def expected_frame(source, label_column='Scenario'):
+    return pd.concat(
+        [pd.DataFrame({label_column: label, **{name: columns[name] for name in COLUMNS}}) for label, columns in source],
+        ignore_index=True,
+    )
+
+
+def test_csv_round_trip():
+    columns = amortize(*loan_args(30, 10, 10.0))
+    frame = pd.read_csv(io.BytesIO(csv_bytes(columns)))
+    assert list(frame.columns) == COLUMNS
+    assert frame['Month'].dtype == np.int64
+    np.testing.assert_allclose(frame[COLUMNS].to_numpy(), pd.DataFrame(columns)[COLUMNS].to_numpy(), rtol=0, atol=1e-9)
+
+
+def test_csv_has_one_header_across_chunks():
+    source = scenarios()
+    blocks = list(iter_csv(source, chunk_rows=500))
+    assert len(blocks) > 1
+    frame = pd.read_csv(io.BytesIO(b"".join(blocks)))
+    expected = expected_frame(source)
+    assert len(frame) == len(expected)
+    assert list(frame['Scenario'].unique()) == [label for label, _ in source]
+
+
+@pytest.mark.parametrize('chunk_rows', [100, 50000])
+def test_parquet_round_trip_keeps_values_and_dtypes(chunk_rows):
+    source = scenarios()
+    buffer = io.BytesIO()
+    write_parquet(source, buffer, chunk_rows=chunk_rows)
+    frame = pd.read_parquet(io.BytesIO(buffer.getvalue()))
+    expected = expected_frame(source)
+    assert frame['Month'].dtype == np.int16
+    assert all(frame[name].dtype == np.float64 for name in COLUMNS if name != 'Month')
+    pd.testing.assert_frame_equal(frame, expected.astype({'Month': 'int16'}))
+
+
+def test_arrow_round_trip():
+    source = scenarios()
+    frame = pd.read_feather(io.BytesIO(arrow_bytes(source)))
+    pd.testing.assert_frame_equal(frame, expected_frame(source).astype({'Month': 'int16'}))
+
+
+def test_cents_schedule_exports_dollars():
+    schedule = amortize_cents(*loan_args(30, 10, 10.0))
+    frame = pd.read_parquet(io.BytesIO(parquet_bytes(schedule)))
+    assert list(frame.columns) == COLUMNS
+    np.testing.assert_array_equal(frame['Balance'].to_numpy(), schedule['Balance'])
+    assert frame['Balance'].iloc[-1] == 0
+
+
+def test_dataframe_source_is_written_as_is():
+    frame = pd.DataFrame({'loan_id': np.repeat([1, 2], 3), 'Balance': np.arange(6, dtype=float)})
+    pd.testing.assert_frame_equal(pd.read_parquet(io.BytesIO(parquet_bytes(frame))), frame)
+    pd.testing.assert_frame_equal(pd.read_csv(io.BytesIO(csv_bytes(frame))), frame)
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from benchmarks.run import LOANS, loan_args, random_loans
+from engine.amortization import COLUMNS, amortize
+from engine.fixedpoint import CentsSchedule, amortize_cents, amortize_cents_stack, to_cents
+
+
+@pytest.mark.parametrize('loan', LOANS)
+def test_totals_are_exact_in_cents(loan):
+    schedule = amortize_cents(*loan_args(*loan))
+    assert int(schedule.principal.sum()) == schedule.loan
+    assert schedule.balance_cents[-1] == 0
+    assert (schedule.balance_cents >= 0).all()
+    summary = schedule.summary()
+    assert summary['Total Interest'] * 100 == pytest.approx(int(schedule.interest.sum()), abs=1e-6)
+    parts = sum(int(getattr(schedule, name).sum()) for name in
+                ('principal', 'interest', 'pmi_cents', 'hoa_cents', 'maintenance_cents'))
+    assert summary['Total Paid'] * 100 == pytest.approx(parts, abs=1e-6)
+
+
+@pytest.mark.parametrize('loan', LOANS)
+def test_close_to_float_engine(loan):
+    args = loan_args(*loan)
+    exact, floating = amortize_cents(*args), amortize(*args)
+    assert len(exact['Month']) == len(floating['Month'])
+    np.testing.assert_array_equal(exact['HOA'], floating['HOA'])
+    # Rounding each month's interest to the cent moves the totals by at most a cent a month
+    assert exact['Cumulative Interest'][-1] == pytest.approx(floating['Cumulative Interest'][-1], abs=0.01 * len(exact['Month']))
+
+
+def test_numpy_recurrence_matches_python_loop():
+    args = random_loans(12, seed=4)
+    stacked = amortize_cents_stack(*args)
+    for i, schedule in enumerate(stacked):
+        single = amortize_cents(*(np.asarray(values[i]).item() for values in args))
+        np.testing.assert_array_equal(schedule.principal, single.principal)
+        np.testing.assert_array_equal(schedule.interest, single.interest)
+
+
+def test_columns_are_dollars_and_read_only():
+    schedule = amortize_cents(*loan_args(30, 10, 10.0))
+    assert list(schedule) == COLUMNS + ['DTI %']
+    np.testing.assert_array_equal(schedule['Principal'], schedule.principal / 100)
+    for name in ('principal', 'interest', 'month', 'balance_cents', 'payment_cents', 'pmi_cents', 'dti_percent'):
+        with pytest.raises(ValueError):
+            getattr(schedule, name)[0] = 0
+    for name in ('Month', 'DTI %'):
+        with pytest.raises(ValueError):
+            schedule[name][0] = 0
+
+
+def test_stored_arrays_round_trip():
+    schedule = amortize_cents(*loan_args(15, 0, 10.0))
+    loaded = CentsSchedule.from_arrays(schedule.arrays())
+    assert loaded.summary() == schedule.summary()
+    for name in COLUMNS:
+        np.testing.assert_array_equal(loaded[name], schedule[name])
+
+
+def test_to_cents_matches_reference_rounding():
+    # The reference loop rounds with Python's round(), which sees 2.675 as the double just below it
+    values = [0.005, 1.234999, 2.675, 1.005, 123456.785]
+    np.testing.assert_array_equal(to_cents(np.array(values)), [round(round(v, 2) * 100) for v in values])
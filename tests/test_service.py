@@ -0,0 +1,139 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+
+from engine.loans import LOAN_DEFAULTS, amortize_args
+from engine.service import MAX_SCHEDULE_LOANS, CalculationService, RequestError, parse_loans
+from engine.summary import payoff_summary
+
+
+# ----------------------------------------------------------------------------------------
+# Validation
+# -----------------------------------------------------------------------------------------
+def test_missing_fields_take_defaults():
+    loan, = parse_loans({'home_price': 450000})
+    assert loan['home_price'] == 450000.0
+    assert loan['interest_rate'] == LOAN_DEFAULTS['interest_rate']
+    assert loan['loan_id'] == 0
+
+
+@pytest.mark.parametrize('body, status', [
+    ([], HTTPStatus.BAD_REQUEST),
+    ({'loans': "x"}, HTTPStatus.BAD_REQUEST),
+    ({'loans': [1]}, HTTPStatus.BAD_REQUEST),
+    ({'price': 1}, HTTPStatus.BAD_REQUEST),
+    ({'home_price': "cheap"}, HTTPStatus.BAD_REQUEST),
+    ({'home_price': None}, HTTPStatus.BAD_REQUEST),
+    ({'pmi_drops_off': "false"}, HTTPStatus.UNPROCESSABLE_ENTITY),
+    ({'pmi_drops_off': 0}, HTTPStatus.UNPROCESSABLE_ENTITY),
+    ({'home_price': float('nan')}, HTTPStatus.UNPROCESSABLE_ENTITY),
+    ({'monthly_income': float('inf')}, HTTPStatus.UNPROCESSABLE_ENTITY),
+    ({'home_price': 0}, HTTPStatus.UNPROCESSABLE_ENTITY),
+    ({'down_payment_percent': 100}, HTTPStatus.UNPROCESSABLE_ENTITY),
+    ({'loan_term_years': 0}, HTTPStatus.UNPROCESSABLE_ENTITY),
+    ({'interest_rate': -1}, HTTPStatus.UNPROCESSABLE_ENTITY),
+])
+def test_rejects_bad_loans(body, status):
+    with pytest.raises(RequestError) as error:
+        parse_loans(body)
+    assert error.value.status == status
+
+
+def test_caps_batch_size():
+    with pytest.raises(RequestError) as error:
+        parse_loans({'loans': [{}] * 3}, max_loans=2)
+    assert error.value.status == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+
+# ----------------------------------------------------------------------------------------
+# HTTP
+# -----------------------------------------------------------------------------------------
+async def exchange(service, raw):
+    reader, writer = await asyncio.open_connection(service.host, service.port)
+    writer.write(raw)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ")[1])
+    length = int(head.lower().split(b"content-length: ")[1].split(b"\r\n")[0])
+    body = json.loads(await reader.readexactly(length))
+    writer.close()
+    return status, body
+
+
+def post(path, payload, headers=""):
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+    return f"POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n{headers}\r\n".encode('latin-1') + body
+
+
+def serve(*requests):
+    # Answers from an in-process service (workers=0) on a free port
+    async def run():
+        service = await CalculationService(port=0, workers=0).start()
+        try:
+            return [await exchange(service, raw) for raw in requests]
+        finally:
+            await service.close()
+
+    return asyncio.run(run())
+
+
+def test_summary_endpoint_matches_engine():
+    (status, body), = serve(post('/summary', {'loans': [{'home_price': 250000}, {'home_price': 500000}]}))
+    assert status == HTTPStatus.OK
+    expected = payoff_summary(*amortize_args({**LOAN_DEFAULTS, 'home_price': 500000}))
+    assert body['columns']['loan_id'] == [0, 1]
+    assert body['columns']['Payoff Months'][1] == expected['Payoff Months']
+    assert body['columns']['Total Interest'][1] == pytest.approx(expected['Total Interest'], abs=0.005)
+
+
+def test_schedule_endpoint_returns_columns():
+    (status, body), = serve(post('/schedule', {'home_price': 250000}))
+    assert status == HTTPStatus.OK
+    schedule, = body['schedules']
+    assert schedule['rows'] == len(schedule['columns']['Balance'])
+    assert schedule['columns']['Balance'][-1] == 0
+
+
+@pytest.mark.parametrize('raw, status', [
+    (post('/summary', b"{not json"), HTTPStatus.BAD_REQUEST),
+    (post('/summary', b'{"home_price": NaN}'), HTTPStatus.UNPROCESSABLE_ENTITY),
+    (post('/summary', {'pmi_drops_off': "false"}), HTTPStatus.UNPROCESSABLE_ENTITY),
+    (post('/nowhere', {}), HTTPStatus.NOT_FOUND),
+    (b"GET /summary HTTP/1.1\r\n\r\n", HTTPStatus.METHOD_NOT_ALLOWED),
+    (post('/schedule', {'loans': [{}] * (MAX_SCHEDULE_LOANS + 1)}), HTTPStatus.REQUEST_ENTITY_TOO_LARGE),
+    (b"POST /summary HTTP/1.1\r\nContent-Length: -5\r\n\r\n", HTTPStatus.BAD_REQUEST),
+    (b"POST /summary HTTP/1.1\r\nContent-Length: ten\r\n\r\n", HTTPStatus.BAD_REQUEST),
+    (b"POST /summary HTTP/1.1\r\nContent-Length: 999999999\r\n\r\n", HTTPStatus.REQUEST_ENTITY_TOO_LARGE),
+])
+def test_error_statuses(raw, status):
+    (answer, body), = serve(raw)
+    assert answer == status
+    assert 'error' in body
+
+
+def test_errors_are_counted():
+    (_, _), (_, health) = serve(post('/summary', b"{not json"), b"GET /health HTTP/1.1\r\n\r\n")
+    assert health['errors'] == 1 and health['requests'] == 2
+
+
+def test_client_leaving_mid_body_is_not_an_error():
+    async def run():
+        errors = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        service = await CalculationService(port=0, workers=0).start()
+        try:
+            reader, writer = await asyncio.open_connection(service.host, service.port)
+            writer.write(b"POST /summary HTTP/1.1\r\nContent-Length: 100\r\n\r\n{\"home")
+            await writer.drain()
+            writer.close()
+            await asyncio.sleep(0.05)
+            # Copied now: connections still open at shutdown are cancelled and reported too
+            return list(errors), await exchange(service, post('/summary', {}))
+        finally:
+            await service.close()
+
+    errors, (status, _) = asyncio.run(run())
+    assert errors == []
+    assert status == HTTPStatus.OK
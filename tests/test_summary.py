@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from benchmarks.run import LOANS, loan_args, random_loans
+from engine.amortization import amortize, amortize_stack
+from engine.summary import payoff_summary
+
+# Schedule columns are rounded to cents each month, so their sums drift from the closed form
+# by up to half a cent per month per rounding: Payment is rounded once and again through the
+# HOA and maintenance it includes
+CENT = 0.005
+
+
+def assert_matches_schedule(summary, columns):
+    months = len(columns['Month'])
+    pmi_months = int((columns['PMI'] > 0).sum())
+    assert summary['Payoff Months'] == months
+    assert summary['PMI Months'] == pmi_months
+    assert summary['Total Interest'] == pytest.approx(columns['Interest'].sum(), abs=CENT * months)
+    assert summary['Total Paid'] == pytest.approx(columns['Payment'].sum(), abs=3 * CENT * months)
+    assert summary['First Payment'] == pytest.approx(columns['Payment'][0], abs=CENT)
+    if pmi_months:
+        assert summary['Initial PMI'] == pytest.approx(columns['PMI'][0], abs=CENT)
+    assert summary['PMI Drop Month'] == (pmi_months + 1 if 0 < pmi_months < months else 0)
+
+
+@pytest.mark.parametrize('loan', LOANS)
+def test_matches_schedule(loan):
+    args = loan_args(*loan)
+    assert_matches_schedule(payoff_summary(*args), amortize(*args))
+
+
+def test_arrays_match_schedules():
+    args = random_loans(300, seed=1)
+    summary = payoff_summary(*args)
+    for i, columns in enumerate(amortize_stack(*args)):
+        assert_matches_schedule({name: values[i] for name, values in summary.items()}, columns)
+
+
+def test_zero_rate_matches_schedule():
+    args = (300000, 20.0, 0.0, 30, 6000, 5, True, 100, 150)
+    assert_matches_schedule(payoff_summary(*args), amortize(*args))
+
+
+def test_pmi_kept_to_payoff():
+    args = loan_args(30, 0, 10.0)[:6] + (False, 100, 150)
+    summary = payoff_summary(*args)
+    assert summary['PMI Months'] == summary['Payoff Months']
+    assert summary['PMI Drop Month'] == 0
+    assert_matches_schedule(summary, amortize(*args))
+
+
+def test_scalars_come_back_as_python_numbers():
+    summary = payoff_summary(*loan_args(30, 10, 20.0))
+    assert all(isinstance(value, (int, float)) for value in summary.values())
+    assert np.ndim(payoff_summary(*random_loans(3))['Payoff Months']) == 1